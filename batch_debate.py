@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from checkpoint import DebateInterrupted
+from budgets import DEFAULT_REPLY_TOKENS
+from debate_engine import judge_transcript, stream_debate
+from transcript_export import FORMATS, write_transcript
+
+
+def read_topics(path):
+    """One topic per line from a file, or from stdin when path is '-'"""
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [line.strip() for line in stream if line.strip() and not line.startswith('#')]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+class BatchStats:
+    """Running throughput counters for a batch"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.completed = 0
+        self.failed = 0
+        self.turns = 0
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'turns': self.turns,
+            'elapsed_s': round(elapsed, 2),
+            'debates_per_min': round(60 * (self.completed + self.failed) / elapsed, 2),
+            'turns_per_sec': round(self.turns / elapsed, 2),
+        }
+
+
+async def run_one(index, topic, max_turns, fresh, context_window, semaphore, debate_format="round_robin",
+                  judges=0, judge_method="score", **stop_options):
+    async with semaphore:
+        started = time.perf_counter()
+        record = {'index': index, 'topic': topic}
+        try:
+            messages, stop_reason = await stream_debate(
+                topic, max_turns, fresh=fresh, context_window=context_window, debate_format=debate_format, **stop_options
+            )
+            turns = sum(1 for m in messages if m['speaker'] != 'user')
+            record.update(status='completed', messages=messages, turns=turns, stop_reason=stop_reason)
+            if judges:
+                record['verdict'] = await judge_transcript(topic, messages, judges, judge_method, fresh)
+        except DebateInterrupted as e:
+            # Keep the turns that completed before the debate gave up
+            turns = sum(1 for m in e.messages if m['speaker'] != 'user')
+            record.update(status='failed', error=str(e), messages=e.messages, turns=turns)
+        except Exception as e:
+            # One bad debate should not stop the batch
+            record.update(status='failed', error=str(e), turns=0)
+        record['elapsed_s'] = round(time.perf_counter() - started, 3)
+        return record
+
+
+async def run_batch(topics, output, max_turns=10, concurrency=4, fresh=False, progress_every=10, context_window=None,
+                    debate_format="round_robin", transcript_dir=None, transcript_format="txt", judges=0,
+                    judge_method="score", **stop_options):
+    """Run every topic on one event loop with at most `concurrency` debates in flight
+
+    Each finished debate is written to `output` as one JSON line as soon as it completes,
+    and with `transcript_dir` also streamed to <transcript_dir>/<index>.<transcript_format>.
+    With `judges` > 0 each completed record also carries the judge panel's verdict.
+    stop_options (token_budget, cost_budget_usd, max_completion_tokens, deadline_s, stop_when_stale)
+    are passed on to stream_debate.
+    """
+    stats = BatchStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.create_task(run_one(i, t, max_turns, fresh, context_window, semaphore, debate_format, judges, judge_method, **stop_options))
+        for i, t in enumerate(topics)
+    ]
+    for finished in asyncio.as_completed(tasks):
+        record = await finished
+        if record['status'] == 'completed':
+            stats.completed += 1
+            stats.turns += record['turns']
+        else:
+            stats.failed += 1
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        if transcript_dir and record.get('messages'):
+            write_transcript(
+                record['messages'], record['topic'],
+                os.path.join(transcript_dir, f"{record['index']:05d}.{transcript_format}"), transcript_format
+            )
+        done = stats.completed + stats.failed
+        if progress_every and done % progress_every == 0:
+            print(f"[{done}/{len(topics)}] {json.dumps(stats.summary())}", file=sys.stderr)
+    return stats.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many debates headlessly and write one JSONL record per debate")
+    parser.add_argument('topics', nargs='?', default='-', help="File with one topic per line, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file, or '-' for stdout")
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help="Maximum debates running at once")
+    parser.add_argument('--max-turns', type=int, default=10, help="Turns per debate")
+    parser.add_argument('--fresh', action='store_true', help="Skip response cache lookups")
+    parser.add_argument('--context-window', type=int, help="Keep only the last N turns verbatim and summarize older ones")
+    parser.add_argument('--parallel', action='store_true', help="Let John and Jack answer each round concurrently")
+    parser.add_argument('--token-budget', type=int, help="Stop a debate once it has used this many tokens")
+    parser.add_argument('--max-cost', type=float, help="Stop a debate once its estimated cost reaches this many USD")
+    parser.add_argument('--max-reply-tokens', type=int, default=DEFAULT_REPLY_TOKENS, help="Completion token cap per reply")
+    parser.add_argument('--deadline', type=float, help="Stop a debate after this many seconds")
+    parser.add_argument('--transcript-dir', help="Also write each debate's transcript into this directory")
+    parser.add_argument('--transcript-format', choices=list(FORMATS), default='txt')
+    parser.add_argument('--judges', type=int, default=0, help="Score each finished debate with a panel of this many judges")
+    parser.add_argument('--judge-method', choices=['score', 'vote'], default='score', help="Pick the panel winner by average score or majority vote")
+    parser.add_argument('--no-stale-stop', action='store_true', help="Keep debating even when no new arguments come up")
+    args = parser.parse_args()
+
+    topics = read_topics(args.topics)
+    if args.transcript_dir:
+        os.makedirs(args.transcript_dir, exist_ok=True)
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    try:
+        summary = asyncio.run(run_batch(
+            topics, output, args.max_turns, args.concurrency, args.fresh, context_window=args.context_window,
+            debate_format="parallel" if args.parallel else "round_robin",
+            transcript_dir=args.transcript_dir,
+            transcript_format=args.transcript_format,
+            judges=args.judges,
+            judge_method=args.judge_method,
+            token_budget=args.token_budget,
+            cost_budget_usd=args.max_cost,
+            max_completion_tokens=args.max_reply_tokens,
+            deadline_s=args.deadline,
+            stop_when_stale=not args.no_stale_stop
+        ))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Batch finished: {json.dumps(summary)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
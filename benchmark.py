@@ -0,0 +1,603 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# Benchmarks always run offline against the fake model and must not be throttled
+os.environ.setdefault('DEBATE_FAKE_MODEL', '1')
+os.environ.setdefault('ANTHROPIC_RPM', '1000000')
+os.environ.setdefault('ANTHROPIC_ITPM', '1000000000')
+os.environ.setdefault('ANTHROPIC_OTPM', '1000000000')
+os.environ.setdefault('DEBATE_MAX_CONCURRENCY', '1000')
+# Keep benchmark debates out of the debate history
+os.environ.setdefault('DEBATE_DB', ':memory:')
+
+from fake_model import LatencyModel, fake_model_from_env, model_speed
+from model_pool import get_model_pool
+
+TOPIC = "Should AI be regulated by the government?"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values, prefix):
+    return {
+        f'{prefix}_p50_s': round(percentile(values, 50), 4),
+        f'{prefix}_p95_s': round(percentile(values, 95), 4),
+        f'{prefix}_mean_s': round(statistics.fmean(values), 4) if values else 0.0,
+    }
+
+
+class FakeModels:
+    """Installs a fake-client factory on the shared pool and remembers every client it made"""
+
+    def __init__(self, ttft, tps, spread=0.3, failure_rate=0.0):
+        self.ttft = ttft
+        self.tps = tps
+        self.spread = spread
+        self.failure_rate = failure_rate
+        self.clients = []
+        self.created = 0
+        get_model_pool().fake_factory = self.create
+
+    def create(self, model="fake-claude", **create_args):
+        # Smaller models answer faster, as they do for real
+        ttft_factor, tps_factor = model_speed(model)
+        client = fake_model_from_env(
+            model=model,
+            latency=LatencyModel('lognormal', self.ttft * ttft_factor, self.spread),
+            tokens_per_second=self.tps * tps_factor,
+            failure_rate=self.failure_rate,
+            seed=self.created,
+            **create_args
+        )
+        self.created += 1
+        self.clients.append(client)
+        return client
+
+    def reset(self):
+        self.clients = []
+
+    @property
+    def model_time(self):
+        return sum(c.model_time for c in self.clients)
+
+    @property
+    def model_busy_time(self):
+        """Wall-clock time with at least one model call running; overlapping calls count once"""
+        busy, busy_until = 0.0, None
+        for started, finished in sorted(i for c in self.clients for i in c.call_intervals):
+            if busy_until is None or started > busy_until:
+                busy += finished - started
+                busy_until = finished
+            elif finished > busy_until:
+                busy += finished - busy_until
+                busy_until = finished
+        return busy
+
+
+@contextlib.contextmanager
+def peak_memory(result):
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        result['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+        tracemalloc.stop()
+
+
+# Runs in a fresh interpreter so imports are measured cold, the way the first page load pays for them
+STARTUP_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+import frontdebate
+import_s = time.perf_counter() - started
+app = AppTest.from_file('frontdebate.py', default_timeout=60)
+started = time.perf_counter()
+app.run()
+first_paint_s = time.perf_counter() - started
+engine_loaded = 'debate_engine' in sys.modules
+reruns = []
+for i in range(int(sys.argv[1])):
+    started = time.perf_counter()
+    app.slider[0].set_value(6 + 2 * (i % 5)).run()
+    reruns.append(time.perf_counter() - started)
+started = time.perf_counter()
+import debate_engine
+engine_import_s = time.perf_counter() - started
+print(json.dumps({'import_s': import_s, 'first_paint_s': first_paint_s, 'engine_import_s': engine_import_s,
+                  'engine_loaded_on_first_paint': engine_loaded, 'reruns': reruns}))
+"""
+
+
+def bench_startup(repeat, reruns=20):
+    """Cold import of the app, its first script run and the rerun after each slider change"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_PROBE, str(reruns)],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    result = {}
+    result.update(summarize([r['import_s'] for r in runs], 'import'))
+    result.update(summarize([r['first_paint_s'] for r in runs], 'first_paint'))
+    result.update(summarize([t for r in runs for t in r['reruns']], 'rerun'))
+    # Paid on the first debate instead of the first page load
+    result.update(summarize([r['engine_import_s'] for r in runs], 'deferred_engine_import'))
+    result['engine_loaded_on_first_paint'] = any(r['engine_loaded_on_first_paint'] for r in runs)
+    return result
+
+
+def bench_run_debate_sync(fakes, turns, repeat, debate_format="round_robin"):
+    """End-to-end Streamlit debate path: run_debate_sync on the background worker"""
+    from debate_engine import run_debate_sync
+
+    e2e, first, per_turn, overhead = [], [], [], []
+    result = {}
+    with peak_memory(result):
+        for _ in range(repeat):
+            fakes.reset()
+            arrivals = []
+            started = time.perf_counter()
+            messages, error = run_debate_sync(
+                TOPIC,
+                turns,
+                on_message=lambda msg: arrivals.append((msg['speaker'], time.perf_counter())),
+                fresh=True,
+                debate_format=debate_format
+            )
+            total = time.perf_counter() - started
+            if error:
+                raise RuntimeError(error)
+            turn_times = [t for speaker, t in arrivals if speaker != 'user']
+            e2e.append(total)
+            first.append(turn_times[0] - started)
+            per_turn.extend(b - a for a, b in zip([started] + turn_times, turn_times))
+            overhead.append(total - fakes.model_busy_time)
+    result.update(summarize(per_turn, 'turn_latency'))
+    result.update(summarize(e2e, 'end_to_end'))
+    result.update(summarize(first, 'time_to_first_message'))
+    result.update(summarize(overhead, 'orchestration_overhead'))
+    return result
+
+
+class TimedWriter(io.StringIO):
+    """stdout replacement that notes when the first agent line is printed"""
+
+    def __init__(self):
+        super().__init__()
+        self.first_agent_line = None
+
+    def write(self, text):
+        if self.first_agent_line is None and text.startswith(('Host:', 'John:', 'Jack:')):
+            self.first_agent_line = time.perf_counter()
+        return super().write(text)
+
+
+def bench_debate_script(fakes, repeat):
+    """debate.py's run_stream console loop"""
+    os.environ.setdefault('API_KEY', 'benchmark')
+    import debate
+
+    e2e, first, overhead = [], [], []
+    result = {}
+    with peak_memory(result):
+        for _ in range(repeat):
+            fakes.reset()
+            writer = TimedWriter()
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(writer):
+                asyncio.run(debate.main())
+            total = time.perf_counter() - started
+            e2e.append(total)
+            first.append((writer.first_agent_line or started) - started)
+            overhead.append(total - fakes.model_busy_time)
+    result.update(summarize(e2e, 'end_to_end'))
+    result.update(summarize(first, 'time_to_first_message'))
+    result.update(summarize(overhead, 'orchestration_overhead'))
+    return result
+
+
+def bench_transcript(messages_count, repeat):
+    """Transcript export on a synthetic debate: all formats from scratch, and a rerun that reuses them"""
+    import streamlit as st
+    from frontdebate import generate_transcript
+    from session_memory import MessageLog
+    from transcript_export import export_transcripts
+
+    speakers = ['Host', 'John', 'Jack']
+    messages = [
+        {'speaker': speakers[i % 3], 'content': f"Message {i} " + "argument " * 30, 'timestamp': "12:00:00"}
+        for i in range(messages_count)
+    ]
+    st.session_state.debate_id = "bench"
+    st.session_state.debate_topic = TOPIC
+    st.session_state.all_messages = MessageLog(messages, "bench")
+    export, rerun = [], []
+    result = {'messages': messages_count}
+    with peak_memory(result):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            export_transcripts(messages, TOPIC)
+            export.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            generate_transcript()
+            rerun.append(time.perf_counter() - started)
+    result.update(summarize(export, 'export_all_formats'))
+    result.update(summarize(rerun, 'rerun'))
+    return result
+
+
+def bench_session_memory(sessions, messages_count):
+    """Memory per message as dicts vs compact records, and many sessions held under a memory cap"""
+    from debate_store import get_debate_store
+    from session_memory import DebateMessage, MessageLog, SessionMemory
+
+    speakers = ['Host', 'John', 'Jack']
+    metrics = {
+        'model': "claude-3-5-sonnet-20241022", 'queue_wait_s': 0.0012, 'ttft_s': 0.4321, 'latency_s': 1.2345,
+        'prompt_tokens': 812, 'completion_tokens': 64, 'cost_usd': 0.003396, 'cached': False, 'hedged': False,
+        'context_tokens_saved': 0, 'novelty': 0.61,
+    }
+
+    def make_messages(prefix):
+        # Strings built per message, the way they arrive from the model and autogen
+        return [
+            {'speaker': ''.join(speakers[i % 3]), 'content': f"{prefix} message {i} " + "argument " * 25,
+             'timestamp': f"12:{i // 60 % 60:02d}:{i % 60:02d}", 'metrics': dict(metrics)}
+            for i in range(messages_count)
+        ]
+
+    result = {'sessions': sessions, 'messages_per_session': messages_count}
+    sizes = {}
+    for mode in ('dict', 'compact'):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = make_messages("Sample")
+        if mode == 'compact':
+            kept = [DebateMessage.of(m) for m in kept]
+        sizes[mode] = (tracemalloc.get_traced_memory()[0] - before) / messages_count
+        tracemalloc.stop()
+        del kept
+    result['dict_bytes_per_message'] = round(sizes['dict'])
+    result['compact_bytes_per_message'] = round(sizes['compact'])
+    result['compact_vs_dict'] = round(sizes['compact'] / sizes['dict'], 3)
+
+    # Every session's debate is in the store, as it would be after stream_debate
+    store = get_debate_store()
+    per_session = sum(DebateMessage.of(m).nbytes() for m in make_messages("Sample"))
+    memory = SessionMemory(max_bytes=per_session * sessions // 4, idle_s=3600)
+    logs = []
+    for i in range(sessions):
+        debate_id = f"bench-memory-{i}"
+        messages = make_messages(f"Session {i}")
+        store.start_debate(debate_id, TOPIC, "round_robin")
+        for seq, msg in enumerate(messages):
+            store.add_message(debate_id, seq, msg)
+        logs.append(MessageLog(messages, debate_id, memory))
+    stats = memory.stats()
+    result['cap_kb'] = round(memory.max_bytes / 1e3, 1)
+    result['resident_kb'] = round(stats['resident_bytes'] / 1e3, 1)
+    result['resident_sessions'] = stats['resident_sessions']
+    result['spilled_sessions'] = stats['spills']
+    reload = []
+    for log in logs[:10]:
+        started = time.perf_counter()
+        len(log[:])
+        reload.append(time.perf_counter() - started)
+    result.update(summarize(reload, 'spilled_session_reload'))
+    return result
+
+
+def bench_concurrent(fakes, debates, concurrency, turns):
+    """Many debates multiplexed on one event loop through the batch runner"""
+    from batch_debate import run_batch
+
+    fakes.reset()
+    output = io.StringIO()
+    result = {'debates': debates, 'concurrency': concurrency}
+    with peak_memory(result):
+        summary = asyncio.run(run_batch([f"{TOPIC} #{i}" for i in range(debates)], output, turns, concurrency, True, 0))
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    result.update(summarize([r['elapsed_s'] for r in records], 'debate'))
+    result.update({k: summary[k] for k in ('failed', 'elapsed_s', 'debates_per_min', 'turns_per_sec')})
+    return result
+
+
+def bench_hedging(fakes, turns, repeat):
+    """Turn time-to-first-token with a heavy-tailed fake model, hedging off vs on"""
+    from debate_engine import run_debate_sync
+    from hedging import get_hedger
+
+    hedger = get_hedger()
+    spread = fakes.spread
+    fakes.spread = 1.0
+    result = {}
+    try:
+        # Off first, which also fills the hedger's latency history
+        for mode, enabled in (('off', False), ('on', True)):
+            hedger.enabled = enabled
+            before = hedger.stats()
+            ttfts, calls, agent_turns = [], 0, 0
+            for _ in range(repeat):
+                fakes.reset()
+                messages, error = run_debate_sync(TOPIC, turns, fresh=True, stop_when_stale=False)
+                if error:
+                    raise RuntimeError(error)
+                ttfts.extend(m['metrics']['ttft_s'] for m in messages if m.get('metrics'))
+                agent_turns += sum(1 for m in messages if m['speaker'] != 'user')
+                calls += sum(c.calls for c in fakes.clients)
+            after = hedger.stats()
+            result[f'{mode}_ttft_p50_s'] = round(percentile(ttfts, 50), 4)
+            result[f'{mode}_ttft_p95_s'] = round(percentile(ttfts, 95), 4)
+            result[f'{mode}_ttft_p99_s'] = round(percentile(ttfts, 99), 4)
+            result[f'{mode}_model_calls_per_turn'] = round(calls / agent_turns, 3)
+            result[f'{mode}_hedges'] = after['hedges'] - before['hedges']
+        result['hedge_threshold_s'] = hedger.stats()['threshold_s']
+    finally:
+        hedger.enabled = True
+        fakes.spread = spread
+    return result
+
+
+def bench_routing(fakes, turns, repeat):
+    """Same debates with every role on the strong model vs the Host on the fast one"""
+    from debate_engine import run_debate_sync
+    from model_router import get_model_router
+    from telemetry import summarize_metrics
+
+    router = get_model_router()
+    result = {}
+    try:
+        for mode, enabled in (('strong_only', False), ('routed', True)):
+            router.enabled = enabled
+            e2e, host_latency, costs = [], [], []
+            for _ in range(repeat):
+                fakes.reset()
+                started = time.perf_counter()
+                messages, error = run_debate_sync(TOPIC, turns, fresh=True, stop_when_stale=False)
+                if error:
+                    raise RuntimeError(error)
+                e2e.append(time.perf_counter() - started)
+                host_latency.extend(
+                    m['metrics']['latency_s'] for m in messages if m['speaker'] == 'Host' and m.get('metrics')
+                )
+                costs.append(summarize_metrics(messages)['cost_usd'])
+            result.update(summarize(e2e, f'{mode}_end_to_end'))
+            result.update(summarize(host_latency, f'{mode}_host_turn'))
+            result[f'{mode}_cost_usd_per_debate'] = round(statistics.fmean(costs), 6)
+    finally:
+        router.enabled = True
+    return result
+
+
+def bench_judging(fakes, turns, repeat, judges=5):
+    """Judge panel wall time against a single judge call, then re-judging the same transcript from the verdict cache"""
+    from debate_engine import judge_transcript, run_debate_sync
+
+    messages, error = run_debate_sync(TOPIC, turns, fresh=True, stop_when_stale=False)
+    if error:
+        raise RuntimeError(error)
+    single, panel, cached = [], [], []
+    for i in range(repeat):
+        # A fresh topic suffix per repeat keeps earlier verdicts from answering
+        topic = f"{TOPIC} #{i}"
+        for times, count in ((single, 1), (panel, judges), (cached, judges)):
+            started = time.perf_counter()
+            asyncio.run(judge_transcript(topic, messages, count, fresh=True))
+            times.append(time.perf_counter() - started)
+    result = {'judges': judges}
+    result.update(summarize(single, 'one_judge'))
+    result.update(summarize(panel, 'panel'))
+    result.update(summarize(cached, 'cached_panel'))
+    result['panel_vs_one_judge'] = round(statistics.fmean(panel) / statistics.fmean(single), 2)
+    return result
+
+
+def bench_prompt_cache(turns, repeat):
+    """Real Anthropic clients against a local stand-in API (fake_anthropic.py), prompt caching off vs on"""
+    from debate_engine import run_debate_sync
+    from fake_anthropic import FakeAnthropicServer, FakeMessagesAPI
+    from telemetry import summarize_metrics
+
+    # Long replies so the history passes the 1024-token cache minimum within a few turns
+    server = FakeAnthropicServer(FakeMessagesAPI(reply_tokens=150))
+    base_url = server.start()
+    pool = get_model_pool()
+    fake_factory, prompt_caching = pool.fake_factory, pool.prompt_caching
+    saved_env = {name: os.environ.get(name) for name in ('ANTHROPIC_BASE_URL', 'API_KEY')}
+    os.environ['ANTHROPIC_BASE_URL'] = base_url
+    os.environ['API_KEY'] = saved_env['API_KEY'] or "offline-benchmark"
+    pool.fake_factory = None
+    result = {}
+    try:
+        for mode, enabled in (('off', False), ('on', True)):
+            pool.prompt_caching = enabled
+            ttfts, costs, reads, writes = [], [], 0, 0
+            for _ in range(repeat):
+                server.api.reset()
+                messages, error = run_debate_sync(TOPIC, turns, fresh=True, stop_when_stale=False)
+                if error:
+                    raise RuntimeError(error)
+                ttfts.extend(m['metrics']['ttft_s'] for m in messages if m.get('metrics'))
+                totals = summarize_metrics(messages)
+                costs.append(totals['cost_usd'])
+                reads += totals['cache_read_tokens']
+                writes += totals['cache_write_tokens']
+            requests = server.api.requests
+            result.update(summarize(ttfts, f'{mode}_ttft'))
+            result[f'{mode}_cost_usd_per_debate'] = round(statistics.fmean(costs), 6)
+            result[f'{mode}_cache_read_tokens'] = reads
+            result[f'{mode}_cache_write_tokens'] = writes
+            result[f'{mode}_requests_with_cache_control'] = sum(1 for r in requests if 'cache_control' in json.dumps(r))
+            result[f'{mode}_requests'] = len(requests)
+        result['cost_on_vs_off'] = round(result['on_cost_usd_per_debate'] / max(result['off_cost_usd_per_debate'], 1e-9), 3)
+    finally:
+        pool.fake_factory = fake_factory
+        pool.prompt_caching = prompt_caching
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        server.stop()
+    return result
+
+
+def bench_server(fakes, debates, max_active, turns):
+    """Load test of debate_server: start `debates` at once over HTTP and follow each one's SSE stream"""
+    from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+    from tornado.httpserver import HTTPServer
+    from tornado.netutil import bind_sockets
+    from debate_server import DebateService, make_app
+
+    async def run():
+        service = DebateService(max_active=max_active, max_queued=debates)
+        sockets = bind_sockets(0, '127.0.0.1')
+        server = HTTPServer(make_app(service))
+        server.add_sockets(sockets)
+        base = f"http://127.0.0.1:{sockets[0].getsockname()[1]}"
+        client = AsyncHTTPClient(force_instance=True, max_clients=2 * debates)
+        baseline = tracemalloc.get_traced_memory()[0]
+        peak_growth = 0
+
+        async def one(i):
+            started = time.perf_counter()
+            response = await client.fetch(f"{base}/debates", method='POST', body=json.dumps(
+                {'topic': f"{TOPIC} #{i}", 'max_turns': turns, 'fresh': True}
+            ))
+            debate_id = json.loads(response.body)['debate_id']
+            state = {'buffer': '', 'first': None, 'messages': 0}
+
+            def on_data(data):
+                nonlocal peak_growth
+                state['buffer'] += data.decode()
+                *events, state['buffer'] = state['buffer'].split("\n\n")
+                for event in events:
+                    if event.startswith("event: message"):
+                        state['messages'] += 1
+                        state['first'] = state['first'] or time.perf_counter()
+                peak_growth = max(peak_growth, tracemalloc.get_traced_memory()[0] - baseline)
+
+            await client.fetch(HTTPRequest(
+                f"{base}/debates/{debate_id}/events", streaming_callback=on_data, request_timeout=600
+            ))
+            finished = time.perf_counter()
+            return (state['first'] or finished) - started, finished - started, state['messages']
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(one(i) for i in range(debates)))
+        elapsed = time.perf_counter() - started
+        stats = service.stats()
+        client.close()
+        server.stop()
+        return outcomes, elapsed, stats, peak_growth
+
+    fakes.reset()
+    result = {'debates': debates, 'max_active': max_active}
+    with peak_memory(result):
+        outcomes, elapsed, stats, peak_growth = asyncio.run(run())
+    result.update(summarize([o[0] for o in outcomes], 'time_to_first_message'))
+    result.update(summarize([o[1] for o in outcomes], 'debate'))
+    result['messages_streamed'] = sum(o[2] for o in outcomes)
+    result['debates_per_min'] = round(60 * debates / elapsed, 2)
+    result['peak_active_debates'] = stats['peak_active']
+    result['memory_per_active_debate_kb'] = round(peak_growth / max(stats['peak_active'], 1) / 1e3, 1)
+    result['max_rss_mb'] = stats['max_rss_mb']
+    return result
+
+
+def compare(current, baseline):
+    """Print relative change of every shared numeric metric"""
+    for suite, metrics in current['suites'].items():
+        base = baseline.get('suites', {}).get(suite, {})
+        for name, value in metrics.items():
+            if isinstance(value, (int, float)) and isinstance(base.get(name), (int, float)) and base[name]:
+                change = 100 * (value - base[name]) / base[name]
+                print(f"{suite:<20} {name:<32} {base[name]:>10} -> {value:<10} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks against the fake model client")
+    parser.add_argument('--turns', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--ttft', type=float, default=0.05, help="Mean fake time-to-first-token in seconds")
+    parser.add_argument('--tps', type=float, default=400.0, help="Fake streaming rate in tokens/second")
+    parser.add_argument('--debates', type=int, default=20, help="Debates in the concurrency suite")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--server-debates', type=int, default=100, help="Debates started at once in the server load test")
+    parser.add_argument('--server-max-active', type=int, default=50, help="Server admission limit for the load test")
+    parser.add_argument('--suites', default='startup,run_debate_sync,parallel_rounds,debate_script,transcript,concurrent,session_memory,hedging,routing,judging,prompt_cache,server')
+    parser.add_argument('-o', '--output', help="Where to write the JSON results (default: bench_results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    fakes = FakeModels(args.ttft, args.tps)
+    suites = args.suites.split(',')
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'turns': args.turns,
+            'repeat': args.repeat,
+            'ttft': args.ttft,
+            'tps': args.tps,
+        },
+        'suites': {},
+    }
+    if 'startup' in suites:
+        results['suites']['startup'] = bench_startup(args.repeat)
+    if 'run_debate_sync' in suites:
+        results['suites']['run_debate_sync'] = bench_run_debate_sync(fakes, args.turns, args.repeat)
+    if 'parallel_rounds' in suites:
+        results['suites']['parallel_rounds'] = bench_run_debate_sync(fakes, args.turns, args.repeat, "parallel")
+    if 'debate_script' in suites:
+        results['suites']['debate_script'] = bench_debate_script(fakes, args.repeat)
+    if 'transcript' in suites:
+        results['suites']['transcript'] = bench_transcript(max(args.turns, 100), args.repeat * 10)
+    if 'concurrent' in suites:
+        results['suites']['concurrent'] = bench_concurrent(fakes, args.debates, args.concurrency, args.turns)
+    if 'session_memory' in suites:
+        results['suites']['session_memory'] = bench_session_memory(args.debates * 10, max(args.turns, 50))
+    if 'hedging' in suites:
+        results['suites']['hedging'] = bench_hedging(fakes, args.turns, args.repeat * 3)
+    if 'routing' in suites:
+        results['suites']['routing'] = bench_routing(fakes, args.turns, args.repeat)
+    if 'judging' in suites:
+        results['suites']['judging'] = bench_judging(fakes, args.turns, args.repeat)
+    if 'prompt_cache' in suites:
+        results['suites']['prompt_cache'] = bench_prompt_cache(max(args.turns, 20), args.repeat)
+    if 'server' in suites:
+        results['suites']['server'] = bench_server(fakes, args.server_debates, args.server_max_active, args.turns)
+
+    print(json.dumps(results, indent=2))
+    output = args.output or os.path.join('bench_results', datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# Completion tokens one agent reply may use; replies are asked to stay under 30-40 words
+DEFAULT_REPLY_TOKENS = 300
+
+# Predictable cost/latency presets: reply cap, debate token budget and cost ceiling
+BUDGET_TIERS = {
+    'economy': {'max_completion_tokens': 120, 'token_budget': 20000, 'cost_budget_usd': 0.05},
+    'standard': {'max_completion_tokens': DEFAULT_REPLY_TOKENS, 'token_budget': 60000, 'cost_budget_usd': 0.25},
+    'premium': {'max_completion_tokens': 600, 'token_budget': 200000, 'cost_budget_usd': 1.00},
+}
@@ -0,0 +1,86 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class DebateInterrupted(RuntimeError):
+    """A debate failed for good; carries the transcript up to the last good turn"""
+
+    def __init__(self, message, messages, debate_id):
+        super().__init__(message)
+        self.messages = messages
+        self.debate_id = debate_id
+
+
+class CheckpointStore:
+    """Latest checkpoint of each debate: bounded in-memory map in front of an optional SQLite file
+
+    A checkpoint is a JSON-serialisable dict (team state from save_state(),
+    the transcript so far, ...). Only the newest one per debate is kept.
+    """
+
+    def __init__(self, max_entries=256, db_path=None):
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.saves = 0
+        self.restores = 0
+        self._lock = threading.Lock()
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints (debate_id TEXT PRIMARY KEY, state TEXT NOT NULL, saved_at REAL NOT NULL)"
+            )
+            self.db.commit()
+
+    def save(self, debate_id, checkpoint):
+        state = json.dumps(checkpoint, default=str)
+        with self._lock:
+            self.memory[debate_id] = state
+            self.memory.move_to_end(debate_id)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO checkpoints (debate_id, state, saved_at) VALUES (?, ?, ?)",
+                    (debate_id, state, time.time())
+                )
+                self.db.commit()
+            self.saves += 1
+
+    def load(self, debate_id):
+        with self._lock:
+            state = self.memory.get(debate_id)
+            if state is None and self.db is not None:
+                row = self.db.execute("SELECT state FROM checkpoints WHERE debate_id = ?", (debate_id,)).fetchone()
+                state = row[0] if row else None
+            if state is None:
+                return None
+            self.restores += 1
+            return json.loads(state)
+
+    def delete(self, debate_id):
+        with self._lock:
+            self.memory.pop(debate_id, None)
+            if self.db is not None:
+                self.db.execute("DELETE FROM checkpoints WHERE debate_id = ?", (debate_id,))
+                self.db.commit()
+
+    def stats(self):
+        return {'entries': len(self.memory), 'saves': self.saves, 'restores': self.restores}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store():
+    """Process-wide store; DEBATE_CHECKPOINT_DB keeps checkpoints in SQLite across restarts"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore(db_path=os.getenv('DEBATE_CHECKPOINT_DB') or None)
+        return _store
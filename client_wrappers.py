@@ -0,0 +1,57 @@
+from autogen_core.models import ChatCompletionClient
+
+
+def model_name(client):
+    """Best-effort model name of a (possibly wrapped) chat completion client"""
+    while isinstance(client, WrappedChatCompletionClient):
+        client = client.inner
+    create_args = getattr(client, '_create_args', None) or {}
+    return create_args.get('model') or client.model_info.get('family', 'unknown')
+
+
+def create_args_of(client):
+    """Default sampling/create arguments of the innermost client"""
+    while isinstance(client, WrappedChatCompletionClient):
+        client = client.inner
+    return dict(getattr(client, '_create_args', None) or {})
+
+
+class WrappedChatCompletionClient(ChatCompletionClient):
+    """Chat completion client that forwards everything to an inner client
+
+    Subclasses override create()/create_stream() to add behaviour around the
+    model call (caching, rate limiting, metrics, ...) and can be stacked.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def create(self, messages, **kwargs):
+        return await self.inner.create(messages, **kwargs)
+
+    def create_stream(self, messages, **kwargs):
+        return self.inner.create_stream(messages, **kwargs)
+
+    async def close(self):
+        # Inner clients are usually pooled and shared, so they are not closed here
+        pass
+
+    def actual_usage(self):
+        return self.inner.actual_usage()
+
+    def total_usage(self):
+        return self.inner.total_usage()
+
+    def count_tokens(self, messages, **kwargs):
+        return self.inner.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages, **kwargs):
+        return self.inner.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self):
+        return self.inner.capabilities
+
+    @property
+    def model_info(self):
+        return self.inner.model_info
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import SystemMessage, UserMessage
+
+SUMMARY_PROMPT = (
+    'You keep the running summary of a debate. Update the summary with the new turns below. '
+    'Keep every distinct argument each side has made, drop repetition and pleasantries. '
+    'Under 120 words, plain text.'
+)
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def message_text(message):
+    source = getattr(message, 'source', None) or 'assistant'
+    return f"{source}: {message.content}"
+
+
+def prefix_keys(turns):
+    """Key of every prefix of `turns`, from the empty one to all of them; equal keys mean equal turns in equal order"""
+    digest = hashlib.sha256()
+    keys = [digest.hexdigest()]
+    for turn in turns:
+        digest.update(turn.encode())
+        digest.update(b"\0")
+        keys.append(digest.hexdigest())
+    return keys
+
+
+class RollingSummary:
+    """Incrementally updated summary of the oldest debate turns, shared by all agents of a debate
+
+    Summaries are keyed by the exact turns they cover, so agents that fold
+    the same turns share one summary while an agent that saw the turns in a
+    different order (the Host in parallel rounds) gets its own.
+    """
+
+    def __init__(self, model_client, max_tokens=200):
+        self.model_client = model_client
+        self.max_tokens = max_tokens
+        self.summaries = {prefix_keys([])[0]: ""}
+        self.summary_calls = 0
+        self.summary_tokens = 0
+        self.baseline_tokens = 0
+        self.sent_tokens = 0
+        self._lock = None
+
+    async def summary_of(self, turns):
+        """Summary covering `turns` (a list of 'speaker: text' strings), built on the longest cached prefix"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            keys = prefix_keys(turns)
+            if keys[-1] in self.summaries:
+                return self.summaries[keys[-1]]
+            done = max(n for n, key in enumerate(keys) if key in self.summaries)
+            new_turns = "\n".join(turns[done:])
+            previous = self.summaries[keys[done]] or "(nothing yet)"
+            result = await self.model_client.create(
+                [
+                    SystemMessage(content=SUMMARY_PROMPT),
+                    UserMessage(content=f"Summary so far:\n{previous}\n\nNew turns:\n{new_turns}", source="summarizer"),
+                ],
+                extra_create_args={'max_tokens': self.max_tokens},
+            )
+            self.summary_calls += 1
+            self.summary_tokens += result.usage.prompt_tokens + result.usage.completion_tokens
+            self.summaries[keys[-1]] = str(result.content).strip()
+            return self.summaries[keys[-1]]
+
+    def record(self, baseline, sent):
+        self.baseline_tokens += baseline
+        self.sent_tokens += sent
+
+    @property
+    def tokens_saved(self):
+        """Prompt tokens avoided against full history, net of what summarizing cost"""
+        return self.baseline_tokens - self.sent_tokens - self.summary_tokens
+
+
+class SummarizingChatCompletionContext(ChatCompletionContext):
+    """Keeps the last `keep_last` messages verbatim and folds older ones into a RollingSummary
+
+    Older messages are folded in batches of `fold_every` so the summary is not
+    rewritten on every turn; the prompt size per turn stays roughly constant.
+    """
+
+    def __init__(self, summary, keep_last=6, fold_every=3, initial_messages=None):
+        super().__init__(initial_messages)
+        self.summary = summary
+        self.keep_last = keep_last
+        self.fold_every = fold_every
+        # Turns already folded into the summary, kept as text for the next summary update
+        self.folded = []
+        self.folded_tokens = 0
+
+    async def get_messages(self):
+        if len(self._messages) >= self.keep_last + self.fold_every:
+            fold = len(self._messages) - self.keep_last
+            for message in self._messages[:fold]:
+                text = message_text(message)
+                self.folded.append(text)
+                self.folded_tokens += estimate_tokens(text)
+            self._messages = self._messages[fold:]
+
+        recent = list(self._messages)
+        recent_tokens = sum(estimate_tokens(message_text(m)) for m in recent)
+        if not self.folded:
+            self.summary.record(recent_tokens, recent_tokens)
+            return recent
+
+        summary_text = await self.summary.summary_of(self.folded)
+        summary_message = UserMessage(content=f"Summary of the debate so far: {summary_text}", source="summary")
+        self.summary.record(self.folded_tokens + recent_tokens, estimate_tokens(summary_message.content) + recent_tokens)
+        return [summary_message] + recent
+
+    async def clear(self):
+        await super().clear()
+        self.folded = []
+        self.folded_tokens = 0
+
+    async def save_state(self):
+        state = dict(await super().save_state())
+        state['folded'] = list(self.folded)
+        state['folded_tokens'] = self.folded_tokens
+        return state
+
+    async def load_state(self, state):
+        await super().load_state({'messages': state.get('messages', [])})
+        self.folded = list(state.get('folded', []))
+        self.folded_tokens = state.get('folded_tokens', 0)
@@ -1,36 +1,38 @@
-from autogen_ext.models.anthropic import AnthropicChatCompletionClient
 from autogen_core.models import UserMessage
 from autogen_agentchat.agents import AssistantAgent
 from dotenv import load_dotenv
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.base import TaskResult
+from model_pool import get_model_pool
+from model_router import get_model_router
+from parallel_rounds import ParallelRoundsDebate
+from termination import debate_termination
 import os
 import asyncio
 
 load_dotenv()  # Load variables from .env file
 api_key = os.getenv('API_KEY')
-if not api_key:
+if not api_key and not os.getenv('DEBATE_FAKE_MODEL'):
     raise ValueError("OPENAI_API_KEY environment variable is not set.")
 
 
-async def main():
-    model=AnthropicChatCompletionClient(
-        model="claude-3-5-sonnet-20241022",
-        
-        api_key = os.getenv('API_KEY'),
-    )
+async def main(parallel=False):
+    # Host on the fast model, John and Jack on the strong one
+    router = get_model_router()
+    def model_client(name):
+        return get_model_pool().get(model=name, api_key=os.getenv('API_KEY'))
 
     topic = "Should AI be regulated by the government?"
     host= AssistantAgent(
         name="Host",    
-        model_client=model,  # Enable streaming tokens from the model client.
+        model_client=router.client_for("Host", model_client),  # Enable streaming tokens from the model client.
         system_message=(
             f'You are the host of a debate  between john , a supporter agent and jack a critic agent on the topic: ' + topic + '. You will moderate the debate .At the beginning of each round , announce the round numberand at the third round declre that it will be the last round of the debate. After the last round, summarize the debate and declare the winner based on the arguments presented.You will also provide a brief summary of the arguments presented by each side at the end of the debate.'
         ),  
     )    
     supporter = AssistantAgent(
         name="John",
-        model_client=model,
+        model_client=router.client_for("John", model_client),
         system_message=(
             f'You are John, a supporter agent in a debate for the topic {topic}. You will be debating against Jack, a critic agent.'
         ),
@@ -38,17 +40,24 @@ async def main():
     )
     critic = AssistantAgent(
         name="Jack",
-        model_client=model,
+        model_client=router.client_for("Jack", model_client),
         system_message=(
             f'You are a Jack , critic agent in a debate for the topic {topic}. you will be debating agent against john , a supporter agent. '
         ),
   # Enable streaming tokens from the model client.
     )
 
-    team=RoundRobinGroupChat(
-        participants=[host,supporter, critic],
-        max_turns=10
-    )
+    # Stop early on the host's verdict, after 5 minutes or once no new arguments come up
+    termination = debate_termination(deadline_s=300)
+    if parallel:
+        # John and Jack answer each round concurrently
+        team = ParallelRoundsDebate(host, [supporter, critic], max_turns=10, termination_condition=termination)
+    else:
+        team=RoundRobinGroupChat(
+            participants=[host,supporter, critic],
+            max_turns=10,
+            termination_condition=termination
+        )
 
     async for message in team.run_stream(task="Start the debate on the topic: " + topic,):
         print('--' * 20)
@@ -65,4 +74,5 @@ async def main():
     #     print('--'*20)
     #     print(f"{message.sender.name}: {message.content}")
 if __name__=="__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import sys
+    asyncio.run(main(parallel="--parallel" in sys.argv[1:]))
\ No newline at end of file
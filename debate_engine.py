@@ -0,0 +1,426 @@
+import asyncio
+import os
+import time
+import uuid
+
+from autogen_core import CancellationToken
+from autogen_core.models import UserMessage
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.base import Response, TaskResult
+from autogen_agentchat.messages import BaseChatMessage, MessageFactory, ModelClientStreamingChunkEvent, TextMessage
+from autogen_agentchat.teams import RoundRobinGroupChat
+from dotenv import load_dotenv
+
+from budgets import DEFAULT_REPLY_TOKENS
+from checkpoint import DebateInterrupted, get_checkpoint_store
+from context_window import RollingSummary, SummarizingChatCompletionContext
+from debate_store import get_debate_store
+from debate_worker import get_debate_worker
+from hedging import HedgedChatCompletionClient, get_hedger
+from judging import judge_debate, transcript_hash
+from model_pool import get_model_pool
+from model_router import STRONG_MODEL, get_model_router
+from novelty import NoveltyTracker
+from parallel_rounds import ParallelRoundsDebate
+from profiling import Profile, get_profile_store, phase
+from rate_limiter import RateLimitedChatCompletionClient, get_rate_limiter
+from response_cache import CachedChatCompletionClient, get_response_cache
+from telemetry import ChargedChatCompletionClient, DebateTelemetry, InstrumentedChatCompletionClient
+from termination import REDIRECT_NOTE, VERDICT_REQUEST, debate_termination, find_verdict
+
+load_dotenv()
+
+# Values of debate_format: everyone in turn, or John and Jack answering each round at the same time
+DEBATE_FORMATS = ("round_robin", "parallel")
+
+class DebateManager:
+    def __init__(self):
+        self.api_key = os.getenv('API_KEY')
+        if not self.api_key and not os.getenv('DEBATE_FAKE_MODEL'):
+            raise ValueError("API_KEY environment variable is not set.")
+        
+        self.current_round = 0
+        self.max_rounds = 3
+        self.round_winners = []
+        self.debate_messages = []
+        self.human_interaction_mode = False
+        self.telemetry = DebateTelemetry()
+        self.summary = None
+        
+    def pooled_model(self, max_completion_tokens=DEFAULT_REPLY_TOKENS, model_name=STRONG_MODEL):
+        # Shared, pooled client so connections stay warm across debates
+        return get_model_pool().get(
+            model=model_name,
+            api_key=self.api_key,
+            max_retries=0,  # Retries are handled by the shared rate limiter
+            timeout=30.0,
+            max_tokens=max_completion_tokens,  # Hard cap on every reply
+        )
+
+    def create_model(self, fresh=False, max_completion_tokens=DEFAULT_REPLY_TOKENS, model_name=STRONG_MODEL):
+        model = self.pooled_model(max_completion_tokens, model_name)
+        model = RateLimitedChatCompletionClient(model, get_rate_limiter())
+        # Calls slower than the recent p95 to first token get a backup request
+        model = HedgedChatCompletionClient(model, get_hedger())
+        # Repeated debates are answered from the response cache unless a fresh one is requested
+        return CachedChatCompletionClient(model, get_response_cache(), bypass=fresh)
+
+    def create_team(self, host, supporter, critic, max_turns, debate_format="round_robin"):
+        """Team that runs one step (turn, or parallel phase) per run_stream() call so it can be checkpointed in between"""
+        if debate_format == "parallel":
+            # John and Jack answer each round at the same time; the Host moderates between rounds
+            return ParallelRoundsDebate(host, [supporter, critic], max_turns=max_turns, phases_per_run=1)
+        return RoundRobinGroupChat(
+            participants=[host, supporter, critic],
+            max_turns=1
+        )
+
+    def agent_model(self, model, name):
+        # Per-agent view of the shared client so every turn is timed for the stats panel
+        return InstrumentedChatCompletionClient(model, self.telemetry, name)
+
+    def create_agents(self, topic, fresh=False, context_window=None, max_completion_tokens=DEFAULT_REPLY_TOKENS):
+        router = get_model_router()
+        clients = {}
+        def model_client(name):
+            # One client chain per model, shared by every role routed to it
+            if name not in clients:
+                clients[name] = self.create_model(fresh, max_completion_tokens, name)
+            return clients[name]
+        
+        # Optional bounded context: last `context_window` turns verbatim plus a shared rolling summary,
+        # written by the Host's (fast) model and paid for out of the debate's budgets
+        self.summary = None
+        if context_window:
+            self.summary = RollingSummary(ChargedChatCompletionClient(model_client(router.model_for("Host")), self.telemetry))
+        def model_context():
+            if self.summary is None:
+                return None
+            return SummarizingChatCompletionContext(self.summary, keep_last=context_window)
+        
+        host_prompt = (
+            f'You are the host of a debate on: {topic}. '
+            'RULES: 1) Welcome everyone briefly, '
+            '2) Let John and Jack debate naturally, '
+            '3) Only moderate the discussion, let it flow. '
+            'Keep responses under 30 words. Once both sides start repeating themselves, or when asked, '
+            'close the debate with "OVERALL WINNER: John" or "OVERALL WINNER: Jack" and one line of reasoning.'
+        )
+        
+        john_prompt = (
+            f'You are John, supporting: {topic}. '
+            'Make concise, strong arguments. Under 30 words per response. Be persuasive.'
+        )
+        
+        jack_prompt = (
+            f'You are Jack, opposing: {topic}. '
+            'Make concise counter-arguments. Under 30 words per response. Challenge effectively.'
+        )
+        
+        host = AssistantAgent(
+            name="Host",    
+            model_client=self.agent_model(router.client_for("Host", model_client), "Host"),
+            system_message=host_prompt,
+            model_client_stream=True,
+            model_context=model_context(),
+        )    
+        
+        supporter = AssistantAgent(
+            name="John",
+            model_client=self.agent_model(router.client_for("John", model_client), "John"),
+            system_message=john_prompt,
+            model_client_stream=True,
+            model_context=model_context(),
+        )
+        
+        critic = AssistantAgent(
+            name="Jack",
+            model_client=self.agent_model(router.client_for("Jack", model_client), "Jack"),
+            system_message=jack_prompt,
+            model_client_stream=True,
+            model_context=model_context(),
+        )
+        
+        return host, supporter, critic
+
+def message_timestamp(msg):
+    """Local wall-clock time at which autogen created the message"""
+    return msg.created_at.astimezone().strftime("%H:%M:%S")
+
+async def stream_debate(topic, max_turns, on_message=None, on_chunk=None, fresh=False, context_window=None,
+                        debate_format="round_robin", token_budget=None, deadline_s=None, stop_when_stale=True,
+                        debate_id=None, resume=False, resume_attempts=2, cost_budget_usd=None,
+                        max_completion_tokens=DEFAULT_REPLY_TOKENS, on_rollback=None):
+    """Run the debate with run_stream, reporting each turn as soon as it arrives
+
+    Returns (messages, stop_reason). The team stops at the first of: Host
+    verdict, token budget (prompt + completion tokens), cost ceiling in USD,
+    deadline, no new arguments or max turns; unless the Host already named
+    a winner it is then asked for a closing verdict, which takes the last of
+    the `max_turns` turns. Every reply is capped at `max_completion_tokens`.
+
+    Every turn is also written to the debate store as it arrives, so the
+    debate shows up in the history even if this process dies.
+
+    Team state is checkpointed under `debate_id` after every turn. A failed
+    turn is retried from the last checkpoint up to `resume_attempts` times;
+    after that DebateInterrupted carries the partial transcript, and a later
+    call with resume=True picks the debate up from the same checkpoint.
+    Turns of the failed step may already have gone to on_message, so
+    on_rollback(n) is called first: the caller keeps only its first n
+    messages and drops any half-streamed turn.
+    """
+    debate_manager = DebateManager()
+    store = get_checkpoint_store()
+    history = get_debate_store()
+    debate_id = debate_id or uuid.uuid4().hex[:12]
+    history.start_debate(debate_id, topic, debate_format)
+    turn_limit = max(max_turns - 1, 1)
+    
+    # Task without winner instruction to let debate flow naturally
+    task_prompt = f'Natural debate on: "{topic}". Host: welcome. John: argue for. Jack: argue against. Keep it flowing naturally.'
+    
+    messages = []
+    chat_messages = []
+    tokens_saved = 0
+    stop_reason = None
+    
+    def handle(event):
+        """Report one stream event; returns the novelty score of a finished debater turn"""
+        nonlocal tokens_saved
+        if isinstance(event, ModelClientStreamingChunkEvent):
+            # Partial tokens of the turn currently being generated
+            if on_chunk:
+                on_chunk(event.source, event.content)
+        elif isinstance(event, BaseChatMessage):
+            with phase('post_processing'):
+                chat_messages.append(event)
+                msg = {
+                    'speaker': event.source,
+                    'content': event.content,
+                    'timestamp': message_timestamp(event)
+                }
+                metrics = debate_manager.telemetry.turn_metrics(event.source, event.models_usage)
+                if metrics:
+                    if debate_manager.summary is not None:
+                        # Prompt tokens the rolling summary saved during this turn
+                        metrics['context_tokens_saved'] = debate_manager.summary.tokens_saved - tokens_saved
+                        tokens_saved = debate_manager.summary.tokens_saved
+                    msg['metrics'] = metrics
+                score = novelty.observe(event)
+                if score and metrics:
+                    metrics['novelty'] = score['novelty']
+                messages.append(msg)
+                history.add_message(debate_id, len(messages) - 1, msg)
+                if on_message:
+                    on_message(msg)
+            return score
+    
+    async def save_checkpoint():
+        with phase('post_processing'):
+            store.save(debate_id, {
+                'topic': topic,
+                'debate_format': debate_format,
+                'team': await team.save_state(),
+                'messages': messages,
+                'chat_messages': [m.dump() for m in chat_messages],
+                'summaries': debate_manager.summary.summaries if debate_manager.summary is not None else None,
+                'side_spend': [debate_manager.telemetry.side_tokens, debate_manager.telemetry.side_usd],
+                'stop_reason': stop_reason,
+            })
+    
+    checkpoint = store.load(debate_id) if resume else None
+    if checkpoint is not None:
+        # The budgets carry on from what the interrupted run spent
+        debate_manager.telemetry.restore(checkpoint['messages'], checkpoint.get('side_spend'))
+    if checkpoint is not None and on_message:
+        # A new caller resuming an interrupted debate sees the turns it already has
+        for msg in checkpoint['messages']:
+            on_message(msg)
+    
+    # One deadline for the whole call: retries do not get a fresh deadline_s
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        # Turns after the checkpoint will be generated again
+        history.truncate(debate_id, len(checkpoint['messages']) if checkpoint is not None else 0)
+        with phase('agent_setup'):
+            host, supporter, critic = debate_manager.create_agents(topic, fresh, context_window, max_completion_tokens)
+            team = debate_manager.create_team(host, supporter, critic, turn_limit, debate_format)
+            novelty = NoveltyTracker()
+            termination = debate_termination(
+                token_budget, deadline_s, stop_when_stale, novelty, cost_budget_usd, debate_manager.telemetry, started
+            )
+        redirected = False
+        
+        if checkpoint is not None:
+            # Pick up from the last good turn instead of replaying the debate
+            await team.load_state(checkpoint['team'])
+            factory = MessageFactory()
+            chat_messages = [factory.create(m) for m in checkpoint['chat_messages']]
+            messages = list(checkpoint['messages'])
+            stop_reason = checkpoint['stop_reason']
+            if debate_manager.summary is not None and checkpoint['summaries']:
+                debate_manager.summary.summaries.update(checkpoint['summaries'])
+            if stop_reason is None:
+                # Rebuild the novelty history and stop-condition counters
+                scores = [score for score in map(novelty.observe, chat_messages) if score is not None]
+                redirected = bool(scores) and scores[-1]['stale']
+                # A budget already spent by the failed attempt (or before a resume) stops the debate right here
+                stop = await termination(chat_messages)
+                stop_reason = stop.content if stop is not None else None
+        
+        try:
+            turns = sum(1 for m in chat_messages if m.source != "user")
+            while stop_reason is None and turns < turn_limit:
+                async for event in team.run_stream(task=None if chat_messages else task_prompt):
+                    if isinstance(event, TaskResult):
+                        continue
+                    score = handle(event)
+                    if not isinstance(event, BaseChatMessage):
+                        continue
+                    if event.source != "user":
+                        turns += 1
+                    if stop_reason is None:
+                        stop = await termination([event])
+                        stop_reason = stop.content if stop is not None else None
+                    if score is not None:
+                        if score['stale'] and not redirected:
+                            # First restatement in a row: have the Host steer to a new aspect before it ends the debate
+                            await host.model_context.add_message(UserMessage(content=REDIRECT_NOTE, source="moderator"))
+                        redirected = score['stale']
+                await save_checkpoint()
+            stop_reason = stop_reason or f"Maximum number of turns {turn_limit} reached."
+            
+            if not any(m.source == "Host" and find_verdict(m.content) for m in chat_messages):
+                # Ask the Host for a real verdict, passing on the turns it has not heard yet
+                last_host = max((i for i, m in enumerate(chat_messages) if m.source == "Host"), default=0)
+                unheard = [m for m in chat_messages[last_host + 1:] if m.source != "user"]
+                request = TextMessage(content=VERDICT_REQUEST, source="user")
+                async for event in host.on_messages_stream(unheard + [request], CancellationToken()):
+                    handle(event.chat_message if isinstance(event, Response) else event)
+            break
+        except asyncio.CancelledError:
+            history.finish_debate(debate_id, "cancelled", stop_reason)
+            raise
+        except Exception as e:
+            checkpoint = store.load(debate_id)
+            if on_rollback:
+                on_rollback(len(checkpoint['messages']) if checkpoint is not None else 0)
+            attempt += 1
+            if attempt > resume_attempts:
+                partial = checkpoint['messages'] if checkpoint is not None else []
+                # autogen wraps agent failures with the full traceback; the last line is the actual error
+                reason = (str(e).strip().splitlines() or [type(e).__name__])[-1]
+                history.finish_debate(debate_id, "interrupted", reason)
+                raise DebateInterrupted(f"{reason} (after {attempt} attempts)", partial, debate_id) from e
+            if checkpoint is None:
+                # Failed before the first checkpoint: start over
+                messages, chat_messages, stop_reason = [], [], None
+    
+    # autogen's copies of the turns are not returned; only the plain message dicts are
+    chat_messages.clear()
+    store.delete(debate_id)
+    verdicts = [find_verdict(m['content']) for m in messages if m['speaker'] == "Host"]
+    history.finish_debate(debate_id, "completed", stop_reason, next((v for v in reversed(verdicts) if v), None))
+    return messages, stop_reason
+
+async def run_debate(topic, max_turns, on_message=None, on_chunk=None, fresh=False, context_window=None,
+                     debate_format="round_robin", token_budget=None, deadline_s=None, stop_when_stale=True,
+                     debate_id=None, resume=False, cost_budget_usd=None, max_completion_tokens=DEFAULT_REPLY_TOKENS,
+                     judges=0, judge_method="score", profile=False, on_rollback=None):
+    """Run one debate until a stop condition fires and the Host has declared a winner
+
+    on_message(msg) is called for every finished turn and on_chunk(speaker, text)
+    for every streamed token chunk, both while the debate is still running;
+    on_rollback(n) when a failed step is retried and only the first n
+    messages stand (see stream_debate).
+    fresh=True skips response cache lookups; context_window=K keeps only the
+    last K turns verbatim and summarizes the rest. debate_format="parallel"
+    lets both debaters answer each round concurrently. resume=True continues
+    the interrupted debate checkpointed under debate_id. token_budget and
+    cost_budget_usd bound the whole debate, max_completion_tokens each reply.
+    With judges > 0 a judge panel then scores the debate; its verdict is
+    cached in the debate store (see judge_transcript). With profile=True the
+    run is profiled and the Profile is kept in the profile store under
+    debate_id. Returns (messages, stop_reason).
+    """
+    if not profile:
+        return await _run_debate(
+            topic, max_turns, on_message, on_chunk, fresh, context_window, debate_format, token_budget,
+            deadline_s, stop_when_stale, debate_id, resume, cost_budget_usd, max_completion_tokens, judges, judge_method,
+            on_rollback
+        )
+    debate_id = debate_id or uuid.uuid4().hex[:12]
+    debate_profile = Profile(f"Debate {debate_id}: {topic[:60]}")
+    try:
+        with debate_profile.run():
+            messages, stop_reason = await _run_debate(
+                topic, max_turns, on_message, on_chunk, fresh, context_window, debate_format, token_budget,
+                deadline_s, stop_when_stale, debate_id, resume, cost_budget_usd, max_completion_tokens, judges, judge_method,
+                on_rollback
+            )
+        # Streaming model calls are timed by telemetry, including any wait for the rate limiter
+        debate_profile.add('model_wait', sum(
+            m['metrics']['latency_s'] + m['metrics']['queue_wait_s'] for m in messages if m.get('metrics')
+        ))
+        return messages, stop_reason
+    finally:
+        get_profile_store().put(debate_id, debate_profile)
+
+async def _run_debate(topic, max_turns, on_message, on_chunk, fresh, context_window, debate_format, token_budget,
+                      deadline_s, stop_when_stale, debate_id, resume, cost_budget_usd, max_completion_tokens,
+                      judges, judge_method, on_rollback):
+    messages, stop_reason = await stream_debate(
+        topic, max_turns, on_message, on_chunk, fresh, context_window, debate_format,
+        token_budget, deadline_s, stop_when_stale, debate_id, resume,
+        cost_budget_usd=cost_budget_usd, max_completion_tokens=max_completion_tokens, on_rollback=on_rollback
+    )
+    if judges:
+        with phase('judging'):
+            await judge_transcript(topic, messages, judges, judge_method, fresh)
+    return messages, stop_reason
+
+async def check_api(model_name=STRONG_MODEL):
+    """Send a one-token request through the pooled debate client and return the model's reply
+
+    Skips the rate limiter's retries and the response cache, so a bad key or
+    an unreachable API shows up right away as the raised error.
+    """
+    model = DebateManager().pooled_model(model_name=model_name)
+    result = await model.create([UserMessage(content="ping", source="user")], extra_create_args={'max_tokens': 1})
+    return result.content
+
+def judge_model_name():
+    return get_model_router().model_for("Judge")
+
+async def judge_transcript(topic, messages, judges=3, method="score", fresh=False):
+    """Judge panel verdict for a finished debate, from the debate store's verdict cache when it was judged before"""
+    model = DebateManager().create_model(fresh, max_completion_tokens=800, model_name=judge_model_name())
+    return await judge_debate(messages, topic, model, judges, method, get_debate_store(), judge_model_name())
+
+def cached_verdict(topic, messages, judges, method):
+    """Verdict already stored for this transcript and panel, without calling any model"""
+    return get_debate_store().get_verdict(transcript_hash(topic, messages, judges, method, judge_model_name()))
+
+def run_debate_sync(topic, max_turns, on_message=None, on_chunk=None, fresh=False, context_window=None,
+                    debate_format="round_robin", token_budget=None, deadline_s=None, stop_when_stale=True,
+                    cost_budget_usd=None, max_completion_tokens=DEFAULT_REPLY_TOKENS, debate_id=None, profile=False):
+    """Synchronous debate runner on the shared background event loop
+
+    Returns (messages, error); on failure messages is the transcript up to the last good turn.
+    With profile=True the run's Profile is in get_profile_store() under debate_id.
+    """
+    try:
+        messages, _ = get_debate_worker().run(
+            run_debate(
+                topic, max_turns, on_message, on_chunk, fresh, context_window, debate_format,
+                token_budget, deadline_s, stop_when_stale, debate_id,
+                cost_budget_usd=cost_budget_usd, max_completion_tokens=max_completion_tokens, profile=profile
+            )
+        )
+        return messages, None
+    except DebateInterrupted as e:
+        return e.messages, str(e)
+    except Exception as e:
+        return [], str(e)
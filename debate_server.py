@@ -0,0 +1,429 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import time
+import uuid
+
+import tornado.iostream
+import tornado.web
+import tornado.websocket
+from dotenv import load_dotenv
+
+from checkpoint import DebateInterrupted
+from debate_store import get_debate_store
+from debate_engine import DEBATE_FORMATS, stream_debate
+
+load_dotenv()
+
+
+def json_bool(value):
+    # bool("false") is True, so only real JSON booleans are accepted
+    if not isinstance(value, bool):
+        raise ValueError(f"expected true or false, got {value!r}")
+    return value
+
+
+def debate_format(value):
+    if value not in DEBATE_FORMATS:
+        raise ValueError(f"expected one of {', '.join(DEBATE_FORMATS)}, got {value!r}")
+    return value
+
+
+def number(kind, low, high):
+    """Validator for a JSON number of `kind` between low and high; strings and fractional ints are rejected"""
+    def check(value):
+        if (isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+                or (kind is int and value != int(value))):
+            raise ValueError(f"expected {'an integer' if kind is int else 'a number'}, got {value!r}")
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}, got {value!r}")
+        return kind(value)
+    return check
+
+
+def last_seen_index(value):
+    """Index of the last message a client already has; anything unparsable means none"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+DEBATE_OPTIONS = {
+    'debate_format': debate_format,
+    'context_window': number(int, 1, 200),
+    'fresh': json_bool,
+    'token_budget': number(int, 1, 10_000_000),
+    'cost_budget_usd': number(float, 0.0001, 1000.0),
+    'max_completion_tokens': number(int, 1, 8192),
+    'deadline_s': number(float, 1.0, 24 * 3600.0),
+    'stop_when_stale': json_bool,
+}
+
+
+def checked(name, check, value):
+    """check(value), with the field name in the ValueError of a bad value"""
+    try:
+        return check(value)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
+def debate_options(body):
+    """Validated debate options present in a request body"""
+    return {name: checked(name, check, body[name]) for name, check in DEBATE_OPTIONS.items() if body.get(name) is not None}
+
+
+class ServedDebate:
+    """One debate running on the server loop, plus the live feed its subscribers read
+
+    Finished messages are kept so late subscribers can catch up; token
+    chunks are only forwarded to whoever is connected at the time.
+    """
+
+    def __init__(self, debate_id, topic, max_turns, options):
+        self.debate_id = debate_id
+        self.topic = topic
+        self.max_turns = max_turns
+        self.options = options
+        self.status = "queued"
+        self.messages = []
+        self.stop_reason = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+        self.subscribers = set()
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    def subscribe(self, after=-1, max_chunks=1000):
+        """Queue of events for one client, starting with the messages after index `after`"""
+        queue = asyncio.Queue()
+        queue.max_chunks = max_chunks
+        for seq, msg in enumerate(self.messages[after + 1:], after + 1):
+            queue.put_nowait(('message', seq, msg))
+        if self.done:
+            queue.put_nowait(('done', None, self.summary()))
+        else:
+            self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def _publish(self, kind, seq, data):
+        for queue in self.subscribers:
+            # A client that stopped reading loses token chunks, never finished messages
+            if kind == 'chunk' and queue.qsize() >= queue.max_chunks:
+                continue
+            queue.put_nowait((kind, seq, data))
+
+    def on_message(self, msg):
+        self.messages.append(msg)
+        self._publish('message', len(self.messages) - 1, msg)
+
+    def on_chunk(self, speaker, text):
+        self._publish('chunk', None, {'speaker': speaker, 'content': text})
+
+    def on_rollback(self, count):
+        # A failed step is being retried: its turns will be sent again under the same ids
+        del self.messages[count:]
+        self._publish('rollback', None, {'message_count': count})
+
+    def finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self._publish('done', None, self.summary())
+        self.subscribers.clear()
+
+    def summary(self, include_messages=False):
+        data = {
+            'debate_id': self.debate_id,
+            'topic': self.topic,
+            'status': self.status,
+            'max_turns': self.max_turns,
+            'message_count': len(self.messages),
+            'stop_reason': self.stop_reason,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if include_messages:
+            data['messages'] = self.messages
+        return data
+
+
+class DebateService:
+    """Runs many debates on the current event loop with admission control
+
+    At most `max_active` debates run at once and `max_queued` more wait for
+    a slot; anything beyond that is rejected so the server sheds load
+    instead of growing its memory without bound.
+    """
+
+    def __init__(self, max_active=32, max_queued=64, debate_ttl=3600):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.debate_ttl = debate_ttl
+        self.debates = {}
+        self.active = 0
+        self.peak_active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_active)
+
+    @property
+    def queued(self):
+        return sum(1 for d in self.debates.values() if d.status == "queued")
+
+    def submit(self, topic, max_turns=10, **options):
+        """Start a debate and return it, or None when the server is full"""
+        self._prune()
+        if self.active >= self.max_active and self.queued >= self.max_queued:
+            self.rejected += 1
+            return None
+        debate = ServedDebate(uuid.uuid4().hex[:12], topic, max_turns, options)
+        self.debates[debate.debate_id] = debate
+        self.admitted += 1
+        debate.task = asyncio.ensure_future(self._run(debate))
+        return debate
+
+    async def _run(self, debate):
+        try:
+            async with self._slots:
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+                debate.status = "running"
+                debate.started_at = time.time()
+                try:
+                    messages, debate.stop_reason = await stream_debate(
+                        debate.topic,
+                        debate.max_turns,
+                        on_message=debate.on_message,
+                        on_chunk=debate.on_chunk,
+                        on_rollback=debate.on_rollback,
+                        debate_id=debate.debate_id,
+                        **debate.options
+                    )
+                    debate.messages = messages
+                finally:
+                    self.active -= 1
+            debate.finish("completed")
+        except asyncio.CancelledError:
+            debate.finish("cancelled")
+        except DebateInterrupted as e:
+            debate.error = str(e)
+            debate.messages = e.messages
+            debate.finish("failed")
+        except Exception as e:
+            debate.error = str(e)
+            debate.finish("failed")
+
+    def get(self, debate_id):
+        return self.debates.get(debate_id)
+
+    def cancel(self, debate_id):
+        debate = self.get(debate_id)
+        if debate is not None and not debate.done:
+            debate.task.cancel()
+        return debate
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'queued': self.queued,
+            'peak_active': self.peak_active,
+            'max_active': self.max_active,
+            'max_queued': self.max_queued,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            # ru_maxrss is in kilobytes on Linux
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+
+    def _prune(self):
+        # Finished debates stay readable from the debate store after they leave memory
+        cutoff = time.time() - self.debate_ttl
+        for debate_id in [d.debate_id for d in self.debates.values() if d.done and d.finished_at < cutoff]:
+            del self.debates[debate_id]
+
+
+def stored_debate(debate_id):
+    """Summary of a debate that is no longer in memory, from the debate store"""
+    store = get_debate_store()
+    debate = store.get_debate(debate_id)
+    if debate is None:
+        return None
+    debate['messages'] = store.get_messages(debate_id)
+    return debate
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    @property
+    def service(self):
+        return self.application.settings['service']
+
+    def write_json(self, data, status=200):
+        self.set_status(status)
+        self.set_header('Content-Type', 'application/json')
+        self.finish(json.dumps(data, ensure_ascii=False))
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({'error': self._reason}, status_code)
+
+
+class DebatesHandler(BaseHandler):
+    def post(self):
+        """Start a debate: {"topic": ..., "max_turns": 10, "debate_format": "round_robin", ...}
+
+        "max_messages" is still accepted as the old name of "max_turns".
+        """
+        try:
+            body = json.loads(self.request.body or b'{}')
+            topic = str(body['topic']).strip()
+            max_turns = checked('max_turns', number(int, 2, 200), body.get('max_turns', body.get('max_messages', 10)))
+            options = debate_options(body)
+        except (KeyError, TypeError, ValueError) as e:
+            raise tornado.web.HTTPError(400, reason=f"Invalid debate request: {e}")
+        if not topic:
+            raise tornado.web.HTTPError(400, reason="A topic is required")
+        debate = self.service.submit(topic, max_turns, **options)
+        if debate is None:
+            self.set_header('Retry-After', '5')
+            raise tornado.web.HTTPError(429, reason="Too many debates in progress")
+        self.set_header('Location', f"/debates/{debate.debate_id}")
+        self.write_json(debate.summary(), 202)
+
+
+class DebateHandler(BaseHandler):
+    def get(self, debate_id):
+        """Status and, once there are any, the messages of one debate"""
+        debate = self.service.get(debate_id)
+        if debate is not None:
+            self.write_json(debate.summary(include_messages=True))
+            return
+        stored = stored_debate(debate_id)
+        if stored is None:
+            raise tornado.web.HTTPError(404, reason="Unknown debate")
+        self.write_json(stored)
+
+    def delete(self, debate_id):
+        debate = self.service.cancel(debate_id)
+        if debate is None:
+            raise tornado.web.HTTPError(404, reason="Unknown debate")
+        self.write_json({'debate_id': debate_id, 'status': debate.status})
+
+
+class DebateEventsHandler(BaseHandler):
+    """Server-sent events: `message` (with id = message index), `chunk` and a final `done`
+
+    A `rollback` event with a message_count means a failed step is retried:
+    messages from that index on are dropped and will be sent again.
+    Reconnecting clients send Last-Event-ID and only receive the messages they missed.
+    """
+
+    async def get(self, debate_id):
+        debate = self.service.get(debate_id)
+        if debate is None:
+            raise tornado.web.HTTPError(404, reason="Unknown debate")
+        after = last_seen_index(self.request.headers.get('Last-Event-ID'))
+        self.set_header('Content-Type', 'text/event-stream')
+        self.set_header('Cache-Control', 'no-cache')
+        self.set_header('X-Accel-Buffering', 'no')
+        self.queue = debate.subscribe(after)
+        self.debate = debate
+        try:
+            while True:
+                kind, seq, data = await self.queue.get()
+                if data is None:
+                    # The client went away
+                    return
+                event_id = f"id: {seq}\n" if seq is not None else ""
+                self.write(f"event: {kind}\n{event_id}data: {json.dumps(data, ensure_ascii=False)}\n\n")
+                await self.flush()
+                if kind == 'done':
+                    break
+        except tornado.iostream.StreamClosedError:
+            pass
+        finally:
+            debate.unsubscribe(self.queue)
+        self.finish()
+
+    def on_connection_close(self):
+        # Wake the handler so it can drop its subscription
+        if getattr(self, 'queue', None) is not None:
+            self.debate.unsubscribe(self.queue)
+            self.queue.put_nowait(('done', None, None))
+
+
+class DebateSocketHandler(tornado.websocket.WebSocketHandler):
+    """WebSocket feed with the same events as the SSE stream, one JSON object per frame"""
+
+    async def open(self, debate_id):
+        self.debate = self.application.settings['service'].get(debate_id)
+        if self.debate is None:
+            self.close(4404, "Unknown debate")
+            return
+        self.queue = self.debate.subscribe(last_seen_index(self.get_query_argument('after', None)))
+        self.pump = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        try:
+            while True:
+                kind, seq, data = await self.queue.get()
+                await self.write_message(json.dumps({'event': kind, 'id': seq, 'data': data}, ensure_ascii=False))
+                if kind == 'done':
+                    break
+            self.close()
+        except tornado.websocket.WebSocketClosedError:
+            pass
+
+    def on_close(self):
+        if getattr(self, 'queue', None) is not None:
+            self.debate.unsubscribe(self.queue)
+            self.pump.cancel()
+
+
+class StatsHandler(BaseHandler):
+    def get(self):
+        self.write_json(self.service.stats())
+
+
+def make_app(service=None):
+    return tornado.web.Application([
+        (r"/debates", DebatesHandler),
+        (r"/debates/([0-9a-f]+)", DebateHandler),
+        (r"/debates/([0-9a-f]+)/events", DebateEventsHandler),
+        (r"/debates/([0-9a-f]+)/ws", DebateSocketHandler),
+        (r"/stats", StatsHandler),
+    ], service=service or DebateService(
+        max_active=int(os.getenv('DEBATE_SERVER_MAX_ACTIVE', '32')),
+        max_queued=int(os.getenv('DEBATE_SERVER_MAX_QUEUED', '64')),
+    ))
+
+
+async def serve(port, address):
+    app = make_app()
+    app.listen(port, address)
+    print(f"Debate server listening on http://{address}:{port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async HTTP API that runs debates and streams them over SSE or WebSocket")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--address', default='127.0.0.1')
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.address))
+
+
+if __name__ == "__main__":
+    main()
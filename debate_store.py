@@ -0,0 +1,228 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS debates (
+    debate_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL COLLATE NOCASE,
+    debate_format TEXT NOT NULL,
+    status TEXT NOT NULL,
+    winner TEXT,
+    stop_reason TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS debates_started ON debates (started_at, debate_id);
+CREATE INDEX IF NOT EXISTS debates_topic ON debates (topic, started_at);
+CREATE INDEX IF NOT EXISTS debates_winner ON debates (winner, started_at);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    debate_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    metrics TEXT,
+    UNIQUE (debate_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS verdicts (
+    transcript_hash TEXT PRIMARY KEY,
+    verdict TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, content='messages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+DEBATE_COLUMNS = "debate_id, topic, debate_format, status, winner, stop_reason, message_count, started_at, finished_at"
+
+
+def fts_query(text):
+    """Match every word of `text` literally instead of as FTS5 syntax"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class DebateStore:
+    """Every debate and its messages in SQLite, written turn by turn
+
+    Debates are indexed by start time, topic and winner, and message
+    content is full-text searchable, so the history can be paged and
+    searched without loading it. One connection is shared behind a lock.
+    """
+
+    def __init__(self, db_path="debates.db", search_scan_limit=2000):
+        self.search_scan_limit = search_scan_limit
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed turns across crashes; only a power loss can drop the last few
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def start_debate(self, debate_id, topic, debate_format="round_robin"):
+        """Register a debate; a resumed debate keeps its original start time and messages"""
+        with self._lock:
+            self.db.execute(
+                "INSERT INTO debates (debate_id, topic, debate_format, status, started_at) VALUES (?, ?, ?, 'running', ?) "
+                "ON CONFLICT (debate_id) DO UPDATE SET status = 'running', finished_at = NULL",
+                (debate_id, topic, debate_format, time.time())
+            )
+            self.db.commit()
+            self.writes += 1
+
+    def add_message(self, debate_id, seq, msg):
+        """Store the seq-th message of a debate (overwriting it if a retried turn produced it again)"""
+        metrics = json.dumps(msg['metrics']) if msg.get('metrics') else None
+        with self._lock:
+            self.db.execute(
+                "INSERT INTO messages (debate_id, seq, speaker, content, timestamp, metrics) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (debate_id, seq) DO UPDATE SET speaker = excluded.speaker, content = excluded.content, "
+                "timestamp = excluded.timestamp, metrics = excluded.metrics",
+                (debate_id, seq, msg['speaker'], str(msg['content']), msg['timestamp'], metrics)
+            )
+            self.db.execute(
+                "UPDATE debates SET message_count = max(message_count, ?) WHERE debate_id = ?", (seq + 1, debate_id)
+            )
+            self.db.commit()
+            self.writes += 1
+
+    def truncate(self, debate_id, count):
+        """Drop messages after the first `count`, e.g. turns rolled back to a checkpoint"""
+        with self._lock:
+            self.db.execute("DELETE FROM messages WHERE debate_id = ? AND seq >= ?", (debate_id, count))
+            self.db.execute(
+                "UPDATE debates SET message_count = min(message_count, ?) WHERE debate_id = ?", (count, debate_id)
+            )
+            self.db.commit()
+
+    def finish_debate(self, debate_id, status, stop_reason=None, winner=None):
+        with self._lock:
+            self.db.execute(
+                "UPDATE debates SET status = ?, stop_reason = ?, winner = ?, finished_at = ? WHERE debate_id = ?",
+                (status, stop_reason, winner, time.time(), debate_id)
+            )
+            self.db.commit()
+            self.writes += 1
+
+    def delete(self, debate_id):
+        with self._lock:
+            self.db.execute("DELETE FROM messages WHERE debate_id = ?", (debate_id,))
+            self.db.execute("DELETE FROM debates WHERE debate_id = ?", (debate_id,))
+            self.db.commit()
+
+    def list_debates(self, limit=10, before=None, topic=None, winner=None, search=None):
+        """Newest debates first, one page at a time
+
+        `before` is the (started_at, debate_id) of the last debate on the
+        previous page. topic matches as a case-insensitive prefix, search
+        as words that all occur in one message.
+        """
+        where, params = [], []
+        if before is not None:
+            where.append("(started_at, debate_id) < (?, ?)")
+            params.extend(before)
+        if topic:
+            where.append("topic LIKE ? ESCAPE '\\'")
+            params.append(topic.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if winner:
+            where.append("winner = ?")
+            params.append(winner)
+        with self._lock:
+            if search and search.split():
+                query = fts_query(search)
+                matches = self.db.execute(
+                    "SELECT count(*) FROM (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? LIMIT ?)",
+                    (query, self.search_scan_limit + 1)
+                ).fetchone()[0]
+                if matches <= self.search_scan_limit:
+                    # Rare words: collect the few matching debates from the full-text index
+                    where.append(
+                        "debate_id IN (SELECT m.debate_id FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                        "WHERE messages_fts MATCH ?)"
+                    )
+                else:
+                    # Common words: walk debates newest first and stop once the page is full
+                    where.append(
+                        "EXISTS (SELECT 1 FROM messages m JOIN messages_fts ON messages_fts.rowid = m.id "
+                        "WHERE m.debate_id = debates.debate_id AND messages_fts MATCH ?)"
+                    )
+                params.append(query)
+            sql = f"SELECT {DEBATE_COLUMNS} FROM debates"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY started_at DESC, debate_id DESC LIMIT ?"
+            rows = self.db.execute(sql, params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_debate(self, debate_id):
+        with self._lock:
+            row = self.db.execute(f"SELECT {DEBATE_COLUMNS} FROM debates WHERE debate_id = ?", (debate_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_messages(self, debate_id, offset=0, limit=None):
+        """Messages of one debate in order, in the shape stream_debate produced them"""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT speaker, content, timestamp, metrics FROM messages WHERE debate_id = ? AND seq >= ? "
+                "ORDER BY seq LIMIT ?",
+                (debate_id, offset, -1 if limit is None else limit)
+            ).fetchall()
+        messages = []
+        for row in rows:
+            msg = {'speaker': row['speaker'], 'content': row['content'], 'timestamp': row['timestamp']}
+            if row['metrics']:
+                msg['metrics'] = json.loads(row['metrics'])
+            messages.append(msg)
+        return messages
+
+    def get_verdict(self, transcript_hash):
+        """Judge panel verdict cached for a transcript, or None"""
+        with self._lock:
+            row = self.db.execute("SELECT verdict FROM verdicts WHERE transcript_hash = ?", (transcript_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_verdict(self, transcript_hash, verdict):
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO verdicts (transcript_hash, verdict, created_at) VALUES (?, ?, ?)",
+                (transcript_hash, json.dumps(verdict), time.time())
+            )
+            self.db.commit()
+            self.writes += 1
+
+    def stats(self):
+        with self._lock:
+            debates = self.db.execute("SELECT count(*) FROM debates").fetchone()[0]
+        return {'debates': debates, 'writes': self.writes}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_debate_store():
+    """Process-wide debate history; DEBATE_DB picks the SQLite file (default debates.db)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DebateStore(os.getenv('DEBATE_DB') or 'debates.db')
+        return _store
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import uuid
+
+
+class DebateJob:
+    """State of one debate submitted to the background worker"""
+
+    def __init__(self, job_id, topic, max_turns):
+        self.job_id = job_id
+        self.topic = topic
+        self.max_turns = max_turns
+        self.status = "queued"
+        self.messages = []
+        # Text generated so far for each turn still in progress (several in parallel rounds)
+        self.partials = {}
+        self.stop_reason = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        # A job cancelled before it started never ran _run_job, so its future is the only record of it
+        return self.status == "cancelled" or (self.future is not None and self.future.cancelled())
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed", "cancelled") or self.cancelled
+
+    def add_message(self, msg):
+        with self._lock:
+            self.messages.append(msg)
+            self.partials.pop(msg['speaker'], None)
+
+    def add_chunk(self, speaker, text):
+        with self._lock:
+            self.partials[speaker] = self.partials.get(speaker, "") + text
+
+    def rollback(self, count):
+        """Drop the messages after the first `count` and every half-streamed turn; the debate retries from there"""
+        with self._lock:
+            del self.messages[count:]
+            self.partials.clear()
+
+    def snapshot(self):
+        """Consistent copy of the finished messages and the turns being generated"""
+        with self._lock:
+            return list(self.messages), dict(self.partials)
+
+
+class DebateWorker:
+    """One long-lived asyncio loop on a daemon thread that runs debate jobs
+
+    Jobs are submitted from any thread (e.g. a Streamlit script run) and
+    execute concurrently on the shared loop; callers poll get() for progress.
+    """
+
+    def __init__(self, job_ttl=3600):
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="debate-worker", daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, debate_fn, topic, max_turns, **kwargs):
+        """Schedule debate_fn(topic, max_turns, on_message=..., on_chunk=..., on_rollback=..., **kwargs) and return its job id
+
+        debate_fn is a coroutine function returning (messages, stop_reason).
+        """
+        self._prune()
+        job = DebateJob(uuid.uuid4().hex[:12], topic, max_turns)
+        with self._lock:
+            self.jobs[job.job_id] = job
+        job.future = asyncio.run_coroutine_threadsafe(self._run_job(job, debate_fn, kwargs), self.loop)
+        return job.job_id
+
+    async def _run_job(self, job, debate_fn, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            messages, stop_reason = await debate_fn(
+                job.topic,
+                job.max_turns,
+                on_message=job.add_message,
+                on_chunk=job.add_chunk,
+                on_rollback=job.rollback,
+                **kwargs
+            )
+            with job._lock:
+                job.messages = messages
+            job.stop_reason = stop_reason
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            partial = getattr(e, 'messages', None)
+            if partial is not None:
+                # The debate reported how far it got (e.g. up to its last checkpoint)
+                with job._lock:
+                    job.messages = partial
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and not job.done and job.future is not None:
+            job.future.cancel()
+
+    def forget(self, job_id):
+        """Drop a finished job whose result has been collected instead of keeping it for job_ttl"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.done:
+                del self.jobs[job_id]
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the worker loop and block for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {
+            'running': sum(1 for j in jobs if j.status == "running"),
+            'queued': sum(1 for j in jobs if j.status == "queued"),
+            'finished': sum(1 for j in jobs if j.done),
+        }
+
+    def _prune(self):
+        # Drop finished jobs nobody has looked at for a while
+        cutoff = time.time() - self.job_ttl
+        with self._lock:
+            for job_id in [j.job_id for j in self.jobs.values() if j.done and (j.finished_at or j.submitted_at) < cutoff]:
+                del self.jobs[job_id]
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_debate_worker():
+    """Process-wide worker shared by every Streamlit session"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = DebateWorker()
+        return _worker
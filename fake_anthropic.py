@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import tornado.web
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+
+from fake_model import ARGUMENT_ANGLES, estimate_tokens
+
+
+class FakeMessagesAPI:
+    """Local stand-in for the Anthropic Messages API that simulates prompt caching
+
+    Every request body is kept in `requests`, so tests can check what the
+    client sent. Caching follows the API's rules closely enough to compare
+    runs: a cache_control block caches the prefix up to and including it
+    once that prefix has at least `min_cache_tokens` tokens, and a later
+    request reads the longest cached prefix at or before its last
+    breakpoint. Time to first token grows with the uncached prompt tokens.
+    """
+
+    def __init__(self, min_cache_tokens=1024, reply_tokens=120, base_ttft_s=0.05, prefill_s_per_1k=0.1,
+                 cached_prefill_s_per_1k=0.01, tokens_per_second=2000.0):
+        self.min_cache_tokens = min_cache_tokens
+        self.reply_tokens = reply_tokens
+        self.base_ttft_s = base_ttft_s
+        self.prefill_s_per_1k = prefill_s_per_1k
+        self.cached_prefill_s_per_1k = cached_prefill_s_per_1k
+        self.tokens_per_second = tokens_per_second
+        self.requests = []
+        self.cache = set()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.requests = []
+            self.cache = set()
+
+    @staticmethod
+    def blocks(payload):
+        """The prompt as a flat list of (block without cache_control, tokens, is breakpoint)"""
+        parts = [('system', payload.get('system') or [])]
+        parts += [(m['role'], m['content']) for m in payload.get('messages', [])]
+        blocks = []
+        for role, content in parts:
+            if isinstance(content, str):
+                content = [{'type': 'text', 'text': content}] if content else []
+            for block in content:
+                plain = {k: v for k, v in block.items() if k != 'cache_control'}
+                blocks.append(((role, plain), estimate_tokens(json.dumps(plain)), 'cache_control' in block))
+        return blocks
+
+    def usage(self, payload):
+        """Input token usage of a request, caching what its breakpoints ask for"""
+        blocks = self.blocks(payload)
+        prefix = hashlib.sha256()
+        keys, totals = [], []
+        total = 0
+        for plain, tokens, _ in blocks:
+            prefix.update(json.dumps(plain, sort_keys=True).encode())
+            keys.append(prefix.hexdigest())
+            total += tokens
+            totals.append(total)
+        breakpoints = [i for i, (_, _, marked) in enumerate(blocks) if marked]
+        last = breakpoints[-1] if breakpoints else -1
+        with self._lock:
+            read_end = next((i for i in range(last, -1, -1) if keys[i] in self.cache), -1)
+            cached_end = read_end
+            for i in breakpoints:
+                if i > read_end and totals[i] >= self.min_cache_tokens:
+                    self.cache.add(keys[i])
+                    cached_end = i
+        read = totals[read_end] if read_end >= 0 else 0
+        write = totals[cached_end] - read if cached_end > read_end else 0
+        return {
+            'input_tokens': total - read - write,
+            'cache_read_input_tokens': read,
+            'cache_creation_input_tokens': write,
+            'output_tokens': 0,
+        }
+
+    def reply(self):
+        with self._lock:
+            call = len(self.requests)
+        sentences = []
+        while sum(estimate_tokens(s) for s in sentences) < self.reply_tokens:
+            angle = ARGUMENT_ANGLES[(call + len(sentences)) % len(ARGUMENT_ANGLES)]
+            sentences.append(f"Point {call}.{len(sentences) + 1}: consider {angle}.")
+        return " ".join(sentences)
+
+    def ttft(self, usage):
+        uncached = usage['input_tokens'] + usage['cache_creation_input_tokens']
+        return (self.base_ttft_s + uncached / 1000 * self.prefill_s_per_1k
+                + usage['cache_read_input_tokens'] / 1000 * self.cached_prefill_s_per_1k)
+
+
+class MessagesHandler(tornado.web.RequestHandler):
+    def initialize(self, api):
+        self.api = api
+
+    def event(self, name, data):
+        self.write(f"event: {name}\ndata: {json.dumps(data)}\n\n")
+        return self.flush()
+
+    async def post(self):
+        payload = json.loads(self.request.body)
+        usage = self.api.usage(payload)
+        text = self.api.reply()
+        with self.api._lock:
+            self.api.requests.append(payload)
+        await asyncio.sleep(self.api.ttft(usage))
+        message = {
+            'id': f"msg_fake_{len(self.api.requests)}",
+            'type': "message",
+            'role': "assistant",
+            'model': payload.get('model', "fake-claude"),
+            'content': [],
+            'stop_reason': None,
+            'stop_sequence': None,
+            'usage': dict(usage, output_tokens=1),
+        }
+        output_tokens = estimate_tokens(text)
+        if not payload.get('stream'):
+            message.update(content=[{'type': "text", 'text': text}], stop_reason="end_turn")
+            message['usage']['output_tokens'] = output_tokens
+            await asyncio.sleep(output_tokens / self.api.tokens_per_second)
+            self.finish(message)
+            return
+        self.set_header('Content-Type', "text/event-stream")
+        self.set_header('Cache-Control', "no-cache")
+        await self.event('message_start', {'type': "message_start", 'message': message})
+        await self.event('content_block_start', {
+            'type': "content_block_start", 'index': 0, 'content_block': {'type': "text", 'text': ""}
+        })
+        for word in text.split(" "):
+            await self.event('content_block_delta', {
+                'type': "content_block_delta", 'index': 0, 'delta': {'type': "text_delta", 'text': word + " "}
+            })
+            await asyncio.sleep(estimate_tokens(word + " ") / self.api.tokens_per_second)
+        await self.event('content_block_stop', {'type': "content_block_stop", 'index': 0})
+        await self.event('message_delta', {
+            'type': "message_delta",
+            'delta': {'stop_reason': "end_turn", 'stop_sequence': None},
+            'usage': {'output_tokens': output_tokens},
+        })
+        await self.event('message_stop', {'type': "message_stop"})
+        self.finish()
+
+
+def make_app(api):
+    return tornado.web.Application([(r"/v1/messages", MessagesHandler, {'api': api})])
+
+
+class FakeAnthropicServer:
+    """Serves a FakeMessagesAPI on 127.0.0.1 from its own thread; point ANTHROPIC_BASE_URL at `base_url`"""
+
+    def __init__(self, api=None):
+        self.api = api or FakeMessagesAPI()
+        self.base_url = None
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            sockets = bind_sockets(0, '127.0.0.1')
+            server = HTTPServer(make_app(self.api))
+            server.add_sockets(sockets)
+            self.base_url = f"http://127.0.0.1:{sockets[0].getsockname()[1]}"
+            started.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                server.stop()
+                self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="fake-anthropic", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+
+
+if __name__ == '__main__':
+    server = FakeAnthropicServer()
+    print(f"ANTHROPIC_BASE_URL={server.start()}")
+    while True:
+        time.sleep(3600)
@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+from autogen_core.models import (
+    AssistantMessage,
+    ChatCompletionClient,
+    CreateResult,
+    ModelFamily,
+    RequestUsage,
+    SystemMessage,
+)
+
+
+class FakeAPIError(Exception):
+    """Injected failure shaped like an Anthropic API status error"""
+
+    def __init__(self, status_code=529, retry_after=None):
+        super().__init__(f"Fake API error {status_code}")
+        self.status_code = status_code
+        self.headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+
+
+class LatencyModel:
+    """Time-to-first-token distribution: fixed, uniform or lognormal (in seconds)"""
+
+    def __init__(self, kind='lognormal', mean=0.8, spread=0.35):
+        self.kind = kind
+        self.mean = mean
+        self.spread = spread
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            return self.mean
+        if self.kind == 'uniform':
+            return rng.uniform(max(0.0, self.mean - self.spread), self.mean + self.spread)
+        # Lognormal with the requested mean keeps the long tail real APIs have
+        mu = math.log(max(self.mean, 1e-9)) - self.spread ** 2 / 2
+        return rng.lognormvariate(mu, self.spread)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+# Distinct talking points so the fake debate keeps producing new arguments for a while
+ARGUMENT_ANGLES = [
+    "economic growth and jobs in small firms",
+    "public safety records from comparable industries",
+    "civil liberties and the right to privacy",
+    "international competition with rival nations",
+    "historical precedent set by earlier technologies",
+    "enforcement costs carried by taxpayers",
+    "innovation speed inside research universities",
+    "accountability when automated systems cause harm",
+    "consumer trust measured in recent surveys",
+    "environmental impact of large data centres",
+    "education gaps between rich and poor regions",
+    "long term risks nobody can insure against",
+]
+
+
+def default_reply(messages, call_index):
+    """Short deterministic debate line in the voice of the agent's system message"""
+    system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+    turn = sum(1 for m in messages if isinstance(m, AssistantMessage)) + 1
+    if "scorecard" in system.lower():
+        # Judge: a deterministic scorecard for every round of the transcript
+        rounds = max(1, str(messages[-1].content).count("\nRound "))
+        lean = 1 if call_index % 3 else -1
+        cards = [
+            {'round': r, 'John': {'logic': 6 + lean, 'evidence': 6, 'rebuttal': 6}, 'Jack': {'logic': 6, 'evidence': 6, 'rebuttal': 6}}
+            for r in range(1, rounds + 1)
+        ]
+        winner = "John" if lean > 0 else "Jack"
+        return json.dumps({'rounds': cards, 'winner': winner, 'reason': f"{winner} reasoned more carefully."})
+    if "host" in system.lower():
+        last = str(messages[-1].content).lower() if messages else ""
+        if "winner" in last:
+            winner = "John" if call_index % 2 else "Jack"
+            return f"Both sides argued well, but the evidence tipped it. OVERALL WINNER: {winner}!"
+        return f"Round {turn}: thank you both. John, Jack, please respond to the last point directly."
+    side = "In favour" if "supporting" in system.lower() else "Against"
+    angle = ARGUMENT_ANGLES[call_index % len(ARGUMENT_ANGLES)]
+    return f"{side}: think about {angle}."
+
+
+class FakeChatCompletionClient(ChatCompletionClient):
+    """Local stand-in for AnthropicChatCompletionClient
+
+    Simulates time-to-first-token, a token streaming rate and injected
+    failures without any network access. Replies come from `replies`
+    (cycled) or from default_reply(). With the same seed the sequence of
+    latencies, failures and replies is reproducible.
+    """
+
+    def __init__(self, model="fake-claude", replies=None, latency=None, tokens_per_second=60.0,
+                 failure_rate=0.0, failure_status=529, retry_after=None, seed=0, max_tokens=4096):
+        self._create_args = {'model': model, 'max_tokens': max_tokens}
+        self.replies = itertools.cycle(replies) if replies else None
+        self.latency = latency or LatencyModel()
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.model_time = 0.0
+        # (start, end) perf_counter times of every call, for measuring overlap between calls
+        self.call_intervals = []
+        self.requests = []
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    def _next_reply(self, messages):
+        if self.replies is not None:
+            reply = next(self.replies)
+            return reply(messages) if callable(reply) else reply
+        return default_reply(messages, self.calls)
+
+    def _start_call(self, messages, extra_create_args):
+        self.calls += 1
+        self.requests.append({'messages': len(messages), 'extra_create_args': dict(extra_create_args)})
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeAPIError(self.failure_status, self.retry_after)
+        reply = self._next_reply(messages)
+        max_tokens = extra_create_args.get('max_tokens', self._create_args['max_tokens'])
+        if estimate_tokens(reply) > max_tokens:
+            reply = reply[:max_tokens * 4]
+        return reply, self.latency.sample(self.rng)
+
+    def _result(self, messages, reply):
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        usage = RequestUsage(prompt_tokens=prompt_tokens, completion_tokens=estimate_tokens(reply))
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total_usage.completion_tokens + usage.completion_tokens,
+        )
+        return CreateResult(finish_reason="stop", content=reply, usage=usage, cached=False)
+
+    async def create(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        started = time.perf_counter()
+        try:
+            reply, ttft = self._start_call(messages, extra_create_args)
+            await asyncio.sleep(ttft + estimate_tokens(reply) / self.tokens_per_second)
+            return self._result(messages, reply)
+        finally:
+            finished = time.perf_counter()
+            self.model_time += finished - started
+            self.call_intervals.append((started, finished))
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        started = time.perf_counter()
+        try:
+            reply, ttft = self._start_call(messages, extra_create_args)
+            await asyncio.sleep(ttft)
+            words = reply.split(" ")
+            for i, word in enumerate(words):
+                chunk = word if i == 0 else " " + word
+                await asyncio.sleep(estimate_tokens(chunk) / self.tokens_per_second)
+                yield chunk
+            yield self._result(messages, reply)
+        finally:
+            finished = time.perf_counter()
+            self.model_time += finished - started
+            self.call_intervals.append((started, finished))
+
+    async def close(self):
+        pass
+
+    def actual_usage(self):
+        return self._total_usage
+
+    def total_usage(self):
+        return self._total_usage
+
+    def count_tokens(self, messages, *, tools=[]):
+        return sum(estimate_tokens(str(m.content)) for m in messages)
+
+    def remaining_tokens(self, messages, *, tools=[]):
+        return 200000 - self.count_tokens(messages)
+
+    @property
+    def capabilities(self):
+        return self.model_info
+
+    @property
+    def model_info(self):
+        return {
+            'vision': False,
+            'function_calling': False,
+            'json_output': False,
+            'family': ModelFamily.UNKNOWN,
+            'structured_output': False,
+        }
+
+
+# Relative speed of the fake stand-ins for smaller models: (time-to-first-token factor, tokens/second factor)
+MODEL_SPEED = {'haiku': (0.5, 2.0)}
+
+
+def model_speed(model):
+    """(ttft factor, tps factor) of a model name, 1.0 for anything not known to be faster"""
+    for marker, speed in MODEL_SPEED.items():
+        if marker in model:
+            return speed
+    return (1.0, 1.0)
+
+
+def fake_model_from_env(model="fake-claude", **overrides):
+    """Fake client configured from DEBATE_FAKE_* environment variables"""
+    ttft_factor, tps_factor = model_speed(model)
+    config = dict(
+        model=model,
+        latency=LatencyModel(
+            os.getenv('DEBATE_FAKE_LATENCY', 'lognormal'),
+            float(os.getenv('DEBATE_FAKE_TTFT', '0.8')) * ttft_factor,
+            float(os.getenv('DEBATE_FAKE_SPREAD', '0.35')),
+        ),
+        tokens_per_second=float(os.getenv('DEBATE_FAKE_TPS', '60')) * tps_factor,
+        failure_rate=float(os.getenv('DEBATE_FAKE_FAILURE_RATE', '0')),
+        seed=int(os.getenv('DEBATE_FAKE_SEED', '0')),
+    )
+    config.update(overrides)
+    return FakeChatCompletionClient(**config)
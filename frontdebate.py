@@ -1,122 +1,47 @@
 import streamlit as st
-import asyncio
-import os
+import functools
+import sys
+import time
+import uuid
 from datetime import datetime
-from autogen_ext.models.anthropic import AnthropicChatCompletionClient
-from autogen_core.models import UserMessage
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.base import TaskResult
 from dotenv import load_dotenv
-import time
-import json
-import io
-import random
-import threading
-from concurrent.futures import ThreadPoolExecutor
+from budgets import BUDGET_TIERS, DEFAULT_REPLY_TOKENS
+from debate_store import get_debate_store
+from debate_worker import get_debate_worker
+from profiling import Profile, get_profile_store, phase, profiling_default
+from session_memory import MessageLog, get_session_memory
+
+# Streamlit runs this script again on every widget change, so only light modules are imported up here.
+# The debate engine (autogen, the Anthropic client and the client wrappers) is imported where a debate
+# needs it; the welcome screen and the sidebar never load it.
 
 # Load environment variables
 load_dotenv()
 
-class DebateManager:
-    def __init__(self):
-        self.api_key = os.getenv('API_KEY')
-        if not self.api_key:
-            raise ValueError("API_KEY environment variable is not set.")
-        
-        self.current_round = 0
-        self.max_rounds = 3
-        self.round_winners = []
-        self.debate_messages = []
-        self.human_interaction_mode = False
-        
-    def create_model(self):
-        return AnthropicChatCompletionClient(
-            model="claude-3-5-sonnet-20241022",
-            api_key=self.api_key,
-            max_retries=2,
-            timeout=30.0,
-        )
-
-    def create_agents(self, topic):
-        model = self.create_model()
-        
-        host_prompt = (
-            f'You are the host of a debate on: {topic}. '
-            'RULES: 1) Welcome everyone briefly, '
-            '2) Let John and Jack debate naturally (do NOT announce winner yet), '
-            '3) Only moderate the discussion, let it flow. '
-            'Keep responses under 30 words. DO NOT announce winner until specifically asked.'
-        )
-        
-        john_prompt = (
-            f'You are John, supporting: {topic}. '
-            'Make concise, strong arguments. Under 30 words per response. Be persuasive.'
-        )
-        
-        jack_prompt = (
-            f'You are Jack, opposing: {topic}. '
-            'Make concise counter-arguments. Under 30 words per response. Challenge effectively.'
-        )
-        
-        host = AssistantAgent(
-            name="Host",    
-            model_client=model,
-            system_message=host_prompt,  
-        )    
-        
-        supporter = AssistantAgent(
-            name="John",
-            model_client=model,
-            system_message=john_prompt,
-        )
-        
-        critic = AssistantAgent(
-            name="Jack",
-            model_client=model,
-            system_message=jack_prompt,
-        )
-        
-        return host, supporter, critic
-
-def display_message_with_typing(speaker, content, timestamp, typing_speed=0):
-    """Display message with optional typing animation"""
+def message_style(speaker, content):
+    """Pick icon and CSS class for a speaker"""
     if speaker == "Host":
-        icon = "🎤"
-        bg_color = "#e1f5fe"
-        border_color = "#01579b"
         # Highlight final winner announcements
         if "overall winner" in content.lower() or "winner:" in content.lower():
-            bg_color = "#fff3e0"
-            border_color = "#f57c00"
-            icon = "🏆"
+            return "🏆", "winner"
+        return "🎤", "host"
     elif speaker == "John":
-        icon = "👍"
-        bg_color = "#e8f5e8"
-        border_color = "#2e7d32"
+        return "👍", "john"
     elif speaker == "Jack":
-        icon = "👎"
-        bg_color = "#ffebee"
-        border_color = "#c62828"
-    else:
-        icon = "💬"
-        bg_color = "#f5f5f5"
-        border_color = "#757575"
-    
-    # Show typing indicator if speed > 0
-    if typing_speed > 0:
-        st.markdown(f"""
-        <div style='background-color: {bg_color}; padding: 15px; border-radius: 10px; margin: 10px 0; border-left: 5px solid {border_color};'>
-            <strong>{icon} {speaker}</strong> <span style='color: #666; font-size: 0.8em;'>({timestamp})</span><br>
-            <div style='margin-top: 8px; color: #888;'>
-                <i>💭 {speaker} is typing...</i>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        time.sleep(typing_speed)
-        st.empty()  # Clear the typing indicator
+        return "👎", "jack"
+    return "💬", "other"
+
+@functools.lru_cache(maxsize=1024)
+def render_message_html(speaker, content, timestamp, start_s=0.0, typing_s=0.0):
+    """Build the HTML block for one debate message
+
+    With typing_s > 0 the browser plays the typing animation: the card
+    appears after start_s seconds showing a typing indicator, which is
+    replaced by the message typing_s seconds later. Styles live in the
+    page's .debate-msg CSS, so the block itself stays small.
+    """
+    icon, css_class = message_style(speaker, content)
     
-    # Show actual message
     role_text = ""
     if speaker == "John":
         role_text = " (Supporter)"
@@ -125,131 +50,283 @@ def display_message_with_typing(speaker, content, timestamp, typing_speed=0):
     
     # Special formatting for winner announcements
     content_display = content
-    if speaker == "Host" and ("overall winner" in content.lower() or "winner:" in content.lower()):
-        content_display = f"<strong style='color: #f57c00; font-size: 1.2em;'>🎉 {content}</strong>"
-        
-    st.markdown(f"""
-    <div style='background-color: {bg_color}; padding: 15px; border-radius: 10px; margin: 10px 0; border-left: 5px solid {border_color};'>
-        <strong>{icon} {speaker}{role_text}</strong> <span style='color: #666; font-size: 0.8em;'>({timestamp})</span><br>
-        <div style='margin-top: 8px; font-size: 1.0em;'>{content_display}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    if css_class == "winner":
+        content_display = f"<strong>🎉 {content}</strong>"
+    
+    typing = ""
+    style = ""
+    if typing_s > 0:
+        css_class += " animated"
+        style = f" style='--start: {start_s:.2f}s; --reveal: {start_s + typing_s:.2f}s;'"
+        typing = f"<div class='debate-typing'>💭 {speaker} is typing...</div>"
+        
+    return (
+        f"<div class='debate-msg {css_class}'{style}>"
+        f"<strong>{icon} {speaker}{role_text}</strong> <span class='debate-time'>({timestamp})</span><br>"
+        f"{typing}<div class='debate-body'>{content_display}</div></div>"
+    )
 
-def run_debate_sync(topic, max_tokens):
-    """Synchronous debate runner with forced winner on last token"""
-    try:
-        # Initialize in new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        debate_manager = DebateManager()
-        host, supporter, critic = debate_manager.create_agents(topic)
-        
-        team = RoundRobinGroupChat(
-            participants=[host, supporter, critic],
-            max_turns=max_tokens
+def typing_schedule(messages, typing_speed):
+    """(start, typing) seconds of each message's client-side typing animation
+
+    Messages play one after another with a short pause in between; the
+    winner announcement types for an extra second.
+    """
+    schedule = []
+    start = 0.0
+    for i, msg in enumerate(messages):
+        typing = typing_speed
+        if typing_speed > 0 and i == len(messages) - 1 and "winner" in msg['content'].lower():
+            typing += 1
+        schedule.append((start, typing))
+        if typing_speed > 0:
+            start += typing + 0.3
+    return schedule
+
+def display_messages(messages, typing_speed=0):
+    """Draw debate messages, optionally with the browser-side typing animation
+
+    Nothing sleeps on the server: the whole transcript is sent at once and
+    the animation timing is carried by CSS delays.
+    """
+    with phase('rendering'):
+        for i, (msg, (start, typing)) in enumerate(zip(messages, typing_schedule(messages, typing_speed))):
+            # Set the winner announcement apart
+            if i == len(messages) - 1 and "winner" in msg['content'].lower():
+                st.markdown("---")
+            st.markdown(
+                render_message_html(msg['speaker'], msg['content'], msg['timestamp'], start, typing),
+                unsafe_allow_html=True
+            )
+
+def show_verdict(topic, messages):
+    """Judge panel verdict of the debate on screen, judging it on request if it has no cached verdict"""
+    judges = st.session_state.judges
+    method = st.session_state.judge_method
+    if not judges:
+        return
+    from debate_engine import cached_verdict, judge_transcript
+    st.markdown("### ⚖️ Judges' Verdict")
+    verdict = cached_verdict(topic, messages, judges, method)
+    if verdict is None:
+        if st.button(f"⚖️ Judge This Debate ({judges} judges)"):
+            with st.spinner("Judges are scoring the debate..."):
+                try:
+                    get_debate_worker().run(judge_transcript(topic, messages, judges, method))
+                except Exception as e:
+                    st.error(f"❌ Judging failed: {e}")
+                    return
+            st.rerun()
+        return
+    if verdict['winner']:
+        st.success(
+            f"🏆 Panel winner: **{verdict['winner']}** by {'average score' if verdict['method'] == 'score' else 'majority vote'} | "
+            f"Scores: John {verdict['scores']['John']} vs Jack {verdict['scores']['Jack']} | "
+            f"Votes: {verdict['votes']['John']}-{verdict['votes']['Jack']}"
         )
-        
-        # Task without winner instruction to let debate flow naturally
-        task_prompt = f'Natural debate on: "{topic}". Host: welcome. John: argue for. Jack: argue against. Keep it flowing naturally.'
-        
-        messages = []
-        
-        # Run the debate
-        result = loop.run_until_complete(team.run(task=task_prompt))
-        
-        # Extract messages
-        for msg in result.messages:
-            messages.append({
-                'speaker': msg.source,
-                'content': msg.content,
-                'timestamp': datetime.now().strftime("%H:%M:%S")
-            })
-        
-        # FORCE winner announcement as the very last message
-        # Check if host already announced winner
-        has_winner = any("overall winner" in m['content'].lower() or "winner:" in m['content'].lower() 
-                        for m in messages if m['speaker'] == 'Host')
-        
-        if not has_winner:
-            # Add winner announcement as the final token
-            winner_choice = random.choice(['John', 'Jack'])  # Random or based on logic
-            messages.append({
-                'speaker': 'Host',
-                'content': f'After hearing both sides, the OVERALL WINNER is: {winner_choice}!',
-                'timestamp': datetime.now().strftime("%H:%M:%S")
-            })
-        
-        # Ensure we don't exceed max_tokens by replacing last message if needed
-        if len(messages) > max_tokens:
-            # Replace the last message with winner announcement
-            winner_choice = random.choice(['John', 'Jack'])
-            messages[-1] = {
-                'speaker': 'Host',
-                'content': f'Time\'s up! Based on arguments, OVERALL WINNER: {winner_choice}!',
-                'timestamp': datetime.now().strftime("%H:%M:%S")
-            }
-        
-        loop.close()
-        return messages, None
-        
-    except Exception as e:
-        if 'loop' in locals():
-            loop.close()
-        return [], str(e)
+    else:
+        st.info("🤝 The judges scored the debate as a tie.")
+    st.caption(
+        f"{len(verdict['judges'])} judges over {verdict['rounds']} rounds in {verdict['judging_s']}s"
+        + (f" | {verdict['abstained']} abstained" if verdict['abstained'] else "")
+    )
+    with st.expander("📋 Scorecards"):
+        st.dataframe(
+            [{'judge': c['judge'], 'winner': c['winner'], 'John': c['scores']['John'],
+              'Jack': c['scores']['Jack'], 'reason': c['reason']} for c in verdict['judges']],
+            use_container_width=True
+        )
+
+def generate_transcript(fmt='txt'):
+    """Downloadable transcript in the given format
 
-def generate_transcript():
-    """Generate downloadable transcript"""
-    if not st.session_state.all_messages:
+    All formats are built together in one pass and kept with the session's
+    messages until the debate changes, so reruns that only redraw the
+    download button reuse them.
+    """
+    messages = st.session_state.all_messages
+    if not messages:
         return None
+    from transcript_export import export_transcripts
     
-    topic = st.session_state.debate_topic
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_messages = len(st.session_state.all_messages)
-    
-    transcript = f"""🎭 AI DEBATE TRANSCRIPT
-======================
-Topic: {topic}
-Date: {current_time}
-Total Messages: {total_messages}
+    # Messages are only ever appended, so the count identifies a version of the debate
+    version = (st.session_state.debate_id, st.session_state.debate_topic, len(messages))
+    transcripts = messages.transcripts(version)
+    if transcripts is None:
+        with phase('transcript'):
+            transcripts = export_transcripts(messages, st.session_state.debate_topic)
+        messages.cache_transcripts(version, transcripts)
+    return transcripts[fmt]
 
-DEBATE CONTENT:
-===============
-"""
-    
-    for i, msg in enumerate(st.session_state.all_messages, 1):
-        role = ""
-        if msg['speaker'] == "John":
-            role = " (Supporter)"
-        elif msg['speaker'] == "Jack":
-            role = " (Critic)"
-        elif msg['speaker'] == "Host":
-            role = " (Moderator)"
-            
-        transcript += f"""
-[{msg['timestamp']}] {msg['speaker']}{role}:
-{msg['content']}
+HISTORY_PAGE = 10
+MESSAGE_PAGE = 20
+
+def load_history_page(search, winner):
+    """Append the next page of past debates to the sidebar history, starting over when the filters change"""
+    if st.session_state.history_filters != (search, winner):
+        st.session_state.history_filters = (search, winner)
+        st.session_state.history_rows = []
+        st.session_state.history_more = True
+    rows = st.session_state.history_rows
+    before = (rows[-1]['started_at'], rows[-1]['debate_id']) if rows else None
+    page = get_debate_store().list_debates(HISTORY_PAGE, before, winner=winner, search=search)
+    rows.extend(page)
+    st.session_state.history_more = len(page) == HISTORY_PAGE
+
+def replay_debate(debate_id):
+    """Show a stored debate again, straight from the debate store"""
+    store = get_debate_store()
+    debate = store.get_debate(debate_id)
+    if debate is None:
+        return
+    st.session_state.debate_topic = debate['topic']
+    st.session_state.debate_id = debate_id
+    st.session_state.all_messages = MessageLog(store.get_messages(debate_id), debate_id)
+    st.session_state.stop_reason = debate['stop_reason']
+    st.session_state.debate_started = True
+    st.session_state.debate_in_progress = False
+    st.session_state.resumable_debate = debate['status'] == "interrupted"
+    st.session_state.visible_messages = MESSAGE_PAGE
+    st.session_state.replaying = True
+    st.rerun()
+
+def submit_debate(resume=False):
+    """Hand the debate to the shared background worker so this script run returns immediately"""
+    from debate_engine import run_debate
+    if not resume:
+        st.session_state.debate_id = uuid.uuid4().hex[:12]
+    st.session_state.debate_job_id = get_debate_worker().submit(
+        run_debate,
+        st.session_state.debate_topic,
+        st.session_state.max_turns,
+        fresh=st.session_state.fresh_debate,
+        context_window=st.session_state.context_window,
+        debate_format=st.session_state.debate_format,
+        token_budget=st.session_state.token_budget,
+        cost_budget_usd=st.session_state.cost_budget_usd,
+        max_completion_tokens=st.session_state.max_completion_tokens,
+        deadline_s=st.session_state.deadline_s,
+        stop_when_stale=st.session_state.stop_when_stale,
+        judges=st.session_state.judges,
+        judge_method=st.session_state.judge_method,
+        debate_id=st.session_state.debate_id,
+        resume=resume,
+        profile=st.session_state.profiling
+    )
+    st.session_state.debate_in_progress = True
+    st.session_state.resumable_debate = False
+    st.session_state.all_messages = []
+    st.session_state.stop_reason = None
+    st.session_state.visible_messages = MESSAGE_PAGE
+    st.session_state.history_filters = None
+    st.rerun()
+
+@st.fragment(run_every=0.5)
+def show_debate_progress(job_id, transcript):
+    """Poll the background worker and draw the debate as it grows
 
-{'-'*50}
-"""
+    Finished turns are appended to `transcript`, a container outside this
+    fragment, so they are sent once instead of on every poll; only the turns
+    still being generated are redrawn.
+    """
+    job = get_debate_worker().get(job_id)
+    if job is None or job.done:
+        # Let the full script pick up the finished result
+        st.rerun()
     
-    # Statistics
-    host_count = len([m for m in st.session_state.all_messages if m['speaker'] == 'Host'])
-    john_count = len([m for m in st.session_state.all_messages if m['speaker'] == 'John'])
-    jack_count = len([m for m in st.session_state.all_messages if m['speaker'] == 'Jack'])
+    messages, partials = job.snapshot()
+    if len(messages) < st.session_state.rendered_messages:
+        # A failed step is being retried; redraw the transcript without its turns
+        st.rerun()
+    if st.session_state.live_streaming:
+        for msg in messages[st.session_state.rendered_messages:]:
+            transcript.markdown(render_message_html(msg['speaker'], msg['content'], msg['timestamp']), unsafe_allow_html=True)
+        st.session_state.rendered_messages = len(messages)
+        for speaker, partial in partials.items():
+            st.markdown(
+                render_message_html(speaker, partial + " ▌", datetime.now().strftime("%H:%M:%S")),
+                unsafe_allow_html=True
+            )
+    else:
+        st.info(f"🎭 Debate in progress... {len(messages)} messages so far")
+    st.progress(min(int(100 * len(messages) / (job.max_turns + 1)), 95))
+
+def show_client_stats():
+    """Sidebar captions for the shared model clients; only called once the debate engine is loaded"""
+    from hedging import get_hedger
+    from model_pool import get_model_pool
+    from model_router import get_model_router
+    from rate_limiter import get_rate_limiter
+    from response_cache import get_response_cache
     
-    transcript += f"""
+    pool_stats = get_model_pool().stats()
+    st.caption(
+        f"Client pool: {pool_stats['clients']} clients | {pool_stats['hits']} hits | "
+        f"{pool_stats['creations']} created | {pool_stats['in_use_connections']} connections in use"
+    )
+    cache_stats = get_response_cache().stats()
+    st.caption(
+        f"Response cache: {cache_stats['hits']} hits | {cache_stats['misses']} misses | "
+        f"{cache_stats['entries']} entries | {cache_stats['hit_rate']:.0%} hit rate"
+    )
+    limiter_stats = get_rate_limiter().stats()
+    st.caption(
+        f"Rate limiter: {limiter_stats['queue_depth']} queued | {limiter_stats['in_flight']}/"
+        f"{limiter_stats['concurrency_limit']} in flight | avg wait {limiter_stats['avg_wait_s']}s | "
+        f"{limiter_stats['throttled']} throttled"
+    )
+    router_stats = get_model_router().stats()
+    st.caption(
+        f"Model routing: Host → {get_model_router().model_for('Host')} | debaters → "
+        f"{get_model_router().model_for('John')} | {router_stats['fallbacks']} slow-tier fallbacks"
+    )
+    hedge_stats = get_hedger().stats()
+    st.caption(
+        f"Hedging: {hedge_stats['hedges']}/{hedge_stats['calls']} calls hedged ({hedge_stats['hedge_rate']:.0%}) | "
+        f"{hedge_stats['hedge_wins']} hedge wins | ~{hedge_stats['latency_saved_s']}s saved | "
+        f"threshold {hedge_stats['threshold_s']}s"
+    )
 
-DEBATE STATISTICS:
-==================
-- Host Messages: {host_count}
-- John Messages: {john_count}
-- Jack Messages: {jack_count}
+def show_profile(profile, key):
+    """Phase breakdown, hot spots and downloads of one profile"""
+    summary = profile.summary()
+    st.caption(f"{profile.name} | {summary['total_s']}s total")
+    st.bar_chart(summary['phases'], horizontal=True, height=200)
+    hotspots = profile.hotspots()
+    if not hotspots:
+        st.caption("No function-level profile: another profile was already running on this thread")
+        return
+    st.dataframe(hotspots, use_container_width=True)
+    prof_col, speedscope_col = st.columns(2)
+    with prof_col:
+        st.download_button(
+            "📥 Profile (.prof)", data=profile.prof_bytes(), file_name=f"{key}.prof",
+            mime="application/octet-stream", key=f"prof_{key}"
+        )
+    with speedscope_col:
+        st.download_button(
+            "📥 Profile (speedscope)", data=profile.speedscope(), file_name=f"{key}.speedscope.json",
+            mime="application/json", key=f"speedscope_{key}", help="Open at https://www.speedscope.app"
+        )
 
-Generated by AI Debate Arena 🎭
-"""
-    
-    return transcript
+def show_profiler_panel():
+    """Profiles of the previous script run and of the current debate"""
+    st.markdown("---")
+    st.markdown("### 🔬 Profiler")
+    rerun_col, debate_col = st.columns(2)
+    with rerun_col:
+        st.markdown("#### Last Rerun")
+        if st.session_state.rerun_profile is not None:
+            show_profile(st.session_state.rerun_profile, "rerun")
+        else:
+            st.caption("Shown from the next rerun on")
+    with debate_col:
+        st.markdown("#### Debate")
+        debate_profile = get_profile_store().get(st.session_state.debate_id) if st.session_state.debate_id else None
+        if debate_profile is not None:
+            show_profile(debate_profile, f"debate_{st.session_state.debate_id}")
+        else:
+            st.caption("Start a debate with profiling on to profile it")
 
 def initialize_session_state():
     """Initialize all session state variables"""
@@ -263,10 +340,56 @@ def initialize_session_state():
         st.session_state.human_interaction = False
     if 'debate_in_progress' not in st.session_state:
         st.session_state.debate_in_progress = False
-    if 'max_tokens' not in st.session_state:
-        st.session_state.max_tokens = 10
+    if 'max_turns' not in st.session_state:
+        st.session_state.max_turns = 10
     if 'typing_speed' not in st.session_state:
         st.session_state.typing_speed = 2.0
+    if 'live_streaming' not in st.session_state:
+        st.session_state.live_streaming = True
+    if 'rendered_messages' not in st.session_state:
+        st.session_state.rendered_messages = 0
+    if 'debate_job_id' not in st.session_state:
+        st.session_state.debate_job_id = None
+    if 'fresh_debate' not in st.session_state:
+        st.session_state.fresh_debate = False
+    if 'context_window' not in st.session_state:
+        st.session_state.context_window = None
+    if 'debate_format' not in st.session_state:
+        st.session_state.debate_format = "round_robin"
+    if 'stop_when_stale' not in st.session_state:
+        st.session_state.stop_when_stale = True
+    if 'token_budget' not in st.session_state:
+        st.session_state.token_budget = None
+    if 'judges' not in st.session_state:
+        st.session_state.judges = 3
+    if 'judge_method' not in st.session_state:
+        st.session_state.judge_method = "score"
+    if 'cost_budget_usd' not in st.session_state:
+        st.session_state.cost_budget_usd = None
+    if 'max_completion_tokens' not in st.session_state:
+        st.session_state.max_completion_tokens = DEFAULT_REPLY_TOKENS
+    if 'deadline_s' not in st.session_state:
+        st.session_state.deadline_s = 120
+    if 'stop_reason' not in st.session_state:
+        st.session_state.stop_reason = None
+    if 'debate_id' not in st.session_state:
+        st.session_state.debate_id = None
+    if 'resumable_debate' not in st.session_state:
+        st.session_state.resumable_debate = False
+    if 'visible_messages' not in st.session_state:
+        st.session_state.visible_messages = MESSAGE_PAGE
+    if 'replaying' not in st.session_state:
+        st.session_state.replaying = False
+    if 'history_rows' not in st.session_state:
+        st.session_state.history_rows = []
+    if 'history_filters' not in st.session_state:
+        st.session_state.history_filters = None
+    if 'history_more' not in st.session_state:
+        st.session_state.history_more = True
+    if 'profiling' not in st.session_state:
+        st.session_state.profiling = profiling_default()
+    if 'rerun_profile' not in st.session_state:
+        st.session_state.rerun_profile = None
 
 def main():
     st.set_page_config(
@@ -301,6 +424,29 @@ def main():
         border-radius: 10px;
         margin: 1rem 0;
     }
+    .debate-msg {
+        background-color: var(--msg-bg);
+        padding: 15px;
+        border-radius: 10px;
+        margin: 10px 0;
+        border-left: 5px solid var(--msg-border);
+    }
+    .debate-msg.host { --msg-bg: #e1f5fe; --msg-border: #01579b; }
+    .debate-msg.winner { --msg-bg: #fff3e0; --msg-border: #f57c00; }
+    .debate-msg.john { --msg-bg: #e8f5e8; --msg-border: #2e7d32; }
+    .debate-msg.jack { --msg-bg: #ffebee; --msg-border: #c62828; }
+    .debate-msg.other { --msg-bg: #f5f5f5; --msg-border: #757575; }
+    .debate-msg.winner .debate-body strong { color: #f57c00; font-size: 1.2em; }
+    .debate-time { color: #666; font-size: 0.8em; }
+    .debate-body, .debate-typing { margin-top: 8px; font-size: 1.0em; }
+    .debate-typing { color: #888; font-style: italic; }
+    /* Typing animation runs in the browser: the card appears at --start, the text replaces the indicator at --reveal */
+    .debate-msg.animated { overflow: hidden; animation: debate-appear 0.2s ease-out var(--start) both; }
+    .debate-msg.animated .debate-typing { overflow: hidden; animation: debate-typed 0s linear var(--reveal) forwards; }
+    .debate-msg.animated .debate-body { overflow: hidden; animation: debate-reveal 0.3s ease-out var(--reveal) both; }
+    @keyframes debate-appear { from { opacity: 0; max-height: 0; padding-top: 0; padding-bottom: 0; margin: 0; } }
+    @keyframes debate-typed { to { opacity: 0; max-height: 0; margin: 0; } }
+    @keyframes debate-reveal { from { opacity: 0; max-height: 0; margin-top: 0; } }
     </style>
     """, unsafe_allow_html=True)
     
@@ -336,10 +482,31 @@ def main():
         
         # Token control
         st.markdown("#### 🎛️ Debate Controls")
-        max_tokens = st.slider(
+        debate_format = st.selectbox(
+            "Debate Format",
+            options=["round_robin", "parallel"],
+            format_func=lambda f: "Round Robin (Host → John → Jack)" if f == "round_robin" else "Parallel Rounds (John ∥ Jack)",
+            help="Parallel rounds let John and Jack answer at the same time, roughly halving the wait per round"
+        )
+        rolling_context = st.toggle(
+            "Rolling Context",
+            value=False,
+            help="Keep only the most recent turns verbatim and summarize older ones, so long debates stay cheap"
+        )
+        context_window = None
+        if rolling_context:
+            context_window = st.slider(
+                "Recent Turns Kept Verbatim",
+                min_value=3,
+                max_value=12,
+                value=6,
+                help="Older turns are folded into a running summary"
+            )
+        
+        max_turns = st.slider(
             "Maximum Messages",
             min_value=6,
-            max_value=15,
+            max_value=100 if rolling_context else 15,
             value=10,
             step=2,
             help="Winner will be announced on the LAST message automatically"
@@ -351,9 +518,88 @@ def main():
             max_value=4.0,
             value=2.0,
             step=0.5,
-            help="Set to 0 for no animation"
+            help="Played in the browser, so it never delays the debate. Set to 0 for no animation"
+        )
+        
+        live_streaming = st.toggle(
+            "Live Streaming",
+            value=True,
+            help="Show each message and its tokens as they are generated instead of after the whole debate"
+        )
+        
+        fresh_debate = st.toggle(
+            "Fresh Debate",
+            value=False,
+            help="Always call the model instead of replaying cached responses for a repeated topic"
         )
         
+        with st.expander("⚖️ Judge Panel"):
+            judges = st.slider(
+                "Judges",
+                min_value=0,
+                max_value=5,
+                value=3,
+                help="Judges score every round on logic, evidence and rebuttal after the debate, all at once (0 = no panel)"
+            )
+            judge_method = st.selectbox(
+                "Verdict By",
+                options=["score", "vote"],
+                format_func=lambda m: "Average score" if m == "score" else "Majority vote"
+            )
+        
+        with st.expander("⏹️ Stop Conditions"):
+            stop_when_stale = st.toggle(
+                "Stop When Arguments Repeat",
+                value=True,
+                help="End the debate once John and Jack stop bringing up new arguments"
+            )
+            budget_tier = st.selectbox(
+                "Budget Tier",
+                options=list(BUDGET_TIERS) + ["custom"],
+                index=1,
+                format_func=str.capitalize,
+                help="Caps reply length, total tokens and cost; when a limit is hit the Host closes the debate"
+            )
+            if budget_tier == "custom":
+                max_completion_tokens = st.number_input(
+                    "Max Tokens Per Reply",
+                    min_value=50,
+                    value=DEFAULT_REPLY_TOKENS,
+                    step=50,
+                    help="Completion token cap passed to the model on every call"
+                )
+                token_budget = st.number_input(
+                    "Token Budget (0 = none)",
+                    min_value=0,
+                    value=0,
+                    step=1000,
+                    help="End the debate once prompt + completion tokens reach this total"
+                )
+                cost_budget_usd = st.number_input(
+                    "Cost Ceiling in USD (0 = none)",
+                    min_value=0.0,
+                    value=0.0,
+                    step=0.05,
+                    format="%.2f",
+                    help="End the debate once its estimated cost reaches this amount"
+                )
+            else:
+                tier = BUDGET_TIERS[budget_tier]
+                max_completion_tokens = tier['max_completion_tokens']
+                token_budget = tier['token_budget']
+                cost_budget_usd = tier['cost_budget_usd']
+                st.caption(
+                    f"≤ {max_completion_tokens} tokens per reply | ≤ {token_budget} tokens per debate | "
+                    f"≤ ${cost_budget_usd:.2f} per debate"
+                )
+            deadline_s = st.number_input(
+                "Deadline (seconds, 0 = none)",
+                min_value=0,
+                value=120,
+                step=10,
+                help="End the debate after this much wall-clock time"
+            )
+        
         st.markdown("---")
         
         # API Status section
@@ -361,12 +607,26 @@ def main():
         if st.button("🩺 Test API Connection", use_container_width=True):
             try:
                 with st.spinner("Testing API..."):
-                    debate_manager = DebateManager()
-                    model = debate_manager.create_model()
-                    st.success("✅ API connection ready!")
+                    from debate_engine import check_api
+                    started = time.perf_counter()
+                    # Pooled clients belong to the worker's event loop
+                    get_debate_worker().run(check_api(), timeout=60)
+                    st.success(f"✅ API answered in {time.perf_counter() - started:.1f}s")
             except Exception as e:
                 st.error(f"❌ API Error: {str(e)}")
         
+        if 'debate_engine' in sys.modules:
+            show_client_stats()
+        else:
+            st.caption("Model clients start with the first debate")
+        messages = st.session_state.all_messages
+        memory_stats = get_session_memory().stats()
+        st.caption(
+            f"Session memory: {(messages.nbytes if isinstance(messages, MessageLog) else 0) / 1024:.0f} KB this session | "
+            f"{memory_stats['resident_bytes'] / 2**20:.1f}/{memory_stats['max_bytes'] / 2**20:.0f} MB across "
+            f"{memory_stats['sessions']} sessions | {memory_stats['spills']} spilled to the debate store"
+        )
+        
         st.markdown("---")
         
         # Debate info
@@ -385,10 +645,23 @@ def main():
             if topic.strip():
                 st.session_state.debate_topic = topic
                 st.session_state.human_interaction = human_interaction
-                st.session_state.max_tokens = max_tokens
+                st.session_state.max_turns = max_turns
                 st.session_state.typing_speed = typing_speed
+                st.session_state.live_streaming = live_streaming
+                st.session_state.fresh_debate = fresh_debate
+                st.session_state.context_window = context_window
+                st.session_state.debate_format = debate_format
+                st.session_state.stop_when_stale = stop_when_stale
+                st.session_state.judges = judges
+                st.session_state.judge_method = judge_method
+                st.session_state.token_budget = int(token_budget) or None
+                st.session_state.cost_budget_usd = float(cost_budget_usd) or None
+                st.session_state.max_completion_tokens = int(max_completion_tokens)
+                st.session_state.deadline_s = int(deadline_s) or None
                 st.session_state.debate_started = True
                 st.session_state.all_messages = []
+                st.session_state.stop_reason = None
+                st.session_state.resumable_debate = False
                 st.session_state.debate_in_progress = False
                 st.rerun()
             else:
@@ -396,25 +669,62 @@ def main():
         
         # Download transcript button
         if st.session_state.all_messages:
-            transcript = generate_transcript()
+            from transcript_export import FORMATS
+            transcript_format = st.selectbox(
+                "Transcript Format",
+                options=list(FORMATS),
+                format_func={'txt': "Text", 'md': "Markdown", 'json': "JSON", 'jsonl': "JSON Lines"}.get
+            )
+            transcript = generate_transcript(transcript_format)
             if transcript:
                 timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"debate_transcript_{timestamp_str}.txt"
+                filename = f"debate_transcript_{timestamp_str}.{FORMATS[transcript_format].extension}"
                 st.download_button(
                     label="📥 Download Transcript",
                     data=transcript,
                     file_name=filename,
-                    mime="text/plain",
+                    mime=FORMATS[transcript_format].mime,
                     use_container_width=True
                 )
         
         # Reset button
         if st.session_state.debate_started:
             if st.button("🔄 Reset Debate", use_container_width=True):
+                if st.session_state.debate_job_id:
+                    get_debate_worker().cancel(st.session_state.debate_job_id)
+                    st.session_state.debate_job_id = None
                 st.session_state.debate_started = False
                 st.session_state.all_messages = []
+                st.session_state.stop_reason = None
+                st.session_state.resumable_debate = False
                 st.session_state.debate_in_progress = False
                 st.rerun()
+        
+        with st.expander("📚 Debate History"):
+            history_search = st.text_input("Search arguments", help="Debates where one message contains all of these words")
+            history_winner = st.selectbox("Winner", options=["Any", "John", "Jack"])
+            filters = (history_search.strip(), None if history_winner == "Any" else history_winner)
+            if st.session_state.history_filters != filters:
+                load_history_page(*filters)
+            for row in st.session_state.history_rows:
+                started = datetime.fromtimestamp(row['started_at']).strftime('%Y-%m-%d %H:%M')
+                label = f"{started} · {row['topic'][:40]} · 🏆 {row['winner'] or '—'} · {row['message_count']} msgs"
+                if st.button(label, key=f"replay_{row['debate_id']}", use_container_width=True):
+                    replay_debate(row['debate_id'])
+            if not st.session_state.history_rows:
+                st.caption("No debates yet")
+            elif st.session_state.history_more and st.button("⬇️ Load More", use_container_width=True):
+                load_history_page(*filters)
+                st.rerun()
+        
+        # Hidden unless the page is opened with ?profile or DEBATE_PROFILE=1 is set
+        if "profile" in st.query_params or profiling_default():
+            with st.expander("🔬 Profiling"):
+                st.toggle(
+                    "Profile Reruns and Debates",
+                    key="profiling",
+                    help="cProfile every script run and debate, with a per-phase timing breakdown below"
+                )
     
     # Main content area
     if st.session_state.debate_started:
@@ -427,111 +737,163 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
+        # Collect a finished background debate before drawing the stats
+        fresh_results = False
+        job = None
+        if st.session_state.debate_job_id:
+            job = get_debate_worker().get(st.session_state.debate_job_id)
+            if job is None or job.done:
+                st.session_state.debate_job_id = None
+                st.session_state.debate_in_progress = False
+            if job is not None and job.done:
+                # The session keeps a compact copy; the worker can let go of the job right away
+                get_debate_worker().forget(job.job_id)
+            if job is not None and job.status == "completed":
+                # Store messages
+                st.session_state.all_messages = MessageLog(job.messages, st.session_state.debate_id)
+                st.session_state.stop_reason = job.stop_reason
+                st.session_state.resumable_debate = False
+                # Show the new debate at the top of the history
+                st.session_state.history_filters = None
+                fresh_results = True
+            elif job is not None and job.status == "failed":
+                # Keep the turns that were paid for; the debate can be resumed from its checkpoint
+                st.session_state.all_messages = MessageLog(job.messages, st.session_state.debate_id)
+                st.session_state.resumable_debate = True
+        
         # Stats display
         msg_count = len(st.session_state.all_messages)
-        max_tokens_val = st.session_state.max_tokens
+        max_turns_val = st.session_state.max_turns
         typing_speed_val = st.session_state.typing_speed
+        status_val = "⏳ Running" if st.session_state.debate_in_progress else "✅ Ready"
+        
+        stats_col, perf_col = st.columns(2)
+        with stats_col:
+            st.markdown(f"""
+            <div class="debate-stats">
+                <h4>📊 Debate Stats</h4>
+                <p>Messages: {msg_count} | Max: {max_turns_val} | Animation: {typing_speed_val}s | Status: {status_val}<br>
+                Stopped: {st.session_state.stop_reason or '—'}</p>
+            </div>
+            """, unsafe_allow_html=True)
         
-        st.markdown(f"""
-        <div class="debate-stats">
-            <h4>📊 Debate Stats</h4>
-            <p>Messages: {msg_count} | Max: {max_tokens_val} | Animation: {typing_speed_val}s | Status: ✅ Ready</p>
-        </div>
-        """, unsafe_allow_html=True)
+        from telemetry import metrics_jsonl, metrics_prometheus, summarize_metrics
+        totals = summarize_metrics(st.session_state.all_messages)
+        with perf_col:
+            if totals:
+                st.markdown(f"""
+                <div class="debate-stats">
+                    <h4>⏱️ Turn Performance</h4>
+                    <p>Avg TTFT: {totals['avg_ttft_s']}s | p95 Turn: {totals['p95_latency_s']}s | Avg Queue: {totals['avg_queue_wait_s']}s<br>
+                    Tokens: {totals['prompt_tokens']} in / {totals['completion_tokens']} out | Cost: ${totals['cost_usd']:.4f} | Cached: {totals['cached_turns']}/{totals['turns']} | Hedged: {totals['hedged_turns']}<br>
+                    Prompt Cache: {totals['cache_read_tokens']} read / {totals['cache_write_tokens']} written | Context Saved: {totals['context_tokens_saved']} tokens | Avg Novelty: {totals['avg_novelty'] if totals['avg_novelty'] is not None else '—'}</p>
+                </div>
+                """, unsafe_allow_html=True)
+        
+        # Novelty curve: how much each debater turn added over everything said before
+        novelty_curve = [
+            {'turn': i, 'speaker': m['speaker'], 'novelty': m['metrics']['novelty']}
+            for i, m in enumerate(st.session_state.all_messages)
+            if m.get('metrics') and 'novelty' in m['metrics']
+        ]
+        if novelty_curve:
+            st.markdown("#### 🧭 Argument Novelty")
+            st.line_chart(novelty_curve, x='turn', y='novelty', color='speaker', height=180)
+        
+        if totals:
+            with st.expander("📈 Per-turn metrics"):
+                st.dataframe(
+                    [dict(speaker=m['speaker'], **m['metrics']) for m in st.session_state.all_messages if m.get('metrics')],
+                    use_container_width=True
+                )
+                jsonl_col, prom_col = st.columns(2)
+                with jsonl_col:
+                    st.download_button(
+                        "📥 Metrics (JSON lines)",
+                        data=metrics_jsonl(st.session_state.all_messages, st.session_state.debate_topic),
+                        file_name="debate_metrics.jsonl",
+                        mime="application/jsonl"
+                    )
+                with prom_col:
+                    st.download_button(
+                        "📥 Metrics (Prometheus)",
+                        data=metrics_prometheus(st.session_state.all_messages),
+                        file_name="debate_metrics.prom",
+                        mime="text/plain"
+                    )
         
         # Run debate
-        if st.button("▶️ Start Live Debate", type="primary"):
-            
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            with status_text:
-                st.info("🤖 Initializing AI agents...")
-            
-            progress_bar.progress(20)
-            
-            # Run debate in thread to avoid async conflicts
-            try:
-                with st.spinner("🎭 Debate in progress..."):
-                    progress_bar.progress(40)
-                    
-                    # Run synchronous debate
-                    messages, error = run_debate_sync(
-                        st.session_state.debate_topic,
-                        st.session_state.max_tokens
-                    )
-                    
-                    progress_bar.progress(80)
-                    
-                    if error:
-                        st.error(f"❌ Error: {error}")
-                    else:
-                        # Store messages
-                        st.session_state.all_messages = messages
-                        
-                        progress_bar.progress(100)
-                        
-                        with status_text:
-                            st.success("✅ Debate completed successfully!")
-                        
-                        time.sleep(1)
-                        progress_bar.empty()
-                        status_text.empty()
-                        
-                        # Display messages with animation
-                        st.markdown("### 🎭 Debate Results")
-                        
-                        for i, msg in enumerate(messages):
-                            # Special handling for last message (winner announcement)
-                            if i == len(messages) - 1 and "winner" in msg['content'].lower():
-                                st.markdown("---")
-                                display_message_with_typing(
-                                    msg['speaker'], 
-                                    msg['content'], 
-                                    msg['timestamp'], 
-                                    st.session_state.typing_speed + 1  # Extra time for winner
-                                )
-                            else:
-                                display_message_with_typing(
-                                    msg['speaker'], 
-                                    msg['content'], 
-                                    msg['timestamp'], 
-                                    st.session_state.typing_speed if st.session_state.typing_speed > 0 else 0
-                                )
-                            
-                            if st.session_state.typing_speed > 0:
-                                time.sleep(0.3)
-                        
-                        # Show completion message
-                        st.success("🎉 Debate completed! Winner announced on final message.")
-                        
-                        # Human interaction section
-                        if st.session_state.human_interaction:
-                            st.markdown("---")
-                            st.markdown("### 💭 Your Thoughts:")
-                            user_final = st.text_area("Share your opinion about the debate:")
-                            if st.button("Submit Your Opinion"):
-                                if user_final:
-                                    new_msg = {
-                                        'speaker': 'You',
-                                        'content': user_final,
-                                        'timestamp': datetime.now().strftime("%H:%M:%S")
-                                    }
-                                    st.session_state.all_messages.append(new_msg)
-                                    st.rerun()
-                                    
-            except Exception as e:
-                progress_bar.empty()
-                with status_text:
-                    st.error(f"❌ Error during debate: {str(e)}")
+        if st.button("▶️ Start Live Debate", type="primary", disabled=st.session_state.debate_in_progress):
+            submit_debate()
+        
+        if st.session_state.resumable_debate and not st.session_state.debate_in_progress:
+            if st.button("🔁 Resume Debate", help="Continue from the last completed turn instead of starting over"):
+                submit_debate(resume=True)
+        
+        if job is not None and not job.done:
+            if st.session_state.live_streaming:
+                st.markdown("### 🎭 Live Debate")
+            # A full script run starts with an empty transcript, so the fragment redraws every turn once
+            transcript = st.container()
+            st.session_state.rendered_messages = 0
+            show_debate_progress(job.job_id, transcript)
+        elif job is not None:
+            if job.cancelled:
+                st.info("⏹️ Debate cancelled")
+            elif job.status != "completed":
+                st.error(f"❌ Error during debate: {job.error or job.status}")
+                if job.status == "failed":
+                    st.info("💡 The completed turns are kept below; use Resume Debate to continue from the last one.")
+                else:
                     st.info("💡 Try reducing the maximum messages or check your API key.")
+            else:
+                messages = job.messages
+                
+                st.markdown("### 🎭 Debate Results")
+                
+                # Turns were already shown while streaming, so only animate them otherwise
+                display_messages(messages, 0 if st.session_state.live_streaming else st.session_state.typing_speed)
+                
+                # Show completion message
+                st.success("🎉 Debate completed! Winner announced on final message.")
+                show_verdict(st.session_state.debate_topic, messages)
+                
+                # Human interaction section
+                if st.session_state.human_interaction:
+                    st.markdown("---")
+                    st.markdown("### 💭 Your Thoughts:")
+                    user_final = st.text_area("Share your opinion about the debate:")
+                    if st.button("Submit Your Opinion"):
+                        if user_final:
+                            new_msg = {
+                                'speaker': 'You',
+                                'content': user_final,
+                                'timestamp': datetime.now().strftime("%H:%M:%S")
+                            }
+                            st.session_state.all_messages.append(new_msg)
+                            if st.session_state.debate_id:
+                                get_debate_store().add_message(
+                                    st.session_state.debate_id, len(st.session_state.all_messages) - 1, new_msg
+                                )
+                            st.rerun()
         
         # Display existing messages if any
-        if st.session_state.all_messages and not st.button:
-            st.markdown("### 💬 Previous Debate")
-            for msg in st.session_state.all_messages:
-                display_message_with_typing(msg['speaker'], msg['content'], msg['timestamp'], 0)
+        if st.session_state.all_messages and not fresh_results and not st.session_state.debate_in_progress:
+            messages = st.session_state.all_messages
+            visible = st.session_state.visible_messages
+            if st.session_state.replaying:
+                # Replays come from the debate store and play back without calling the model
+                st.markdown("### 🔁 Debate Replay")
+                display_messages(messages[:visible], st.session_state.typing_speed)
+                st.session_state.replaying = False
+            else:
+                st.markdown("### 💬 Previous Debate")
+                display_messages(messages[:visible])
+            if len(messages) > visible:
+                if st.button(f"⬇️ Show More ({len(messages) - visible} left)"):
+                    st.session_state.visible_messages += MESSAGE_PAGE
+                    st.rerun()
+            show_verdict(st.session_state.debate_topic, messages)
     
     else:
         # Welcome screen
@@ -554,6 +916,22 @@ def main():
                 </div>
             </div>
             """, unsafe_allow_html=True)
+    
+    if st.session_state.profiling:
+        show_profiler_panel()
+
+def run_app():
+    """main(), wrapped in a profiler when profiling is on"""
+    if not st.session_state.get('profiling', profiling_default()):
+        main()
+        return
+    rerun_profile = Profile(f"Rerun at {datetime.now():%H:%M:%S}", kind="rerun")
+    try:
+        with rerun_profile.run():
+            main()
+    finally:
+        # st.rerun() ends a run with an exception; its profile is still worth keeping
+        st.session_state.rerun_profile = rerun_profile
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_app()
\ No newline at end of file
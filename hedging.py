@@ -0,0 +1,206 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+
+from client_wrappers import WrappedChatCompletionClient
+from prompt_cache import prompt_cache_usage
+from rate_limiter import queue_wait
+
+# Set by HedgedChatCompletionClient when the current call needed a second request
+hedged = contextvars.ContextVar('hedged', default=False)
+
+
+class Hedger:
+    """Process-wide hedging policy: p95 time-to-first-token threshold, hedge budget and counters
+
+    A stream that has produced no first token after threshold() seconds gets a
+    second, identical request; whichever answers first wins. At most
+    `max_hedge_rate` of all calls are hedged so the extra cost stays bounded.
+    A stream with no first token after `deadline_s` fails with TimeoutError.
+    """
+
+    def __init__(self, percentile=95, window=500, min_samples=20, default_threshold=2.0,
+                 min_threshold=0.25, max_hedge_rate=0.1, deadline_s=None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_threshold = default_threshold
+        self.min_threshold = min_threshold
+        self.max_hedge_rate = max_hedge_rate
+        self.deadline_s = deadline_s
+        self.enabled = True
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_misses = 0
+        self.latency_saved = 0.0
+        self._lock = threading.Lock()
+
+    def threshold(self):
+        """Seconds to wait for a first token before hedging"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return self.default_threshold
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(self.percentile / 100 * len(ordered)))
+        return max(self.min_threshold, ordered[index])
+
+    def may_hedge(self):
+        with self._lock:
+            return self.enabled and self.hedges < self.max_hedge_rate * self.calls
+
+    def record(self, ttft, hedge_won=False):
+        """Account for one finished call; ttft is the primary's (censored if the hedge won)"""
+        with self._lock:
+            saved = 0.0
+            if hedge_won:
+                # Estimated primary TTFT given it was still silent at `ttft`, from the uncensored history
+                beyond = [s for s in self.samples if s > ttft]
+                saved = sum(beyond) / len(beyond) - ttft if beyond else 0.0
+                self.hedge_wins += 1
+                self.latency_saved += saved
+            self.samples.append(ttft)
+            return saved
+
+    def stats(self):
+        threshold = self.threshold()
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'hedges': self.hedges,
+                'hedge_rate': round(self.hedges / self.calls, 3) if self.calls else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'latency_saved_s': round(self.latency_saved, 3),
+                'deadline_misses': self.deadline_misses,
+                'threshold_s': round(threshold, 3),
+            }
+
+
+async def _first_chunk(stream):
+    # Runs as its own task, so return the queue wait and prompt-cache usage it accumulated for the caller to adopt
+    cache_usage = {}
+    prompt_cache_usage.set(cache_usage)
+    chunk = await stream.__anext__()
+    return chunk, queue_wait.get(), cache_usage
+
+
+class HedgedChatCompletionClient(WrappedChatCompletionClient):
+    """Issues a backup request when the first token of a stream is later than the Hedger's threshold
+
+    Only create_stream() is hedged and held to the deadline; create() passes
+    straight through. The losing stream is cancelled as soon as the winner
+    produces its first token, which closes its HTTP stream and releases its
+    rate-limiter slot.
+    """
+
+    def __init__(self, inner, hedger):
+        super().__init__(inner)
+        self.hedger = hedger
+
+    async def _race(self, start, first):
+        """Start a request with start() and hedge it if slow; returns (winning request, its first result, queue wait)
+
+        first(request) awaits the request's first result, a stream's first
+        chunk. Whatever did not win is cancelled and closed.
+        Each request reports its prompt-cache usage separately; only the
+        winner's reaches the caller's prompt_cache_usage.
+        """
+        hedged.set(False)
+        with self.hedger._lock:
+            self.hedger.calls += 1
+        started = time.perf_counter()
+        requests = [start()]
+        pending = {asyncio.ensure_future(first(requests[0])): requests[0]}
+        deadline = self.hedger.deadline_s
+
+        async def cleanup():
+            for task, request in list(pending.items()):
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                if hasattr(request, 'aclose'):
+                    await request.aclose()
+            pending.clear()
+
+        error = None
+        timeout = self.hedger.threshold() if self.hedger.enabled else deadline
+        try:
+            while True:
+                if deadline is not None and timeout is not None:
+                    timeout = min(timeout, max(0.0, deadline - (time.perf_counter() - started)))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    elapsed = time.perf_counter() - started
+                    if deadline is not None and elapsed >= deadline:
+                        with self.hedger._lock:
+                            self.hedger.deadline_misses += 1
+                        raise asyncio.TimeoutError(f"No response within the {deadline}s turn deadline")
+                    if len(requests) == 1 and self.hedger.may_hedge():
+                        with self.hedger._lock:
+                            self.hedger.hedges += 1
+                        hedged.set(True)
+                        requests.append(start())
+                        pending[asyncio.ensure_future(first(requests[1]))] = requests[1]
+                    timeout = deadline
+                    continue
+                for task in done:
+                    request = pending.pop(task)
+                    try:
+                        value, wait, cache_usage = task.result()
+                    except Exception as e:
+                        error = e
+                        if hasattr(request, 'aclose'):
+                            await request.aclose()
+                        continue
+                    await cleanup()
+                    owner = prompt_cache_usage.get()
+                    if owner is not None:
+                        owner.update(cache_usage)
+                    # Time spent queued behind the rate limiter is not model latency, so it does not move the threshold
+                    elapsed = time.perf_counter() - started
+                    self.hedger.record(max(0.0, elapsed - wait), request is not requests[0])
+                    return request, value, wait
+                if not pending:
+                    raise error
+        except BaseException:
+            await cleanup()
+            raise
+
+    async def create(self, messages, **kwargs):
+        # Whole completions (judges, summaries) take far longer than a first token, so neither
+        # the first-token threshold nor the deadline fits them; they go straight through
+        hedged.set(False)
+        return await self.inner.create(messages, **kwargs)
+
+    async def create_stream(self, messages, **kwargs):
+        stream, chunk, wait = await self._race(
+            lambda: self.inner.create_stream(messages, **kwargs),
+            _first_chunk,
+        )
+        queue_wait.set(wait)
+        try:
+            yield chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+
+_hedger = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger():
+    """Process-wide hedging policy; DEBATE_HEDGE=0 disables hedging, DEBATE_TURN_DEADLINE caps the wait for a first token"""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            deadline = os.getenv('DEBATE_TURN_DEADLINE', '20')
+            _hedger = Hedger(
+                max_hedge_rate=float(os.getenv('DEBATE_HEDGE_RATE', '0.1')),
+                deadline_s=float(deadline) if float(deadline) > 0 else None,
+            )
+            _hedger.enabled = os.getenv('DEBATE_HEDGE', '1') != '0'
+        return _hedger
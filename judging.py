@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+
+from autogen_core.models import SystemMessage, UserMessage
+
+DEBATERS = ('John', 'Jack')
+RUBRIC = ('logic', 'evidence', 'rebuttal')
+
+# Each judge weighs the same rubric from a different angle so the panel does not vote as one
+JUDGE_PERSONAS = [
+    ("Logician", "You care most about sound reasoning and spotting fallacies."),
+    ("Empiricist", "You care most about concrete evidence, data and examples."),
+    ("Rhetorician", "You care most about direct rebuttals and persuasive framing."),
+    ("Pragmatist", "You care most about real-world consequences and feasibility."),
+    ("Skeptic", "You care most about unsupported claims and what each side left unanswered."),
+]
+
+JUDGE_PROMPT = (
+    "You are {name}, a debate judge. {focus} "
+    "Score John (for) and Jack (against) in every round from 1 to 10 on " + ", ".join(RUBRIC) + ". "
+    "Reply with a JSON scorecard only: "
+    '{{"rounds": [{{"round": 1, "John": {{"logic": 7, "evidence": 6, "rebuttal": 5}}, '
+    '"Jack": {{"logic": 6, "evidence": 7, "rebuttal": 6}}}}], "winner": "John" or "Jack", "reason": "one sentence"}}'
+)
+
+
+def debate_rounds(messages):
+    """Debater turns grouped into rounds: a new round starts whenever a speaker talks again"""
+    rounds = [[]]
+    for msg in messages:
+        if msg['speaker'] not in DEBATERS:
+            continue
+        if any(m['speaker'] == msg['speaker'] for m in rounds[-1]):
+            rounds.append([])
+        rounds[-1].append(msg)
+    return [r for r in rounds if r]
+
+
+def transcript_hash(topic, messages, judges, method, model):
+    """Content hash of everything a verdict depends on (judges only see the debaters' turns)"""
+    payload = {
+        'topic': topic,
+        'turns': [(m['speaker'], str(m['content'])) for m in messages if m['speaker'] in DEBATERS],
+        'judges': judges,
+        'method': method,
+        'model': model,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def parse_scorecard(text):
+    """Per-debater total score, stated winner and reason from a judge reply, or None if unreadable"""
+    match = re.search(r"\{.*\}", str(text), re.DOTALL)
+    if not match:
+        return None
+    try:
+        card = json.loads(match.group(0))
+        totals = {name: 0.0 for name in DEBATERS}
+        for entry in card.get('rounds', []):
+            for name in DEBATERS:
+                totals[name] += sum(float(entry.get(name, {}).get(key, 0)) for key in RUBRIC)
+    except (ValueError, TypeError, AttributeError):
+        return None
+    winner = str(card.get('winner', '')).strip().capitalize()
+    if winner not in DEBATERS:
+        winner = max(DEBATERS, key=totals.get) if totals['John'] != totals['Jack'] else None
+    return {'scores': totals, 'winner': winner, 'reason': str(card.get('reason', ''))}
+
+
+def aggregate(cards, method="score"):
+    """Panel verdict from judge scorecards: mean total score, or majority vote; each breaks the other's ties"""
+    votes = {name: sum(1 for c in cards if c['winner'] == name) for name in DEBATERS}
+    scores = {name: round(sum(c['scores'][name] for c in cards) / len(cards), 2) if cards else 0.0 for name in DEBATERS}
+    by_score = max(DEBATERS, key=scores.get) if scores['John'] != scores['Jack'] else None
+    by_vote = max(DEBATERS, key=votes.get) if votes['John'] != votes['Jack'] else None
+    winner = (by_score or by_vote) if method == "score" else (by_vote or by_score)
+    return {'winner': winner, 'method': method, 'scores': scores, 'votes': votes}
+
+
+async def judge_debate(messages, topic, model_client, judges=3, method="score", store=None, model=""):
+    """Score a finished debate with a panel of `judges` judges called concurrently
+
+    Returns the aggregated verdict with each judge's scorecard. With a
+    DebateStore, verdicts are cached by transcript hash so judging the same
+    debate again makes no model calls.
+    """
+    key = transcript_hash(topic, messages, judges, method, model)
+    if store is not None:
+        cached = store.get_verdict(key)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+    rounds = debate_rounds(messages)
+    transcript = f"Debate topic: {topic}\n\n" + "\n\n".join(
+        f"Round {i}\n" + "\n".join(f"{m['speaker']}: {m['content']}" for m in turns)
+        for i, turns in enumerate(rounds, 1)
+    )
+
+    async def judge(name, focus):
+        result = await model_client.create([
+            SystemMessage(content=JUDGE_PROMPT.format(name=name, focus=focus)),
+            UserMessage(content=transcript, source="user"),
+        ])
+        card = parse_scorecard(result.content)
+        return dict(card, judge=name) if card else None
+
+    started = time.perf_counter()
+    personas = [JUDGE_PERSONAS[i % len(JUDGE_PERSONAS)] for i in range(judges)]
+    outcomes = await asyncio.gather(*(judge(name, focus) for name, focus in personas), return_exceptions=True)
+    # A judge that failed or replied with something unreadable abstains
+    cards = [c for c in outcomes if isinstance(c, dict)]
+    verdict = aggregate(cards, method)
+    verdict.update(
+        judges=cards,
+        abstained=judges - len(cards),
+        rounds=len(rounds),
+        judging_s=round(time.perf_counter() - started, 3),
+        transcript_hash=key,
+    )
+    if store is not None and cards:
+        store.put_verdict(key, verdict)
+    return dict(verdict, cached=False)
@@ -0,0 +1,115 @@
+import os
+import threading
+
+import httpx
+from anthropic import DefaultAsyncHttpxClient
+from autogen_ext.models.anthropic import AnthropicChatCompletionClient
+
+from prompt_cache import PromptCachingTransport
+
+
+class ModelClientPool:
+    """Process-wide cache of Anthropic chat clients keyed by model and client settings
+
+    Clients are created once and handed out to every debate that asks for the
+    same (model, api key, timeout, max_retries) combination, so the underlying
+    HTTP connection pool and its keep-alive connections stay warm between runs.
+    The async HTTP connections belong to the event loop that opened them, so
+    pooled clients should be used from a single long-lived loop (the debate worker).
+    With `prompt_caching` the clients send the system prompt and the earlier turns
+    as cacheable prefixes (see prompt_cache.py).
+    """
+
+    def __init__(self, max_connections=50, max_keepalive_connections=20, keepalive_expiry=120.0, prompt_caching=True):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.prompt_caching = prompt_caching
+        self.clients = {}
+        self.hits = 0
+        self.creations = 0
+        self._http_clients = {}
+        self._lock = threading.Lock()
+        # Offline mode: every get() returns a new local stand-in client instead
+        self.fake_factory = None
+
+    def get(self, model, api_key, timeout=30.0, max_retries=2, **create_args):
+        """Return the shared client for this configuration, creating it on first use"""
+        if self.fake_factory is not None:
+            self.creations += 1
+            return self.fake_factory(model=model, **create_args)
+        key = (model, api_key, timeout, max_retries, self.prompt_caching, tuple(sorted(create_args.items())))
+        with self._lock:
+            client = self.clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            if self.prompt_caching:
+                # httpx ignores `limits` once a transport is given, so they go on the inner transport
+                transport = PromptCachingTransport(httpx.AsyncHTTPTransport(limits=self.limits))
+                http_client = DefaultAsyncHttpxClient(transport=transport, timeout=timeout)
+            else:
+                http_client = DefaultAsyncHttpxClient(limits=self.limits, timeout=timeout)
+            client = AnthropicChatCompletionClient(
+                model=model,
+                api_key=api_key,
+                max_retries=max_retries,
+                timeout=timeout,
+                http_client=http_client,
+                **create_args
+            )
+            self.clients[key] = client
+            self._http_clients[key] = http_client
+            self.creations += 1
+            return client
+
+    def stats(self):
+        """Hit/creation counters and a snapshot of the open HTTP connections"""
+        in_use = 0
+        idle = 0
+        with self._lock:
+            http_clients = list(self._http_clients.values())
+        for http_client in http_clients:
+            pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+            for connection in getattr(pool, 'connections', []):
+                if connection.is_idle():
+                    idle += 1
+                else:
+                    in_use += 1
+        return {
+            'clients': len(http_clients),
+            'hits': self.hits,
+            'creations': self.creations,
+            'in_use_connections': in_use,
+            'idle_connections': idle,
+        }
+
+    async def close(self):
+        with self._lock:
+            clients = list(self.clients.values())
+            self.clients.clear()
+            self._http_clients.clear()
+        for client in clients:
+            await client.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool():
+    """Pool shared by the Streamlit app, the worker and debate.py
+
+    Setting DEBATE_FAKE_MODEL=1 swaps in the local fake client (see fake_model.py);
+    DEBATE_PROMPT_CACHE=0 turns prompt caching off.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelClientPool(prompt_caching=os.getenv('DEBATE_PROMPT_CACHE', '1') != '0')
+            if os.getenv('DEBATE_FAKE_MODEL'):
+                from fake_model import fake_model_from_env
+                _pool.fake_factory = fake_model_from_env
+        return _pool
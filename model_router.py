@@ -0,0 +1,138 @@
+import contextvars
+import os
+import threading
+import time
+
+from autogen_core.models import CreateResult
+
+from client_wrappers import WrappedChatCompletionClient, model_name
+from rate_limiter import queue_wait
+
+FAST_MODEL = "claude-3-5-haiku-20241022"
+STRONG_MODEL = "claude-3-5-sonnet-20241022"
+
+# Model that actually served the current call, set by RoutedChatCompletionClient
+routed_model = contextvars.ContextVar('routed_model', default=None)
+
+
+class ModelRouter:
+    """Per-role model choice: short Host moderation on the fast tier, debaters on the strong tier
+
+    With `fallback` on, each model's streamed time to first token, less any
+    rate-limiter queueing, is tracked as an exponential moving average. A call goes to the other tier while its own
+    average is above `slow_ttft_s` and worse than the other tier's; every
+    `probe_every`-th call still goes to the slow model so recovery is noticed.
+    """
+
+    def __init__(self, fast_model=FAST_MODEL, strong_model=STRONG_MODEL, role_tiers=None, fallback=True,
+                 slow_ttft_s=2.0, probe_every=5, alpha=0.2):
+        self.tiers = {'fast': fast_model, 'strong': strong_model}
+        self.role_tiers = role_tiers or {'Host': 'fast', 'John': 'strong', 'Jack': 'strong', 'Judge': 'strong'}
+        self.fallback = fallback
+        self.slow_ttft_s = slow_ttft_s
+        self.probe_every = probe_every
+        self.alpha = alpha
+        self.enabled = True
+        self.ttft = {}
+        self.calls = {}
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def model_for(self, role):
+        """Primary model of a role; everyone gets the strong tier while routing is disabled"""
+        if not self.enabled:
+            return self.tiers['strong']
+        return self.tiers[self.role_tiers.get(role, 'strong')]
+
+    def fallback_for(self, role):
+        if not self.fallback:
+            return None
+        primary = self.model_for(role)
+        others = [model for model in self.tiers.values() if model != primary]
+        return others[0] if others else None
+
+    def choose(self, primary, fallback):
+        """Model to call next"""
+        with self._lock:
+            count = self.calls.get(primary, 0)
+            self.calls[primary] = count + 1
+            if fallback is None or count % self.probe_every == self.probe_every - 1:
+                return primary
+            slow = self.ttft.get(primary, 0.0)
+            if slow > self.slow_ttft_s and slow > self.ttft.get(fallback, 0.0):
+                self.fallbacks += 1
+                return fallback
+            return primary
+
+    def observe(self, model, ttft):
+        with self._lock:
+            previous = self.ttft.get(model)
+            self.ttft[model] = ttft if previous is None else (1 - self.alpha) * previous + self.alpha * ttft
+
+    def client_for(self, role, make_client):
+        """Chat client for one role; make_client(model) builds (or fetches) the client of a model"""
+        primary = make_client(self.model_for(role))
+        fallback_model = self.fallback_for(role)
+        fallback = make_client(fallback_model) if fallback_model else None
+        return RoutedChatCompletionClient(primary, fallback, self)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'fallbacks': self.fallbacks,
+                'ttft_ewma_s': {model: round(ttft, 3) for model, ttft in self.ttft.items()},
+            }
+
+
+class RoutedChatCompletionClient(WrappedChatCompletionClient):
+    """Sends each call to a role's primary client, or to its fallback while the primary is slow"""
+
+    def __init__(self, primary, fallback, router):
+        super().__init__(primary)
+        self.fallback = fallback
+        self.router = router
+        self.primary_model = model_name(primary)
+        self.fallback_model = model_name(fallback) if fallback is not None else None
+
+    def _pick(self):
+        model = self.router.choose(self.primary_model, self.fallback_model)
+        routed_model.set(model)
+        return model, (self.inner if model == self.primary_model else self.fallback)
+
+    async def create(self, messages, **kwargs):
+        # A whole completion's latency is not a time to first token, so only streams feed the averages
+        _, client = self._pick()
+        return await client.create(messages, **kwargs)
+
+    async def create_stream(self, messages, **kwargs):
+        model, client = self._pick()
+        started = time.perf_counter()
+        waited = queue_wait.get()
+        ttft = None
+        async for chunk in client.create_stream(messages, **kwargs):
+            if ttft is None:
+                # Queueing and backoff behind the shared rate limiter is not the model being slow
+                ttft = max(0.0, time.perf_counter() - started - (queue_wait.get() - waited))
+            # Cached replies come back at once and say nothing about the model's speed
+            if isinstance(chunk, CreateResult) and not chunk.cached:
+                self.router.observe(model, ttft)
+            yield chunk
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router():
+    """Process-wide router; DEBATE_FAST_MODEL/DEBATE_STRONG_MODEL pick the tiers, DEBATE_ROUTING=0 and DEBATE_ROUTE_FALLBACK=0 turn routing and fallback off"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(
+                fast_model=os.getenv('DEBATE_FAST_MODEL', FAST_MODEL),
+                strong_model=os.getenv('DEBATE_STRONG_MODEL', STRONG_MODEL),
+                fallback=os.getenv('DEBATE_ROUTE_FALLBACK', '1') != '0',
+            )
+            _router.enabled = os.getenv('DEBATE_ROUTING', '1') != '0'
+        return _router
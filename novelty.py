@@ -0,0 +1,78 @@
+import re
+import zlib
+
+import numpy as np
+
+WORD = re.compile(r"[a-z0-9']+")
+
+
+def hashed_vector(text, dim=4096):
+    """L2-normalised bag of hashed word unigrams and bigrams"""
+    words = WORD.findall(str(text).lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    if not grams:
+        return vector
+    # crc32 instead of hash() so scores are the same in every process
+    indices = np.fromiter((zlib.crc32(g.encode()) % dim for g in grams), dtype=np.int64, count=len(grams))
+    np.add.at(vector, indices, 1.0)
+    return vector / np.linalg.norm(vector)
+
+
+class NoveltyTracker:
+    """Incremental novelty score of each debater turn against everything said before
+
+    Every turn is hashed once into a fixed-size vector and stored in a
+    per-speaker matrix; scoring a new turn is two matrix-vector products
+    against the previous turns, so history is never re-vectorised.
+    novelty = 1 - max(similarity to own earlier turns, similarity to the opponent's).
+    """
+
+    def __init__(self, debaters=("John", "Jack"), dim=4096, stale_below=0.3):
+        self.debaters = tuple(debaters)
+        self.dim = dim
+        self.stale_below = stale_below
+        self.vectors = {speaker: np.zeros((8, dim), dtype=np.float32) for speaker in self.debaters}
+        self.counts = {speaker: 0 for speaker in self.debaters}
+        self.curve = []
+        self._scores = {}
+
+    def _max_similarity(self, speaker, vector):
+        count = self.counts[speaker]
+        if not count:
+            return 0.0
+        return float(np.max(self.vectors[speaker][:count] @ vector))
+
+    def _append(self, speaker, vector):
+        count = self.counts[speaker]
+        if count == len(self.vectors[speaker]):
+            # Grow by doubling so appends stay amortised O(1)
+            grown = np.zeros((2 * count, self.dim), dtype=np.float32)
+            grown[:count] = self.vectors[speaker]
+            self.vectors[speaker] = grown
+        self.vectors[speaker][count] = vector
+        self.counts[speaker] = count + 1
+
+    def observe(self, message):
+        """Score a debater message once (repeat calls return the same score); None for other speakers"""
+        if message.source not in self.debaters:
+            return None
+        key = (message.source, message.content, message.created_at)
+        if key in self._scores:
+            return self._scores[key]
+
+        vector = hashed_vector(message.content, self.dim)
+        opponents = [s for s in self.debaters if s != message.source]
+        self_similarity = self._max_similarity(message.source, vector)
+        opponent_similarity = max((self._max_similarity(s, vector) for s in opponents), default=0.0)
+        self._append(message.source, vector)
+
+        score = {
+            'novelty': round(1.0 - max(self_similarity, opponent_similarity), 4),
+            'self_similarity': round(self_similarity, 4),
+            'opponent_similarity': round(opponent_similarity, 4),
+        }
+        score['stale'] = score['novelty'] < self.stale_below
+        self._scores[key] = score
+        self.curve.append((message.source, score['novelty']))
+        return score
@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import aclosing
+
+from autogen_agentchat.base import Response, TaskResult
+from autogen_agentchat.messages import BaseChatMessage, MessageFactory, TextMessage
+
+
+class ParallelRoundsDebate:
+    """Debate scheduler where both debaters answer the same snapshot concurrently each round
+
+    Each round the host moderates first, then every debater replies at the
+    same time to everything said so far; replies appear in the order they
+    finish. Exposes run_stream() with the same event types as
+    RoundRobinGroupChat, so callers can switch between the two, and honors
+    the same termination conditions (checked after every finished message;
+    a reply still in flight when one fires is cancelled).
+
+    Like a team, run_stream(task=None) continues where the last run stopped.
+    With phases_per_run=N each run ends after N phases (host or debaters),
+    which are the points where save_state() is consistent.
+    """
+
+    def __init__(self, host, debaters, max_turns=10, termination_condition=None, phases_per_run=None):
+        self.host = host
+        self.debaters = list(debaters)
+        self.max_turns = max_turns
+        self.termination_condition = termination_condition
+        self.phases_per_run = phases_per_run
+        self.transcript = []
+        self.seen = {}
+        self.turns = 0
+        self.phase = 0
+
+    @property
+    def agents(self):
+        return [self.host] + self.debaters
+
+    async def _speak(self, agent, new_messages, queue, cancellation_token):
+        try:
+            async for event in agent.on_messages_stream(new_messages, cancellation_token):
+                if isinstance(event, Response):
+                    await queue.put(('message', event.chat_message))
+                else:
+                    await queue.put(('event', event))
+        finally:
+            await queue.put(('done', None))
+
+    async def _round(self, agents, cancellation_token):
+        """Run `agents` concurrently against the current transcript, yielding their events as they arrive"""
+        queue = asyncio.Queue()
+        snapshot = len(self.transcript)
+        tasks = []
+        for agent in agents:
+            # Every agent gets the same view: whatever it has not seen up to the start of the round
+            new_messages = [
+                m for m in self.transcript[self.seen.get(agent.name, 0):snapshot] if m.source != agent.name
+            ]
+            self.seen[agent.name] = snapshot
+            tasks.append(asyncio.create_task(self._speak(agent, new_messages, queue, cancellation_token)))
+        try:
+            finished = 0
+            while finished < len(tasks):
+                kind, event = await queue.get()
+                if kind == 'done':
+                    finished += 1
+                    continue
+                if kind == 'message':
+                    self.transcript.append(event)
+                yield event
+            # Surface the first failure, if any
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def run_stream(self, task=None, cancellation_token=None):
+        if task is not None:
+            task_message = TextMessage(content=task, source="user")
+            self.transcript = [task_message]
+            self.seen = {}
+            self.turns = 0
+            self.phase = 0
+            yield task_message
+        condition = self.termination_condition
+        if condition is not None:
+            await condition.reset()
+
+        phases = 0
+        stop_reason = None
+        while self.turns < self.max_turns and stop_reason is None:
+            if self.phases_per_run is not None and phases >= self.phases_per_run:
+                break
+            # Host moderates, then both debaters answer the same snapshot at once
+            agents = ([self.host], self.debaters)[self.phase][:self.max_turns - self.turns]
+            async with aclosing(self._round(agents, cancellation_token)) as events:
+                async for event in events:
+                    yield event
+                    if not isinstance(event, BaseChatMessage):
+                        continue
+                    self.turns += 1
+                    stop = await condition([event]) if condition is not None else None
+                    if stop is not None:
+                        stop_reason = stop.content
+                        break
+            self.phase = 1 - self.phase
+            phases += 1
+
+        if stop_reason is None and self.turns >= self.max_turns:
+            stop_reason = f"Maximum number of turns {self.max_turns} reached."
+        yield TaskResult(messages=list(self.transcript), stop_reason=stop_reason)
+
+    async def save_state(self):
+        """Agent states plus the scheduler position; consistent between runs"""
+        return {
+            'agent_states': {agent.name: await agent.save_state() for agent in self.agents},
+            'transcript': [m.dump() for m in self.transcript],
+            'seen': dict(self.seen),
+            'turns': self.turns,
+            'phase': self.phase,
+        }
+
+    async def load_state(self, state):
+        for agent in self.agents:
+            await agent.load_state(state['agent_states'][agent.name])
+        factory = MessageFactory()
+        self.transcript = [factory.create(m) for m in state['transcript']]
+        self.seen = dict(state['seen'])
+        self.turns = state['turns']
+        self.phase = state['phase']
+
+    async def run(self, task=None, cancellation_token=None):
+        result = None
+        async for event in self.run_stream(task, cancellation_token):
+            if isinstance(event, TaskResult):
+                result = event
+        return result
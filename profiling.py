@@ -0,0 +1,204 @@
+import contextlib
+import contextvars
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import OrderedDict
+
+# Phases reported for a debate run or a Streamlit rerun; time not covered by any of them is "other"
+PHASES = ('agent_setup', 'model_wait', 'post_processing', 'rendering', 'transcript')
+
+# Profile of the debate or rerun running in this context, if it is being profiled
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+# Threads with an enabled cProfile; a second profiler on the same thread would silently replace the first
+_profiled_threads = set()
+_profiled_threads_lock = threading.Lock()
+
+
+def profiling_default():
+    """Whether profiling starts switched on, from DEBATE_PROFILE=1"""
+    return os.getenv('DEBATE_PROFILE', '0') == '1'
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Add the time spent in the block to `name` of the current profile; free when nothing is profiled"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+class Profile:
+    """cProfile hot spots plus a per-phase wall-clock breakdown of one debate run or rerun
+
+    cProfile sees every function run on the profiled thread. For a debate
+    on the shared worker loop that includes other debates running at the
+    same time, so profile a debate on its own for clean numbers. If the
+    thread already has a profiler running, only the phases are recorded.
+    """
+
+    def __init__(self, name, kind="debate"):
+        self.name = name
+        self.kind = kind
+        self.phases = {}
+        self.total_s = 0.0
+        self.stats = None
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def run(self):
+        """Profile the block: cProfile on this thread and phase() calls in this context"""
+        thread = threading.get_ident()
+        with _profiled_threads_lock:
+            owns_thread = thread not in _profiled_threads
+            _profiled_threads.add(thread)
+        profiler = cProfile.Profile() if owns_thread else None
+        token = current_profile.set(self)
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with _profiled_threads_lock:
+                    _profiled_threads.discard(thread)
+                self.stats = pstats.Stats(profiler).stats
+            self.total_s += time.perf_counter() - started
+            current_profile.reset(token)
+
+    def breakdown(self):
+        """Seconds per phase, with the rest of the wall-clock time as 'other'"""
+        ordered = [name for name in PHASES if name in self.phases] + [name for name in self.phases if name not in PHASES]
+        phases = {name: round(self.phases[name], 4) for name in ordered}
+        # Model calls of parallel rounds overlap, so the phases can add up to more than the wall time
+        phases['other'] = round(max(self.total_s - sum(self.phases.values()), 0.0), 4)
+        return phases
+
+    def hotspots(self, limit=15, sort='tottime'):
+        """Top functions by own time (or 'cumtime'), as rows for a table"""
+        if not self.stats:
+            return []
+        key = 2 if sort == 'tottime' else 3
+        rows = sorted(self.stats.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+        return [
+            {
+                'function': pstats.func_std_string(func),
+                'calls': nc,
+                'own_s': round(tt, 4),
+                'cumulative_s': round(ct, 4),
+            }
+            for func, (cc, nc, tt, ct, callers) in rows
+        ]
+
+    def summary(self):
+        return {'name': self.name, 'kind': self.kind, 'total_s': round(self.total_s, 4), 'phases': self.breakdown()}
+
+    def prof_bytes(self):
+        """The profile in the .prof format written by cProfile (open with pstats, snakeviz, ...)"""
+        return marshal.dumps(self.stats or {})
+
+    def speedscope(self, min_share=1e-4, max_depth=64):
+        """The profile as a speedscope.app sampled profile
+
+        cProfile only knows caller -> callee edges, so call stacks are rebuilt
+        by following those edges from the roots and splitting each function's
+        time between the paths that lead to it in proportion to the edge times.
+        """
+        stats = self.stats or {}
+        frames, frame_index = [], {}
+        callees = {}
+        for func, (cc, nc, tt, ct, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((func, edge[3]))
+
+        def frame(func):
+            if func not in frame_index:
+                frame_index[func] = len(frames)
+                frames.append({'name': func[2], 'file': func[0], 'line': func[1]})
+            return frame_index[func]
+
+        total = sum(ct for func, (cc, nc, tt, ct, callers) in stats.items() if not callers)
+        samples, weights = [], []
+
+        def walk(func, budget, stack):
+            cc, nc, tt, ct, callers = stats[func]
+            if budget < total * min_share or len(stack) >= max_depth or not ct:
+                return
+            stack = stack + [frame(func)]
+            scale = budget / ct
+            if tt:
+                samples.append(stack)
+                weights.append(round(tt * scale, 6))
+            for callee, edge_ct in callees.get(func, ()):
+                # Recursion shows up as a cycle in the edges; its time is already in the outer call
+                if callee in stats and frame_index.get(callee) not in stack:
+                    walk(callee, edge_ct * scale, stack)
+
+        for func, (cc, nc, tt, ct, callers) in stats.items():
+            if not callers:
+                walk(func, ct, [])
+        return json.dumps({
+            '$schema': "https://www.speedscope.app/file-format-schema.json",
+            'name': self.name,
+            'exporter': "ai-debate-arena",
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': "sampled",
+                'name': self.name,
+                'unit': "seconds",
+                'startValue': 0,
+                'endValue': round(sum(weights), 6),
+                'samples': samples,
+                'weights': weights,
+            }],
+        })
+
+
+class ProfileStore:
+    """The last `max_profiles` debate profiles, by debate id, for the UI to pick up after the run"""
+
+    def __init__(self, max_profiles=20):
+        self.max_profiles = max_profiles
+        self.profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, profile):
+        with self._lock:
+            self.profiles[key] = profile
+            self.profiles.move_to_end(key)
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self.profiles.get(key)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    """Process-wide store of debate profiles, shared by the worker and every Streamlit session"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProfileStore()
+        return _store
@@ -0,0 +1,155 @@
+import contextvars
+import json
+
+import httpx
+
+EPHEMERAL = {'type': 'ephemeral'}
+
+# Cache token counts of the model call in flight; InstrumentedChatCompletionClient sets a dict, the transport fills it
+prompt_cache_usage = contextvars.ContextVar('prompt_cache_usage', default=None)
+
+
+def _mark_last_block(message_or_payload, key):
+    content = message_or_payload.get(key)
+    if isinstance(content, str):
+        if not content:
+            return False
+        message_or_payload[key] = [{'type': 'text', 'text': content, 'cache_control': EPHEMERAL}]
+        return True
+    if isinstance(content, list) and content and isinstance(content[-1], dict):
+        block = content[-1]
+        if block.get('type') == 'text' and not block.get('text'):
+            return False
+        block['cache_control'] = EPHEMERAL
+        return True
+    return False
+
+
+def mark_cacheable(payload, recent_messages=3):
+    """Put cache_control breakpoints on a Messages API request body
+
+    One goes on the system prompt and one on each of the last
+    `recent_messages` messages, within the API's limit of four. The next
+    turn re-sends the same prefix plus a few new messages, so it reads
+    everything up to the previous turn's breakpoints from the cache. Marking
+    more than the last message keeps that working when consecutive
+    messages of one role get merged into the last one.
+    """
+    _mark_last_block(payload, 'system')
+    for message in payload.get('messages', [])[-recent_messages:]:
+        _mark_last_block(message, 'content')
+    return payload
+
+
+def fold_cache_usage(usage):
+    """Count cache reads and writes in input_tokens, as without caching; returns (read, write)
+
+    The API reports only the uncached remainder as input_tokens. Folding the
+    cached part back in keeps prompt_tokens, token budgets and context
+    savings comparable with caching on or off. Telemetry prices the
+    cached part separately.
+    """
+    read = usage.get('cache_read_input_tokens') or 0
+    write = usage.get('cache_creation_input_tokens') or 0
+    usage['input_tokens'] = (usage.get('input_tokens') or 0) + read + write
+    holder = prompt_cache_usage.get()
+    if holder is not None:
+        holder['cache_read_tokens'] = holder.get('cache_read_tokens', 0) + read
+        holder['cache_write_tokens'] = holder.get('cache_write_tokens', 0) + write
+    return read, write
+
+
+def _rewrite_event(event):
+    """The message_start SSE event with its usage folded; other events unchanged"""
+    lines = event.split(b"\n")
+    for i, line in enumerate(lines):
+        if not line.startswith(b"data:"):
+            continue
+        try:
+            data = json.loads(line[5:])
+        except ValueError:
+            return event
+        if data.get('type') != 'message_start' or 'usage' not in data.get('message', {}):
+            return event
+        fold_cache_usage(data['message']['usage'])
+        lines[i] = b"data: " + json.dumps(data).encode()
+        return b"\n".join(lines)
+    return event
+
+
+class _MessageStartStream(httpx.AsyncByteStream):
+    """Streaming response body with the usage of its first event (message_start) folded"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __aiter__(self):
+        buffer = b""
+        async for chunk in self.inner:
+            if buffer is None:
+                yield chunk
+                continue
+            buffer += chunk
+            end = buffer.find(b"\n\n")
+            if end < 0:
+                continue
+            yield _rewrite_event(buffer[:end]) + buffer[end:]
+            buffer = None
+        if buffer:
+            yield buffer
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class PromptCachingTransport(httpx.AsyncBaseTransport):
+    """HTTP transport under the Anthropic client that marks stable prompt prefixes as cacheable
+
+    Requests to the Messages API get cache_control breakpoints (see
+    mark_cacheable). Their responses report the cache reads and writes to
+    prompt_cache_usage. Responses are requested uncompressed so the usage can
+    be rewritten in place. Everything else passes straight through.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    @property
+    def _pool(self):
+        # ModelClientPool.stats() looks at the connection pool of the transport
+        return getattr(self.inner, '_pool', None)
+
+    async def handle_async_request(self, request):
+        if request.method != "POST" or not request.url.path.endswith("/messages"):
+            return await self.inner.handle_async_request(request)
+        payload = json.loads(await request.aread())
+        headers = [
+            (name, value) for name, value in request.headers.raw
+            if name.lower() not in (b'content-length', b'accept-encoding')
+        ]
+        headers.append((b'Accept-Encoding', b'identity'))
+        request = httpx.Request(
+            request.method, request.url, headers=headers,
+            content=json.dumps(mark_cacheable(payload)).encode(), extensions=request.extensions
+        )
+        response = await self.inner.handle_async_request(request)
+        if response.status_code != 200:
+            return response
+        headers = [(name, value) for name, value in response.headers.raw if name.lower() != b'content-length']
+        if 'text/event-stream' in response.headers.get('content-type', ''):
+            return httpx.Response(
+                response.status_code, headers=headers, stream=_MessageStartStream(response.stream),
+                extensions=response.extensions
+            )
+        try:
+            data = json.loads(await response.aread())
+        finally:
+            await response.aclose()
+        if isinstance(data.get('usage'), dict):
+            fold_cache_usage(data['usage'])
+        return httpx.Response(
+            response.status_code, headers=headers, content=json.dumps(data).encode(), extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
@@ -0,0 +1,300 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+
+from autogen_core.models import CreateResult
+
+from client_wrappers import WrappedChatCompletionClient, create_args_of
+
+# Status codes that mean "slow down" rather than "this request is wrong"
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504, 529)
+THROTTLE_STATUS = (429, 529)
+
+# Seconds the current model call spent queued behind the limiter (including retry backoff)
+queue_wait = contextvars.ContextVar('queue_wait', default=0.0)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute
+
+    Reservations may drive the balance negative; the caller then waits until
+    its share has been refilled, which keeps waiters roughly first come first served.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """Take `amount` tokens and return how many seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit: +1 per window of successes, halved on throttling, unchanged by other failures"""
+
+    def __init__(self, initial=4, minimum=1, maximum=16):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def release(self, throttled=False):
+        """Give back the slot of a call the API answered: successfully, or by throttling it"""
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def cancel(self):
+        """Give back a slot without moving the limit: the call failed for another reason or was cancelled"""
+        with self._lock:
+            self.in_flight -= 1
+
+
+def retry_after_seconds(error):
+    """Server-requested delay from a retry-after header, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(error, 'headers', None) or {}
+    value = headers.get('retry-after') if hasattr(headers, 'get') else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """Shared client-side limits for requests/min, input tokens/min and output tokens/min
+
+    Every model call goes through acquire()/release(); the concurrency limit
+    adapts to throttling responses and wait times are tracked as metrics.
+    """
+
+    def __init__(self, requests_per_minute=50, input_tokens_per_minute=40000, output_tokens_per_minute=8000,
+                 max_concurrency=16, max_attempts=6, base_backoff=1.0, max_backoff=60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.output_tokens = TokenBucket(output_tokens_per_minute)
+        # Start optimistic and only back off once the API actually pushes back
+        self.concurrency = AdaptiveConcurrency(initial=max_concurrency, maximum=max_concurrency)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.total_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    async def acquire(self, input_tokens, output_tokens):
+        """Wait for a concurrency slot and for budget in every bucket"""
+        started = time.monotonic()
+        with self._lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            while not self.concurrency.try_acquire():
+                await asyncio.sleep(0.05)
+            try:
+                wait = max(
+                    self.requests.reserve(1),
+                    self.input_tokens.reserve(input_tokens),
+                    self.output_tokens.reserve(output_tokens),
+                )
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            except BaseException:
+                # Cancelled while waiting for the buckets: the caller never gets to release()
+                self.concurrency.cancel()
+                self.requests.refund(1)
+                self.input_tokens.refund(input_tokens)
+                self.output_tokens.refund(output_tokens)
+                raise
+        finally:
+            waited = time.monotonic() - started
+            queue_wait.set(queue_wait.get() + waited)
+            with self._lock:
+                self.queue_depth -= 1
+                self.total_requests += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+    def release(self, reserved_output, actual_output=None, throttled=False, succeeded=True):
+        """Settle a call: only a success grows the concurrency limit and only throttling shrinks it"""
+        if succeeded or throttled:
+            self.concurrency.release(throttled)
+        else:
+            self.concurrency.cancel()
+        if actual_output is not None:
+            # Settle the output estimate against what was really generated
+            if actual_output > reserved_output:
+                self.output_tokens.reserve(actual_output - reserved_output)
+            else:
+                self.output_tokens.refund(reserved_output - actual_output)
+        if throttled:
+            with self._lock:
+                self.throttled += 1
+
+    def backoff(self, attempt, error):
+        """Jittered exponential backoff before retry number `attempt` + 1, never under the server's retry-after"""
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after) + random.uniform(0, 0.25 * self.base_backoff)
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'in_flight': self.concurrency.in_flight,
+                'concurrency_limit': round(self.concurrency.limit, 2),
+                'requests': self.total_requests,
+                'avg_wait_s': round(self.total_wait / self.total_requests, 3) if self.total_requests else 0.0,
+                'max_wait_s': round(self.max_wait, 3),
+                'throttled': self.throttled,
+                'retries': self.retries,
+            }
+
+
+def is_retryable(error):
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS or type(error).__name__ in (
+        'APIConnectionError', 'APITimeoutError'
+    )
+
+
+def is_throttle(error):
+    return getattr(error, 'status_code', None) in THROTTLE_STATUS
+
+
+class RateLimitedChatCompletionClient(WrappedChatCompletionClient):
+    """Routes every model call through a shared RateLimiter, retrying throttled calls
+
+    A call is tried at most `max_attempts` times in all.
+    """
+
+    def __init__(self, inner, limiter, expected_output_tokens=None):
+        super().__init__(inner)
+        self.limiter = limiter
+        self.expected_output_tokens = expected_output_tokens or create_args_of(inner).get('max_tokens') or 256
+
+    def _input_estimate(self, messages, tools):
+        # ~4 characters per token is close enough for budgeting and avoids tokenizing every call
+        return sum(len(str(m.content)) for m in messages) // 4 + 1
+
+    async def create(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        input_tokens = self._input_estimate(messages, tools)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(input_tokens, self.expected_output_tokens)
+            released = False
+            try:
+                result = await self.inner.create(
+                    messages,
+                    tools=tools,
+                    json_output=json_output,
+                    extra_create_args=extra_create_args,
+                    cancellation_token=cancellation_token,
+                )
+                self.limiter.release(self.expected_output_tokens, result.usage.completion_tokens)
+                released = True
+                return result
+            except Exception as e:
+                self.limiter.release(self.expected_output_tokens, 0, throttled=is_throttle(e), succeeded=False)
+                released = True
+                if not is_retryable(e) or attempt + 1 >= self.limiter.max_attempts:
+                    raise
+                delay = self.limiter.backoff(attempt, e)
+                attempt += 1
+                queue_wait.set(queue_wait.get() + delay)
+                await asyncio.sleep(delay)
+            finally:
+                if not released:
+                    # Cancelled while waiting on the model
+                    self.limiter.release(self.expected_output_tokens, 0, succeeded=False)
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        input_tokens = self._input_estimate(messages, tools)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(input_tokens, self.expected_output_tokens)
+            started_output = False
+            released = False
+            try:
+                async for chunk in self.inner.create_stream(
+                    messages,
+                    tools=tools,
+                    json_output=json_output,
+                    extra_create_args=extra_create_args,
+                    cancellation_token=cancellation_token,
+                ):
+                    started_output = True
+                    if isinstance(chunk, CreateResult) and not released:
+                        self.limiter.release(self.expected_output_tokens, chunk.usage.completion_tokens)
+                        released = True
+                    yield chunk
+                return
+            except Exception as e:
+                if not released:
+                    self.limiter.release(self.expected_output_tokens, 0, throttled=is_throttle(e), succeeded=False)
+                    released = True
+                # Partial output has already been shown, so only calls that failed up front are retried
+                if started_output or not is_retryable(e) or attempt + 1 >= self.limiter.max_attempts:
+                    raise
+                delay = self.limiter.backoff(attempt, e)
+                attempt += 1
+                queue_wait.set(queue_wait.get() + delay)
+                await asyncio.sleep(delay)
+            finally:
+                if not released:
+                    # The consumer abandoned or cancelled the stream
+                    self.limiter.release(self.expected_output_tokens, 0, succeeded=False)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Limiter shared by every debate in the process, sized from ANTHROPIC_RPM/ITPM/OTPM"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_minute=int(os.getenv('ANTHROPIC_RPM', '50')),
+                input_tokens_per_minute=int(os.getenv('ANTHROPIC_ITPM', '40000')),
+                output_tokens_per_minute=int(os.getenv('ANTHROPIC_OTPM', '8000')),
+                max_concurrency=int(os.getenv('DEBATE_MAX_CONCURRENCY', '16')),
+            )
+        return _limiter
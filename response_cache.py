@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from autogen_core.models import CreateResult
+
+from client_wrappers import WrappedChatCompletionClient, create_args_of, model_name
+
+
+def cache_key(model, messages, create_args, tools=(), json_output=None):
+    """Content hash of everything that determines a model response"""
+    payload = {
+        'model': model,
+        # Includes the system message and the full message history
+        'messages': [m.model_dump(mode='json') for m in messages],
+        'create_args': create_args,
+        'tools': [getattr(t, 'schema', t) for t in tools],
+        'json_output': json_output if isinstance(json_output, (bool, type(None))) else repr(json_output),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier response store: bounded in-memory LRU in front of an optional SQLite file"""
+
+    def __init__(self, max_entries=512, db_path=None, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if self.db is not None:
+                row = self.db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    # Promote to the memory tier
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now)
+                )
+                self.db.commit()
+            self.writes += 1
+
+    def _remember(self, key, value, created_at):
+        self.memory[key] = (value, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def purge_expired(self):
+        if self.db is not None:
+            with self._lock:
+                self.db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+                self.db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'entries': len(self.memory),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedChatCompletionClient(WrappedChatCompletionClient):
+    """Serves repeated model calls from a ResponseCache
+
+    With bypass=True lookups are skipped (a fresh debate) but new responses
+    still refresh the cache.
+    """
+
+    def __init__(self, inner, cache, bypass=False):
+        super().__init__(inner)
+        self.cache = cache
+        self.bypass = bypass
+
+    def _key(self, messages, tools, json_output, extra_create_args):
+        create_args = create_args_of(self.inner)
+        create_args.update(extra_create_args)
+        create_args.pop('model', None)
+        return cache_key(model_name(self.inner), messages, create_args, tools, json_output)
+
+    def _lookup(self, key):
+        if self.bypass:
+            return None
+        value = self.cache.get(key)
+        if value is None:
+            return None
+        result = CreateResult.model_validate_json(value)
+        result.cached = True
+        return result
+
+    async def create(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        key = self._key(messages, tools, json_output, extra_create_args)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        result = await self.inner.create(
+            messages,
+            tools=tools,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+        self.cache.put(key, result.model_dump_json())
+        return result
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        key = self._key(messages, tools, json_output, extra_create_args)
+        result = self._lookup(key)
+        if result is not None:
+            if isinstance(result.content, str):
+                yield result.content
+            yield result
+            return
+        async for chunk in self.inner.create_stream(
+            messages,
+            tools=tools,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        ):
+            if isinstance(chunk, CreateResult):
+                self.cache.put(key, chunk.model_dump_json())
+            yield chunk
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache; DEBATE_CACHE_DB enables the SQLite tier, DEBATE_CACHE_TTL sets its TTL in seconds"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                max_entries=int(os.getenv('DEBATE_CACHE_SIZE', '512')),
+                db_path=os.getenv('DEBATE_CACHE_DB') or None,
+                ttl=float(os.getenv('DEBATE_CACHE_TTL', str(7 * 24 * 3600))),
+            )
+        return _cache
@@ -0,0 +1,238 @@
+import os
+import sys
+import threading
+import time
+import weakref
+from collections.abc import Mapping
+
+from debate_store import get_debate_store
+
+# Key tuples of the per-turn metrics; every turn of a debate shares one of a handful of them
+_metric_keys = {}
+
+
+def _pack_timestamp(timestamp):
+    """'HH:MM:SS' as float seconds since midnight; anything else is kept as an interned string"""
+    try:
+        hours, minutes, seconds = timestamp.split(':')
+        return float(int(hours) * 3600 + int(minutes) * 60 + int(seconds))
+    except (AttributeError, ValueError):
+        return sys.intern(str(timestamp))
+
+
+def _unpack_timestamp(packed):
+    if isinstance(packed, str):
+        return packed
+    seconds = int(packed)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class DebateMessage(Mapping):
+    """One debate message, read exactly like the {'speaker', 'content', 'timestamp', 'metrics'} dict it replaces
+
+    Slots instead of a dict, an interned speaker name, a float timestamp and
+    the metrics as a values tuple behind a shared key tuple take well under
+    half the memory of the dict form.
+    """
+
+    __slots__ = ('speaker', 'content', '_timestamp', '_metric_keys', '_metric_values')
+
+    def __init__(self, speaker, content, timestamp, metrics=None):
+        self.speaker = sys.intern(speaker)
+        self.content = content
+        self._timestamp = _pack_timestamp(timestamp)
+        if metrics:
+            keys = tuple(metrics)
+            self._metric_keys = _metric_keys.setdefault(keys, keys)
+            self._metric_values = tuple(metrics.values())
+        else:
+            self._metric_keys = self._metric_values = None
+
+    @classmethod
+    def of(cls, msg):
+        if isinstance(msg, cls):
+            return msg
+        return cls(msg['speaker'], msg['content'], msg['timestamp'], msg.get('metrics'))
+
+    def __getitem__(self, key):
+        if key == 'speaker':
+            return self.speaker
+        if key == 'content':
+            return self.content
+        if key == 'timestamp':
+            return _unpack_timestamp(self._timestamp)
+        if key == 'metrics' and self._metric_keys is not None:
+            # A fresh dict on every read, so callers cannot change the stored turn by accident
+            return dict(zip(self._metric_keys, self._metric_values))
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from ('speaker', 'content', 'timestamp')
+        if self._metric_keys is not None:
+            yield 'metrics'
+
+    def __len__(self):
+        return 3 if self._metric_keys is None else 4
+
+    def __repr__(self):
+        return f"DebateMessage({dict(self)!r})"
+
+    def nbytes(self):
+        size = sys.getsizeof(self) + sys.getsizeof(self.content)
+        if self._metric_values is not None:
+            size += sys.getsizeof(self._metric_values) + sum(sys.getsizeof(v) for v in self._metric_values)
+        return size
+
+
+class MessageLog:
+    """The messages a session is showing, kept compact and dropped from memory when the session goes idle
+
+    Reads like a list of message dicts. A spilled log only remembers its
+    debate id and length; the messages are all in the debate store
+    already, so the next read loads them back from there.
+    """
+
+    def __init__(self, messages=(), debate_id=None, memory=None):
+        self.debate_id = debate_id
+        self.memory = memory or get_session_memory()
+        self._messages = [DebateMessage.of(m) for m in messages]
+        self._count = len(self._messages)
+        self._message_bytes = sum(m.nbytes() for m in self._messages)
+        # (version, {format: text}) kept for generate_transcript; dropped with the messages
+        self._transcripts = None
+        self.last_access = time.monotonic()
+        self.memory.track(self)
+
+    def _items(self):
+        self.last_access = time.monotonic()
+        items = self._messages
+        if items is None:
+            items = [DebateMessage.of(m) for m in get_debate_store().get_messages(self.debate_id)]
+            self._message_bytes = sum(m.nbytes() for m in items)
+            self._count = len(items)
+            self._messages = items
+            self.memory.reloaded(self)
+        return items
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __getitem__(self, index):
+        return self._items()[index]
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def append(self, msg):
+        msg = DebateMessage.of(msg)
+        self._items().append(msg)
+        self._count += 1
+        self._message_bytes += msg.nbytes()
+        self.memory.grew(self)
+
+    @property
+    def resident(self):
+        return self._messages is not None
+
+    @property
+    def nbytes(self):
+        size = self._message_bytes if self.resident else 0
+        if self._transcripts is not None:
+            size += sum(sys.getsizeof(text) for text in self._transcripts[1].values())
+        return size
+
+    def transcripts(self, version):
+        """Transcripts cached for this version of the debate, or None"""
+        self.last_access = time.monotonic()
+        cached = self._transcripts
+        return cached[1] if cached is not None and cached[0] == version else None
+
+    def cache_transcripts(self, version, transcripts):
+        self._transcripts = (version, transcripts)
+        self.memory.grew(self)
+
+    def spill(self):
+        """Drop the in-memory copy; False when there is no stored copy to come back to"""
+        if self.debate_id is None or not self.resident:
+            return False
+        self._messages = None
+        self._message_bytes = 0
+        self._transcripts = None
+        return True
+
+
+class SessionMemory:
+    """Keeps the message logs of all sessions in this process under `max_bytes`
+
+    Logs untouched for `idle_s` seconds are spilled on the next sweep; when
+    the resident total is still over the cap, the least recently used logs
+    go next. A sweep runs whenever a log is created or grows. Logs are held
+    weakly, so a session that ends takes its log with it.
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, idle_s=1800):
+        self.max_bytes = max_bytes
+        self.idle_s = idle_s
+        self.logs = weakref.WeakSet()
+        self.spills = 0
+        self.reloads = 0
+        self._lock = threading.Lock()
+
+    def track(self, log):
+        with self._lock:
+            self.logs.add(log)
+        self.sweep(keep=log)
+
+    def grew(self, log):
+        self.sweep(keep=log)
+
+    def reloaded(self, log):
+        with self._lock:
+            self.reloads += 1
+        self.sweep(keep=log)
+
+    def sweep(self, keep=None):
+        """Spill idle logs, then the least recently used ones until the total fits; `keep` is never spilled"""
+        with self._lock:
+            resident = [log for log in self.logs if log.resident and log is not keep]
+            now = time.monotonic()
+            total = sum(log.nbytes for log in resident) + (keep.nbytes if keep is not None else 0)
+            for log in sorted(resident, key=lambda log: log.last_access):
+                if now - log.last_access < self.idle_s and total <= self.max_bytes:
+                    break
+                size = log.nbytes
+                if log.spill():
+                    self.spills += 1
+                    total -= size
+
+    def stats(self):
+        with self._lock:
+            logs = list(self.logs)
+            spills, reloads = self.spills, self.reloads
+        return {
+            'sessions': len(logs),
+            'resident_sessions': sum(1 for log in logs if log.resident),
+            'resident_bytes': sum(log.nbytes for log in logs),
+            'max_bytes': self.max_bytes,
+            'spills': spills,
+            'reloads': reloads,
+        }
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_session_memory():
+    """Process-wide session memory; DEBATE_SESSION_MEMORY_MB caps it (256) and DEBATE_SESSION_IDLE_S sets the idle time (1800)"""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = SessionMemory(
+                max_bytes=int(float(os.getenv('DEBATE_SESSION_MEMORY_MB', '256')) * 2**20),
+                idle_s=float(os.getenv('DEBATE_SESSION_IDLE_S', '1800')),
+            )
+        return _memory
@@ -0,0 +1,274 @@
+import json
+import threading
+import time
+
+from autogen_core.models import CreateResult
+
+from client_wrappers import WrappedChatCompletionClient, model_name
+from hedging import hedged
+from model_router import routed_model
+from prompt_cache import prompt_cache_usage
+from rate_limiter import queue_wait
+
+# USD per million tokens: (input, output)
+MODEL_PRICES = {
+    'claude-3-5-sonnet-20241022': (3.0, 15.0),
+    'claude-3-5-haiku-20241022': (0.8, 4.0),
+    'claude-3-haiku-20240307': (0.25, 1.25),
+}
+DEFAULT_PRICE = MODEL_PRICES['claude-3-5-sonnet-20241022']
+# Prompt-cache reads and writes, as multiples of the input price
+CACHE_READ_RATE = 0.1
+CACHE_WRITE_RATE = 1.25
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cache_read_tokens=0, cache_write_tokens=0):
+    """USD for one call; prompt_tokens includes the tokens read from or written to the prompt cache"""
+    input_price, output_price = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    uncached = max(prompt_tokens - cache_read_tokens - cache_write_tokens, 0)
+    prompt_cost = uncached + cache_read_tokens * CACHE_READ_RATE + cache_write_tokens * CACHE_WRITE_RATE
+    return (prompt_cost * input_price + completion_tokens * output_price) / 1e6
+
+
+class DebateTelemetry:
+    """Collects wall-clock timings of every model call in one debate, per speaker"""
+
+    def __init__(self):
+        self.pending = {}
+        # What the debate's turns really cost: response-cache hits are free, prompt-cache reads discounted
+        self.spent_tokens = 0
+        self.spent_usd = 0.0
+        # Part of the spend from calls that are not turns (rolling summaries), kept for checkpoints
+        self.side_tokens = 0
+        self.side_usd = 0.0
+        self._lock = threading.Lock()
+
+    def record_call(self, speaker, model, queue_wait_s, ttft_s, latency_s, cached, hedged_call=False, cache_usage=None):
+        cache_usage = cache_usage or {}
+        with self._lock:
+            self.pending.setdefault(speaker, []).append({
+                'model': model,
+                'queue_wait_s': queue_wait_s,
+                'ttft_s': ttft_s,
+                'latency_s': latency_s,
+                'cached': cached,
+                'hedged': hedged_call,
+                'cache_read_tokens': cache_usage.get('cache_read_tokens', 0),
+                'cache_write_tokens': cache_usage.get('cache_write_tokens', 0),
+            })
+
+    def turn_metrics(self, speaker, models_usage):
+        """Combine the speaker's calls since its last turn with the usage autogen put on the message"""
+        with self._lock:
+            calls = self.pending.pop(speaker, [])
+        if not calls:
+            return None
+        prompt_tokens = models_usage.prompt_tokens if models_usage else 0
+        completion_tokens = models_usage.completion_tokens if models_usage else 0
+        cache_read_tokens = sum(c['cache_read_tokens'] for c in calls)
+        cache_write_tokens = sum(c['cache_write_tokens'] for c in calls)
+        cached = all(c['cached'] for c in calls)
+        model = calls[-1]['model']
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, cache_read_tokens, cache_write_tokens)
+        if not cached:
+            with self._lock:
+                self.spent_tokens += prompt_tokens + completion_tokens
+                self.spent_usd += cost
+        return {
+            'model': model,
+            'queue_wait_s': round(sum(c['queue_wait_s'] for c in calls), 4),
+            'ttft_s': round(calls[0]['ttft_s'], 4),
+            'latency_s': round(sum(c['latency_s'] for c in calls), 4),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            # Part of prompt_tokens served from (read) or added to (write) the Anthropic prompt cache
+            'cache_read_tokens': cache_read_tokens,
+            'cache_write_tokens': cache_write_tokens,
+            # Cached turns did not call the API, so they cost nothing
+            'cost_usd': 0.0 if cached else round(cost, 6),
+            'cached': cached,
+            'hedged': any(c['hedged'] for c in calls),
+        }
+
+
+    def charge(self, model, usage, cached, cache_usage=None):
+        """Add a call that is not a turn (a rolling summary) to the spend; returns its cost"""
+        if cached:
+            return 0.0
+        cache_usage = cache_usage or {}
+        tokens = usage.prompt_tokens + usage.completion_tokens
+        cost = estimate_cost(
+            model, usage.prompt_tokens, usage.completion_tokens,
+            cache_usage.get('cache_read_tokens', 0), cache_usage.get('cache_write_tokens', 0)
+        )
+        with self._lock:
+            self.spent_tokens += tokens
+            self.spent_usd += cost
+            self.side_tokens += tokens
+            self.side_usd += cost
+        return cost
+
+    def restore(self, messages, side_spend=None):
+        """Count the spend recorded before a resume: turns from their metrics, other calls from `side_spend`"""
+        side_tokens, side_usd = side_spend or (0, 0.0)
+        with self._lock:
+            for msg in messages:
+                metrics = msg.get('metrics')
+                if metrics and not metrics['cached']:
+                    self.spent_tokens += metrics['prompt_tokens'] + metrics['completion_tokens']
+                    self.spent_usd += metrics['cost_usd']
+            self.spent_tokens += side_tokens
+            self.spent_usd += side_usd
+            self.side_tokens += side_tokens
+            self.side_usd += side_usd
+
+
+class ChargedChatCompletionClient(WrappedChatCompletionClient):
+    """Client for model calls that are not debate turns, e.g. rolling summaries; their cost counts against the budgets"""
+
+    def __init__(self, inner, telemetry):
+        super().__init__(inner)
+        self.telemetry = telemetry
+        self.model = model_name(inner)
+
+    async def create(self, messages, **kwargs):
+        cache_usage = {}
+        token = prompt_cache_usage.set(cache_usage)
+        try:
+            result = await self.inner.create(messages, **kwargs)
+        finally:
+            prompt_cache_usage.reset(token)
+        self.telemetry.charge(self.model, result.usage, result.cached, cache_usage)
+        return result
+
+
+class InstrumentedChatCompletionClient(WrappedChatCompletionClient):
+    """Per-agent view of a shared client that times every call for DebateTelemetry"""
+
+    def __init__(self, inner, telemetry, speaker):
+        super().__init__(inner)
+        self.telemetry = telemetry
+        self.speaker = speaker
+        self.model = model_name(inner)
+
+    async def create(self, messages, **kwargs):
+        queue_wait.set(0.0)
+        hedged.set(False)
+        routed_model.set(None)
+        cache_usage = {}
+        prompt_cache_usage.set(cache_usage)
+        started = time.perf_counter()
+        result = await self.inner.create(messages, **kwargs)
+        latency = time.perf_counter() - started
+        self.telemetry.record_call(
+            self.speaker, routed_model.get() or self.model, queue_wait.get(), latency, latency, result.cached, hedged.get(),
+            cache_usage
+        )
+        return result
+
+    async def create_stream(self, messages, **kwargs):
+        queue_wait.set(0.0)
+        hedged.set(False)
+        routed_model.set(None)
+        cache_usage = {}
+        prompt_cache_usage.set(cache_usage)
+        started = time.perf_counter()
+        first_token = None
+        async for chunk in self.inner.create_stream(messages, **kwargs):
+            if first_token is None:
+                first_token = time.perf_counter()
+            if isinstance(chunk, CreateResult):
+                finished = time.perf_counter()
+                self.telemetry.record_call(
+                    self.speaker,
+                    routed_model.get() or self.model,
+                    queue_wait.get(),
+                    first_token - started,
+                    finished - started,
+                    chunk.cached,
+                    hedged.get(),
+                    cache_usage,
+                )
+            yield chunk
+
+
+def summarize_metrics(messages):
+    """Debate totals over all messages that carry per-turn metrics"""
+    turns = [m['metrics'] for m in messages if m.get('metrics')]
+    if not turns:
+        return None
+    latencies = sorted(t['latency_s'] for t in turns)
+    novelty = [t['novelty'] for t in turns if 'novelty' in t]
+    return {
+        'turns': len(turns),
+        'cached_turns': sum(1 for t in turns if t['cached']),
+        'hedged_turns': sum(1 for t in turns if t.get('hedged')),
+        'avg_queue_wait_s': round(sum(t['queue_wait_s'] for t in turns) / len(turns), 3),
+        'avg_ttft_s': round(sum(t['ttft_s'] for t in turns) / len(turns), 3),
+        'p95_latency_s': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3),
+        'total_latency_s': round(sum(latencies), 3),
+        'prompt_tokens': sum(t['prompt_tokens'] for t in turns),
+        'completion_tokens': sum(t['completion_tokens'] for t in turns),
+        'cache_read_tokens': sum(t.get('cache_read_tokens', 0) for t in turns),
+        'cache_write_tokens': sum(t.get('cache_write_tokens', 0) for t in turns),
+        'cost_usd': round(sum(t['cost_usd'] for t in turns), 6),
+        # Prompt tokens avoided by the rolling context window (0 with full history)
+        'context_tokens_saved': sum(t.get('context_tokens_saved', 0) for t in turns),
+        # Mean novelty of the debaters' turns (1 = entirely new, 0 = pure restatement)
+        'avg_novelty': round(sum(novelty) / len(novelty), 3) if novelty else None,
+    }
+
+
+def metrics_jsonl(messages, topic=""):
+    """One JSON object per agent turn"""
+    lines = []
+    for turn, msg in enumerate(messages, 1):
+        if msg.get('metrics'):
+            record = {'topic': topic, 'turn': turn, 'speaker': msg['speaker'], 'timestamp': msg['timestamp']}
+            record.update(msg['metrics'])
+            lines.append(json.dumps(record))
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def metrics_prometheus(messages):
+    """Prometheus text exposition of per-speaker debate totals"""
+    totals = {}
+    for msg in messages:
+        metrics = msg.get('metrics')
+        if not metrics:
+            continue
+        speaker = totals.setdefault(msg['speaker'], {
+            'turns': 0, 'latency': 0.0, 'ttft': 0.0, 'queue_wait': 0.0,
+            'prompt_tokens': 0, 'completion_tokens': 0, 'cache_read_tokens': 0, 'cache_write_tokens': 0,
+            'cost': 0.0, 'hedged': 0,
+        })
+        speaker['turns'] += 1
+        speaker['latency'] += metrics['latency_s']
+        speaker['ttft'] += metrics['ttft_s']
+        speaker['queue_wait'] += metrics['queue_wait_s']
+        speaker['prompt_tokens'] += metrics['prompt_tokens']
+        speaker['completion_tokens'] += metrics['completion_tokens']
+        speaker['cache_read_tokens'] += metrics.get('cache_read_tokens', 0)
+        speaker['cache_write_tokens'] += metrics.get('cache_write_tokens', 0)
+        speaker['cost'] += metrics['cost_usd']
+        speaker['hedged'] += 1 if metrics.get('hedged') else 0
+
+    series = [
+        ('debate_turns_total', 'counter', 'Agent turns', 'turns'),
+        ('debate_turn_latency_seconds_sum', 'counter', 'Total model call latency', 'latency'),
+        ('debate_turn_ttft_seconds_sum', 'counter', 'Total time to first token', 'ttft'),
+        ('debate_turn_queue_wait_seconds_sum', 'counter', 'Total time queued behind the rate limiter', 'queue_wait'),
+        ('debate_prompt_tokens_total', 'counter', 'Prompt tokens', 'prompt_tokens'),
+        ('debate_completion_tokens_total', 'counter', 'Completion tokens', 'completion_tokens'),
+        ('debate_prompt_cache_read_tokens_total', 'counter', 'Prompt tokens read from the prompt cache', 'cache_read_tokens'),
+        ('debate_prompt_cache_write_tokens_total', 'counter', 'Prompt tokens written to the prompt cache', 'cache_write_tokens'),
+        ('debate_cost_usd_total', 'counter', 'Estimated cost in USD', 'cost'),
+        ('debate_hedged_turns_total', 'counter', 'Turns that needed a hedged backup request', 'hedged'),
+    ]
+    lines = []
+    for name, kind, help_text, key in series:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for speaker, values in totals.items():
+            lines.append(f'{name}{{speaker="{speaker}"}} {round(values[key], 6)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,176 @@
+import re
+import time
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.messages import BaseChatMessage, StopMessage
+
+from novelty import NoveltyTracker
+
+VERDICT_PATTERN = re.compile(r"overall winner\W*(?:is\W*)?(john|jack)\b", re.IGNORECASE)
+VERDICT_REQUEST = (
+    "Time is up. Close the debate now: in under 40 words, summarize both sides and "
+    "announce 'OVERALL WINNER: John' or 'OVERALL WINNER: Jack' based on the arguments presented."
+)
+REDIRECT_NOTE = (
+    "Moderator note: John and Jack are repeating earlier points. "
+    "In your next turn, steer them to an aspect of the topic nobody has raised yet."
+)
+
+
+def find_verdict(content):
+    """Name of the winner announced in `content`, or None"""
+    match = VERDICT_PATTERN.search(str(content))
+    return match.group(1).capitalize() if match else None
+
+
+class VerdictTermination(TerminationCondition):
+    """Stop as soon as the host announces the overall winner"""
+
+    def __init__(self, host="Host"):
+        self.host = host
+        self._terminated = False
+
+    @property
+    def terminated(self):
+        return self._terminated
+
+    async def __call__(self, messages):
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if isinstance(message, BaseChatMessage) and message.source == self.host:
+                winner = find_verdict(message.content)
+                if winner:
+                    self._terminated = True
+                    return StopMessage(content=f"Host declared the winner: {winner}", source="VerdictTermination")
+        return None
+
+    async def reset(self):
+        self._terminated = False
+
+
+class DeadlineTermination(TerminationCondition):
+    """Stop once `deadline_s` seconds have passed since `started` (a time.monotonic() reading)
+
+    Unlike autogen's TimeoutTermination the clock does not restart when the
+    condition is rebuilt or reset, so a debate retried after a failure
+    still ends at its original deadline.
+    """
+
+    def __init__(self, deadline_s, started=None):
+        self.deadline_s = deadline_s
+        self.started = time.monotonic() if started is None else started
+        self._terminated = False
+
+    @property
+    def terminated(self):
+        return self._terminated
+
+    async def __call__(self, messages):
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        if time.monotonic() - self.started < self.deadline_s:
+            return None
+        self._terminated = True
+        return StopMessage(content=f"Timeout of {self.deadline_s} seconds reached", source="DeadlineTermination")
+
+    async def reset(self):
+        self._terminated = False
+
+
+class StagnationTermination(TerminationCondition):
+    """Stop when the debaters keep repeating themselves
+
+    Each debater turn is scored by a NoveltyTracker (which may be shared with
+    the caller to read the novelty curve); `patience` stale turns in a row
+    end the debate.
+    """
+
+    def __init__(self, tracker=None, patience=2):
+        self.tracker = tracker or NoveltyTracker()
+        self.patience = patience
+        self.stale_turns = 0
+        self._terminated = False
+
+    @property
+    def terminated(self):
+        return self._terminated
+
+    async def __call__(self, messages):
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if not isinstance(message, BaseChatMessage):
+                continue
+            score = self.tracker.observe(message)
+            if score is None:
+                continue
+            self.stale_turns = self.stale_turns + 1 if score['stale'] else 0
+            if self.stale_turns >= self.patience:
+                self._terminated = True
+                return StopMessage(
+                    content=f"No new arguments in the last {self.stale_turns} turns",
+                    source="StagnationTermination",
+                )
+        return None
+
+    async def reset(self):
+        # The tracker keeps its history so the novelty curve survives the end of the run
+        self.stale_turns = 0
+        self._terminated = False
+
+
+class BudgetTermination(TerminationCondition):
+    """Stop once the debate has spent `max_tokens` tokens (prompt + completion) or `max_cost_usd` dollars
+
+    Spend is read from the debate's DebateTelemetry, which has already
+    recorded the turns passed in and the rolling-summary calls made for
+    them. Calls answered from the response cache cost nothing there, and
+    prompt-cache reads are priced at their discount, so the budgets track
+    what the API actually bills.
+    """
+
+    def __init__(self, telemetry, max_tokens=None, max_cost_usd=None):
+        self.telemetry = telemetry
+        self.max_tokens = max_tokens
+        self.max_cost_usd = max_cost_usd
+        self._terminated = False
+
+    @property
+    def terminated(self):
+        return self._terminated
+
+    async def __call__(self, messages):
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        spent_tokens, spent_usd = self.telemetry.spent_tokens, self.telemetry.spent_usd
+        if self.max_tokens and spent_tokens >= self.max_tokens:
+            reason = f"Token budget of {self.max_tokens} reached ({spent_tokens} tokens)"
+        elif self.max_cost_usd and spent_usd >= self.max_cost_usd:
+            reason = f"Cost ceiling of ${self.max_cost_usd:.2f} reached (${spent_usd:.4f})"
+        else:
+            return None
+        self._terminated = True
+        return StopMessage(content=reason, source="BudgetTermination")
+
+    async def reset(self):
+        self._terminated = False
+
+
+def debate_termination(token_budget=None, deadline_s=None, stop_when_stale=True, novelty=None,
+                       cost_budget_usd=None, telemetry=None, started=None):
+    """Host verdict OR token budget OR cost ceiling OR wall-clock deadline OR no new arguments, whichever fires first
+
+    `novelty` is an optional NoveltyTracker to score turns with. The budgets
+    need the debate's DebateTelemetry, which must see each turn before
+    this condition does. The deadline counts from `started`
+    (time.monotonic(), default now).
+    """
+    condition = VerdictTermination()
+    if token_budget or cost_budget_usd:
+        condition = condition | BudgetTermination(telemetry, token_budget, cost_budget_usd)
+    if deadline_s:
+        condition = condition | DeadlineTermination(deadline_s, started)
+    if stop_when_stale:
+        condition = condition | StagnationTermination(novelty)
+    return condition
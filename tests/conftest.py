@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never touch the real debate history
+os.environ.setdefault('DEBATE_DB', ':memory:')
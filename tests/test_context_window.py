@@ -0,0 +1,57 @@
+import asyncio
+
+from context_window import RollingSummary
+from fake_model import FakeChatCompletionClient, LatencyModel
+from telemetry import ChargedChatCompletionClient, DebateTelemetry
+
+
+def summarizer():
+    prompts = []
+
+    def reply(messages):
+        prompts.append(messages[-1].content)
+        return f"summary #{len(prompts)}"
+
+    client = FakeChatCompletionClient(replies=[reply], latency=LatencyModel('fixed', 0.0), tokens_per_second=1e6)
+    return RollingSummary(client), prompts
+
+
+def test_same_turns_share_one_summary():
+    summary, prompts = summarizer()
+    turns = ["Host: welcome", "John: for", "Jack: against"]
+    first = asyncio.run(summary.summary_of(turns))
+    assert asyncio.run(summary.summary_of(list(turns))) == first
+    assert len(prompts) == 1
+
+
+def test_same_count_in_another_order_gets_its_own_summary():
+    summary, prompts = summarizer()
+    # The debaters of a parallel round and the Host see the same turns in a different order
+    debaters = asyncio.run(summary.summary_of(["Host: welcome", "John: for", "Jack: against"]))
+    host = asyncio.run(summary.summary_of(["Host: welcome", "Jack: against", "John: for"]))
+    assert host != debaters
+    assert len(prompts) == 2
+
+
+def test_longer_history_builds_on_the_cached_prefix():
+    summary, prompts = summarizer()
+    asyncio.run(summary.summary_of(["Host: welcome", "John: for"]))
+    asyncio.run(summary.summary_of(["Host: welcome", "John: for", "Jack: against"]))
+    assert "summary #1" in prompts[1]
+    assert "Jack: against" in prompts[1] and "John: for" not in prompts[1]
+
+
+def test_summary_calls_count_against_the_debate_budget():
+    telemetry = DebateTelemetry()
+    client = FakeChatCompletionClient(replies=["a summary"], latency=LatencyModel('fixed', 0.0), tokens_per_second=1e6)
+    summary = RollingSummary(ChargedChatCompletionClient(client, telemetry))
+    asyncio.run(summary.summary_of(["Host: welcome", "John: for"]))
+    asyncio.run(summary.summary_of(["Host: welcome", "John: for"]))
+    usage = client.total_usage()
+    assert telemetry.spent_tokens == usage.prompt_tokens + usage.completion_tokens == summary.summary_tokens
+    assert telemetry.spent_usd == telemetry.side_usd > 0
+
+    # A resumed debate starts from the spend its checkpoint recorded
+    resumed = DebateTelemetry()
+    resumed.restore([], [telemetry.side_tokens, telemetry.side_usd])
+    assert (resumed.spent_tokens, resumed.spent_usd) == (telemetry.spent_tokens, telemetry.spent_usd)
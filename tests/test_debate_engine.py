@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+os.environ.setdefault('DEBATE_FAKE_MODEL', '1')
+
+from checkpoint import DebateInterrupted
+from debate_engine import stream_debate
+from fake_model import FakeAPIError, FakeChatCompletionClient, LatencyModel, default_reply
+from model_pool import get_model_pool
+
+
+def failing_call(*numbers):
+    """Fake-model factory whose calls with these (1-based) numbers fail with a non-retryable error"""
+    calls = {'count': 0}
+
+    def reply(messages):
+        calls['count'] += 1
+        if calls['count'] in numbers:
+            raise FakeAPIError(400)
+        return default_reply(messages, calls['count'])
+
+    def create(model="fake-claude", **create_args):
+        return FakeChatCompletionClient(
+            model=model, replies=[reply], latency=LatencyModel('fixed', 0.0), tokens_per_second=1e6, **create_args
+        )
+    return create
+
+
+def run_failing_debate(failing_calls, debate_format="round_robin", **options):
+    pool = get_model_pool()
+    fake_factory = pool.fake_factory
+    pool.fake_factory = failing_call(*failing_calls)
+    seen, rollbacks = [], []
+
+    def on_rollback(count):
+        rollbacks.append(count)
+        del seen[count:]
+
+    try:
+        messages, _ = asyncio.run(stream_debate(
+            "Should cities ban cars?", 5, on_message=seen.append, on_rollback=on_rollback, fresh=True,
+            stop_when_stale=False, debate_format=debate_format, **options
+        ))
+    finally:
+        pool.fake_factory = fake_factory
+    return messages, seen, rollbacks
+
+
+def test_step_failing_before_the_first_checkpoint_rolls_back_the_task_message():
+    # The Host's opening call fails after the task message has been reported
+    messages, seen, rollbacks = run_failing_debate([1])
+    assert rollbacks == [0]
+    assert [m['content'] for m in seen] == [m['content'] for m in messages]
+    assert sum(1 for m in messages if m['speaker'] == 'user') == 1
+
+
+def test_failed_parallel_step_is_rolled_back_to_its_checkpoint():
+    # John's and Jack's answers to the opening are one step; the second of them fails
+    messages, seen, rollbacks = run_failing_debate([3], "parallel")
+    assert rollbacks == [2]
+    assert [m['content'] for m in seen] == [m['content'] for m in messages]
+    assert len({(m['speaker'], m['content']) for m in messages}) == len(messages)
+
+
+def test_resuming_with_the_budget_already_spent_stops_at_once():
+    try:
+        run_failing_debate([3], resume_attempts=0)
+    except DebateInterrupted as e:
+        interrupted = e
+    else:
+        raise AssertionError("expected the failed turn to interrupt the debate")
+    assert len(interrupted.messages) == 3
+
+    # The turns before the interruption already spent more than the whole budget
+    messages, stop_reason = asyncio.run(stream_debate(
+        "Should cities ban cars?", 5, fresh=True, stop_when_stale=False, token_budget=1,
+        debate_id=interrupted.debate_id, resume=True, resume_attempts=0,
+    ))
+    assert stop_reason.startswith("Token budget of 1 reached")
+    # Only the Host's closing verdict follows the resumed turns
+    assert [m['speaker'] for m in messages[3:]] == ["Host"]
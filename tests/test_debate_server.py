@@ -0,0 +1,51 @@
+import json
+
+from tornado.testing import AsyncHTTPTestCase
+
+from debate_server import DebateService, debate_options, last_seen_index, make_app
+
+
+class DebateRequestValidationTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.service = DebateService()
+        return make_app(self.service)
+
+    def post_debate(self, **body):
+        return self.fetch("/debates", method="POST", body=json.dumps(dict({'topic': "Cats or dogs?"}, **body)))
+
+    def test_string_booleans_are_rejected(self):
+        response = self.post_debate(fresh="false")
+        assert response.code == 400
+        assert self.post_debate(stop_when_stale=1).code == 400
+        assert not self.service.debates
+
+    def test_unknown_debate_format_is_rejected(self):
+        assert self.post_debate(debate_format="fishbowl").code == 400
+        assert not self.service.debates
+
+    def test_numeric_options_must_be_in_range_numbers(self):
+        for option, value in [
+            ('context_window', -4), ('context_window', 0), ('context_window', 3.9), ('context_window', "6"),
+            ('deadline_s', -1), ('deadline_s', 0), ('token_budget', True), ('cost_budget_usd', -0.5),
+            ('max_completion_tokens', 10**6), ('max_turns', 3.5), ('max_turns', 500),
+        ]:
+            response = self.post_debate(**{option: value})
+            assert response.code == 400, (option, value)
+            assert option in json.loads(response.body)['error']
+        # JSON's non-finite extensions are not numbers either
+        response = self.fetch("/debates", method="POST", body='{"topic": "Cats or dogs?", "deadline_s": Infinity}')
+        assert response.code == 400
+        assert not self.service.debates
+
+
+def test_valid_options_keep_their_types():
+    assert debate_options({'context_window': 6.0, 'deadline_s': 90, 'cost_budget_usd': 1, 'fresh': False}) == {
+        'context_window': 6, 'deadline_s': 90.0, 'cost_budget_usd': 1.0, 'fresh': False
+    }
+    assert isinstance(debate_options({'context_window': 6.0})['context_window'], int)
+
+
+def test_unparsable_last_event_id_means_no_messages_seen():
+    assert last_seen_index("7") == 7
+    assert last_seen_index("junk") == -1
+    assert last_seen_index(None) == -1
@@ -0,0 +1,80 @@
+from debate_store import DebateStore
+
+
+def turn(speaker, content, timestamp="12:00:00", metrics=None):
+    msg = {'speaker': speaker, 'content': content, 'timestamp': timestamp}
+    if metrics:
+        msg['metrics'] = metrics
+    return msg
+
+
+def test_messages_round_trip_and_retried_turns_overwrite():
+    store = DebateStore(":memory:")
+    store.start_debate("d1", "Should AI be regulated?")
+    store.add_message("d1", 0, turn("Host", "Welcome."))
+    store.add_message("d1", 1, turn("John", "First try.", metrics={'tokens': 5}))
+    store.add_message("d1", 1, turn("John", "Second try.", metrics={'tokens': 7}))
+    assert store.get_messages("d1") == [
+        turn("Host", "Welcome."), turn("John", "Second try.", metrics={'tokens': 7})
+    ]
+    assert store.get_messages("d1", offset=1, limit=1)[0]['content'] == "Second try."
+    assert store.get_debate("d1")['message_count'] == 2
+
+
+def test_truncate_drops_rolled_back_turns_from_search():
+    store = DebateStore(":memory:")
+    store.start_debate("d1", "Topic")
+    for seq, word in enumerate(["alpha", "bravo", "charlie"]):
+        store.add_message("d1", seq, turn("John", word))
+    store.truncate("d1", 1)
+    assert [m['content'] for m in store.get_messages("d1")] == ["alpha"]
+    assert store.get_debate("d1")['message_count'] == 1
+    assert store.list_debates(search="charlie") == []
+    assert [d['debate_id'] for d in store.list_debates(search="alpha")] == ["d1"]
+
+
+def test_resumed_debate_keeps_its_start_time():
+    store = DebateStore(":memory:")
+    store.start_debate("d1", "Topic")
+    started = store.get_debate("d1")['started_at']
+    store.finish_debate("d1", "failed", stop_reason="error")
+    store.start_debate("d1", "Topic")
+    debate = store.get_debate("d1")
+    assert debate['status'] == "running" and debate['finished_at'] is None and debate['started_at'] == started
+
+
+def test_list_pages_newest_first_and_filters():
+    store = DebateStore(":memory:")
+    for i, (topic, winner) in enumerate([("Nuclear power", "John"), ("Nuclear_waste", "Jack"), ("Remote work", "John")]):
+        store.start_debate(f"d{i}", topic)
+        store.db.execute("UPDATE debates SET started_at = ? WHERE debate_id = ?", (1000.0 + i, f"d{i}"))
+        store.add_message(f"d{i}", 0, turn("John", f"Opening {i} with \"quotes\" and OR words"))
+        store.finish_debate(f"d{i}", "completed", winner=winner)
+
+    first = store.list_debates(limit=2)
+    assert [d['debate_id'] for d in first] == ["d2", "d1"]
+    last = first[-1]
+    assert [d['debate_id'] for d in store.list_debates(limit=2, before=(last['started_at'], last['debate_id']))] == ["d0"]
+
+    assert [d['debate_id'] for d in store.list_debates(topic="nuclear")] == ["d1", "d0"]
+    # _ is a literal underscore in a topic prefix, not a LIKE wildcard
+    assert [d['debate_id'] for d in store.list_debates(topic="Nuclear_")] == ["d1"]
+    assert [d['debate_id'] for d in store.list_debates(winner="John")] == ["d2", "d0"]
+    # Search words are matched literally, so FTS5 operators and quotes are not syntax errors
+    assert [d['debate_id'] for d in store.list_debates(search='opening 1 "quotes" OR')] == ["d1"]
+
+
+def test_common_search_words_walk_debates_instead_of_the_index():
+    store = DebateStore(":memory:", search_scan_limit=2)
+    for i in range(4):
+        store.start_debate(f"d{i}", "Topic")
+        store.db.execute("UPDATE debates SET started_at = ? WHERE debate_id = ?", (1000.0 + i, f"d{i}"))
+        store.add_message(f"d{i}", 0, turn("John", "common ground"))
+    assert [d['debate_id'] for d in store.list_debates(limit=3, search="common")] == ["d3", "d2", "d1"]
+
+
+def test_verdicts_are_cached_by_transcript_hash():
+    store = DebateStore(":memory:")
+    assert store.get_verdict("abc") is None
+    store.put_verdict("abc", {'winner': "Jack", 'scores': {'John': 20.0, 'Jack': 24.5}})
+    assert store.get_verdict("abc") == {'winner': "Jack", 'scores': {'John': 20.0, 'Jack': 24.5}}
@@ -0,0 +1,93 @@
+import asyncio
+
+from autogen_core.models import CreateResult, UserMessage
+
+from fake_model import FakeChatCompletionClient
+from hedging import HedgedChatCompletionClient, Hedger, hedged
+from prompt_cache import fold_cache_usage, prompt_cache_usage
+
+
+class ScriptedLatency:
+    """Time to first token of each call in turn"""
+
+    def __init__(self, *ttfts):
+        self.ttfts = list(ttfts)
+
+    def sample(self, rng):
+        return self.ttfts.pop(0)
+
+
+def reporting_cache_usage(read):
+    # Reports usage the way the transport does, to whatever holder the request's context has
+    def reply(messages):
+        fold_cache_usage({'input_tokens': 10, 'cache_read_input_tokens': read})
+        return f"read {read}"
+    return reply
+
+
+def hedged_client(*ttfts, replies=None, deadline_s=None):
+    inner = FakeChatCompletionClient(latency=ScriptedLatency(*ttfts), tokens_per_second=1e6, replies=replies)
+    hedger = Hedger(default_threshold=0.05, max_hedge_rate=1.0, deadline_s=deadline_s)
+    return HedgedChatCompletionClient(inner, hedger), inner
+
+
+async def stream_result(client):
+    async for chunk in client.create_stream([UserMessage(content="hi", source="user")]):
+        if isinstance(chunk, CreateResult):
+            return chunk
+
+
+def test_slow_call_is_hedged_and_the_backup_wins():
+    client, inner = hedged_client(1.0, 0.0)
+
+    async def run():
+        result = await stream_result(client)
+        return result, hedged.get()
+
+    result, was_hedged = asyncio.run(run())
+    assert was_hedged
+    assert inner.calls == 2
+    assert client.hedger.stats()['hedge_wins'] == 1
+
+
+def test_fast_call_is_not_hedged():
+    client, inner = hedged_client(0.0)
+    asyncio.run(stream_result(client))
+    assert inner.calls == 1
+    assert client.hedger.stats()['hedges'] == 0
+
+
+def test_silent_stream_fails_at_the_deadline():
+    client, inner = hedged_client(1.0, 1.0, deadline_s=0.1)
+    try:
+        asyncio.run(stream_result(client))
+    except asyncio.TimeoutError:
+        pass
+    else:
+        raise AssertionError("expected the first-token deadline to fail the call")
+    assert client.hedger.stats()['deadline_misses'] == 1
+
+
+def test_slow_create_is_neither_hedged_nor_held_to_the_first_token_deadline():
+    # A whole completion (judge, summary) legitimately takes longer than any first token
+    client, inner = hedged_client(0.3, deadline_s=0.1)
+    result = asyncio.run(client.create([UserMessage(content="hi", source="user")]))
+    assert result.content and inner.calls == 1
+    stats = client.hedger.stats()
+    assert stats['calls'] == 0 and stats['hedges'] == 0 and stats['deadline_misses'] == 0
+    # Nor does its latency reach the first-token samples the threshold comes from
+    assert not client.hedger.samples
+
+
+def test_only_the_winner_reports_prompt_cache_usage():
+    client, inner = hedged_client(0.5, 0.0, replies=[reporting_cache_usage(100), reporting_cache_usage(7)])
+
+    async def run():
+        owner = {}
+        prompt_cache_usage.set(owner)
+        result = await stream_result(client)
+        return result, owner
+
+    result, owner = asyncio.run(run())
+    assert result.content == "read 7"
+    assert owner == {'cache_read_tokens': 7, 'cache_write_tokens': 0}
@@ -0,0 +1,53 @@
+import json
+
+from judging import aggregate, parse_scorecard
+
+
+def card(john, jack, winner=None):
+    return {'scores': {'John': john, 'Jack': jack}, 'winner': winner}
+
+
+def test_scorecard_totals_the_rubric_across_rounds():
+    reply = "Here is my verdict:\n" + json.dumps({
+        'rounds': [
+            {'round': 1, 'John': {'logic': 7, 'evidence': 6, 'rebuttal': 5}, 'Jack': {'logic': 6, 'evidence': 7, 'rebuttal': 6}},
+            {'round': 2, 'John': {'logic': 8, 'evidence': 8, 'rebuttal': 8}, 'Jack': {'logic': 5}},
+        ],
+        'winner': "john",
+        'reason': "Stronger rebuttals.",
+    })
+    parsed = parse_scorecard(reply)
+    assert parsed == {'scores': {'John': 42.0, 'Jack': 24.0}, 'winner': "John", 'reason': "Stronger rebuttals."}
+
+
+def test_malformed_scorecards_are_unreadable():
+    assert parse_scorecard("John won, clearly.") is None
+    assert parse_scorecard('{"rounds": [{"John": {"logic": 7}') is None
+    assert parse_scorecard('{"rounds": [{"John": {"logic": "seven"}}]}') is None
+    assert parse_scorecard('{"rounds": [{"John": [7, 6, 5]}]}') is None
+
+
+def test_unknown_winner_falls_back_to_scores_or_none():
+    lopsided = '{"rounds": [{"John": {"logic": 3}, "Jack": {"logic": 9}}], "winner": "the audience"}'
+    assert parse_scorecard(lopsided)['winner'] == "Jack"
+    level = '{"rounds": [{"John": {"logic": 5}, "Jack": {"logic": 5}}]}'
+    assert parse_scorecard(level)['winner'] is None
+
+
+def test_score_and_vote_break_each_others_ties():
+    # Two judges vote Jack by a hair, one votes John by a mile: scores favour John
+    cards = [card(20, 21, "Jack"), card(20, 21, "Jack"), card(30, 10, "John")]
+    assert aggregate(cards, "score")['winner'] == "John"
+    assert aggregate(cards, "vote")['winner'] == "Jack"
+
+    tied_scores = [card(20, 25, "Jack"), card(25, 20, "John"), card(22, 22, "Jack")]
+    assert aggregate(tied_scores, "score")['winner'] == "Jack"
+
+    tied_votes = [card(20, 25, "Jack"), card(27, 20, "John")]
+    assert aggregate(tied_votes, "vote")['winner'] == "John"
+
+
+def test_a_full_tie_or_an_empty_panel_has_no_winner():
+    assert aggregate([card(20, 25, "Jack"), card(25, 20, "John")])['winner'] is None
+    empty = aggregate([])
+    assert empty['winner'] is None and empty['scores'] == {'John': 0.0, 'Jack': 0.0}
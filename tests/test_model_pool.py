@@ -0,0 +1,65 @@
+import asyncio
+
+from autogen_core.models import UserMessage
+
+from fake_anthropic import FakeAnthropicServer
+from fake_model import FakeChatCompletionClient
+from model_pool import ModelClientPool
+from prompt_cache import PromptCachingTransport
+
+
+def test_same_settings_share_one_client():
+    pool = ModelClientPool()
+    first = pool.get("claude-3-5-sonnet-20241022", "key", max_tokens=300)
+    assert pool.get("claude-3-5-sonnet-20241022", "key", max_tokens=300) is first
+    assert pool.get("claude-3-5-sonnet-20241022", "key", max_tokens=120) is not first
+    assert pool.get("claude-3-5-haiku-20241022", "key", max_tokens=300) is not first
+    stats = pool.stats()
+    assert (stats['hits'], stats['creations'], stats['clients']) == (1, 3, 3)
+    asyncio.run(pool.close())
+    assert pool.stats()['clients'] == 0
+    assert pool.get("claude-3-5-sonnet-20241022", "key", max_tokens=300) is not first
+
+
+def transport(pool):
+    return next(iter(pool._http_clients.values()))._transport
+
+
+def test_prompt_caching_decides_the_transport():
+    cached, plain = ModelClientPool(prompt_caching=True), ModelClientPool(prompt_caching=False)
+    cached.get("claude-3-5-sonnet-20241022", "key")
+    plain.get("claude-3-5-sonnet-20241022", "key")
+    assert isinstance(transport(cached), PromptCachingTransport)
+    assert not isinstance(transport(plain), PromptCachingTransport)
+
+
+def test_fake_factory_hands_out_a_fresh_client_every_time():
+    pool = ModelClientPool()
+    pool.fake_factory = lambda model, **create_args: FakeChatCompletionClient(model=model, **create_args)
+    first = pool.get("claude-3-5-sonnet-20241022", "key", max_tokens=50)
+    assert isinstance(first, FakeChatCompletionClient) and first._create_args['max_tokens'] == 50
+    assert pool.get("claude-3-5-sonnet-20241022", "key", max_tokens=50) is not first
+    assert pool.stats()['clients'] == 0
+
+
+def test_calls_reuse_the_warm_connection(monkeypatch):
+    server = FakeAnthropicServer()
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', server.start())
+    pool = ModelClientPool()
+
+    async def run():
+        try:
+            for _ in range(3):
+                client = pool.get("claude-3-5-sonnet-20241022", "offline-test", max_retries=0, max_tokens=20)
+                await client.create([UserMessage(content="Ready?", source="user")])
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        server.stop()
+    assert len(server.api.requests) == 3
+    assert stats['creations'] == 1 and stats['hits'] == 2
+    assert stats['idle_connections'] == 1 and stats['in_use_connections'] == 0
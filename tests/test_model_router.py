@@ -0,0 +1,85 @@
+import asyncio
+
+from autogen_core.models import CreateResult, UserMessage
+
+from fake_model import FakeChatCompletionClient, LatencyModel
+from model_router import FAST_MODEL, STRONG_MODEL, ModelRouter, RoutedChatCompletionClient, routed_model
+from rate_limiter import queue_wait
+
+
+class QueuedClient(FakeChatCompletionClient):
+    """Fake model that first sits `queued_s` in a rate-limiter queue, reported the way the limiter does"""
+
+    def __init__(self, model, queued_s=0.0, ttft=0.0):
+        super().__init__(model=model, latency=LatencyModel('fixed', ttft), tokens_per_second=1e6)
+        self.queued_s = queued_s
+
+    async def create_stream(self, messages, **kwargs):
+        await asyncio.sleep(self.queued_s)
+        queue_wait.set(queue_wait.get() + self.queued_s)
+        async for chunk in super().create_stream(messages, **kwargs):
+            yield chunk
+
+
+async def stream(client):
+    async for chunk in client.create_stream([UserMessage(content="hi", source="user")]):
+        if isinstance(chunk, CreateResult):
+            return chunk
+
+
+def test_roles_map_to_tiers_and_everyone_is_strong_while_disabled():
+    router = ModelRouter()
+    assert router.model_for("Host") == FAST_MODEL
+    assert router.model_for("John") == STRONG_MODEL
+    assert router.model_for("Someone new") == STRONG_MODEL
+    assert router.fallback_for("Host") == STRONG_MODEL and router.fallback_for("Jack") == FAST_MODEL
+    router.enabled = False
+    assert router.model_for("Host") == STRONG_MODEL
+    assert ModelRouter(fallback=False).fallback_for("John") is None
+
+
+def test_slow_primary_falls_back_but_is_still_probed():
+    router = ModelRouter(slow_ttft_s=1.0, probe_every=3, alpha=1.0)
+    assert router.choose(STRONG_MODEL, FAST_MODEL) == STRONG_MODEL
+    router.observe(STRONG_MODEL, 3.0)
+    router.observe(FAST_MODEL, 0.5)
+    picks = [router.choose(STRONG_MODEL, FAST_MODEL) for _ in range(5)]
+    # Every 3rd call (the 3rd and 6th overall) still probes the slow primary
+    assert picks == [FAST_MODEL, STRONG_MODEL, FAST_MODEL, FAST_MODEL, STRONG_MODEL]
+    assert router.stats()['fallbacks'] == 3
+
+    router.observe(STRONG_MODEL, 0.2)
+    assert router.choose(STRONG_MODEL, FAST_MODEL) == STRONG_MODEL
+
+
+def test_no_fallback_when_the_other_tier_is_slower_still():
+    router = ModelRouter(slow_ttft_s=1.0, alpha=1.0)
+    router.observe(STRONG_MODEL, 3.0)
+    router.observe(FAST_MODEL, 4.0)
+    assert router.choose(STRONG_MODEL, FAST_MODEL) == STRONG_MODEL
+    assert router.choose(STRONG_MODEL, None) == STRONG_MODEL
+
+
+def test_streamed_ttft_excludes_rate_limiter_queueing():
+    router = ModelRouter(slow_ttft_s=0.2, alpha=1.0)
+    client = RoutedChatCompletionClient(
+        QueuedClient(STRONG_MODEL, queued_s=0.3), QueuedClient(FAST_MODEL), router
+    )
+
+    async def run():
+        await stream(client)
+        return routed_model.get()
+
+    assert asyncio.run(run()) == STRONG_MODEL
+    assert router.ttft[STRONG_MODEL] < 0.1
+    assert asyncio.run(run()) == STRONG_MODEL
+    assert router.stats()['fallbacks'] == 0
+
+
+def test_whole_completions_do_not_feed_the_ttft_average():
+    router = ModelRouter(alpha=1.0)
+    client = RoutedChatCompletionClient(QueuedClient(STRONG_MODEL, ttft=0.1), QueuedClient(FAST_MODEL), router)
+    asyncio.run(client.create([UserMessage(content="hi", source="user")]))
+    assert router.ttft == {}
+    asyncio.run(stream(client))
+    assert STRONG_MODEL in router.ttft
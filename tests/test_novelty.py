@@ -0,0 +1,39 @@
+from autogen_agentchat.messages import TextMessage
+
+from novelty import NoveltyTracker, hashed_vector
+
+
+def say(speaker, text):
+    return TextMessage(content=text, source=speaker)
+
+
+def test_repeated_turn_is_stale_and_a_new_one_is_not():
+    tracker = NoveltyTracker()
+    opening = tracker.observe(say("John", "Regulation protects consumers from unsafe products."))
+    assert opening['novelty'] == 1.0 and not opening['stale']
+    repeat = tracker.observe(say("John", "Regulation protects consumers from unsafe products!"))
+    assert repeat['novelty'] < 0.05 and repeat['stale']
+    fresh = tracker.observe(say("John", "Small firms cannot afford compliance lawyers or audits."))
+    assert fresh['novelty'] > 0.8 and not fresh['stale']
+
+
+def test_echoing_the_opponent_counts_as_repetition():
+    tracker = NoveltyTracker()
+    tracker.observe(say("Jack", "Innovation slows down when every model needs a licence."))
+    echo = tracker.observe(say("John", "Innovation slows down when every model needs a licence."))
+    assert echo['opponent_similarity'] > 0.99 and echo['self_similarity'] == 0.0
+    assert echo['stale']
+
+
+def test_each_message_is_scored_once_and_other_speakers_are_ignored():
+    tracker = NoveltyTracker()
+    message = say("Jack", "Enforcement costs fall on taxpayers.")
+    assert tracker.observe(message) is tracker.observe(message)
+    assert tracker.observe(say("Host", "Welcome to the debate.")) is None
+    assert tracker.curve == [("Jack", 1.0)]
+
+
+def test_vectors_are_normalised_and_empty_text_is_zero():
+    vector = hashed_vector("one two three")
+    assert abs(float(vector @ vector) - 1.0) < 1e-5
+    assert not hashed_vector("").any()
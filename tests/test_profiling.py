@@ -0,0 +1,68 @@
+import json
+import marshal
+import time
+
+from profiling import Profile, ProfileStore, current_profile, phase
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_phases_are_free_outside_a_profiled_run():
+    with phase('rendering'):
+        busy(0.001)
+    assert current_profile.get() is None
+
+
+def test_breakdown_puts_unphased_time_in_other():
+    profile = Profile("rerun", kind="rerun")
+    with profile.run():
+        with phase('agent_setup'):
+            busy(0.02)
+        with phase('rendering'):
+            busy(0.01)
+        with phase('custom'):
+            pass
+        busy(0.02)
+    phases = profile.breakdown()
+    assert list(phases) == ['agent_setup', 'rendering', 'custom', 'other']
+    assert phases['agent_setup'] >= 0.02 and phases['rendering'] >= 0.01
+    assert phases['other'] >= 0.015
+    assert profile.summary()['total_s'] >= 0.05
+
+
+def test_hot_spots_and_exports_come_from_cprofile():
+    profile = Profile("debate")
+    with profile.run():
+        busy(0.02)
+    top = profile.hotspots(limit=3, sort='cumtime')
+    assert any('busy' in row['function'] for row in top)
+    assert marshal.loads(profile.prof_bytes()) == profile.stats
+    speedscope = json.loads(profile.speedscope())
+    names = {frame['name'] for frame in speedscope['shared']['frames']}
+    assert 'busy' in names
+    sampled = speedscope['profiles'][0]
+    assert len(sampled['samples']) == len(sampled['weights'])
+    assert 0 < sampled['endValue'] <= profile.total_s + 0.01
+
+
+def test_nested_run_on_the_same_thread_keeps_only_phases():
+    outer, inner = Profile("outer"), Profile("inner")
+    with outer.run():
+        with inner.run():
+            with phase('transcript'):
+                busy(0.005)
+    assert outer.stats and inner.stats is None
+    assert inner.hotspots() == [] and inner.breakdown()['transcript'] >= 0.005
+    assert json.loads(inner.speedscope())['profiles'][0]['samples'] == []
+
+
+def test_store_keeps_the_most_recent_profiles():
+    store = ProfileStore(max_profiles=2)
+    for key in ("a", "b", "c"):
+        store.put(key, Profile(key))
+    assert store.get("a") is None
+    assert store.get("c").name == "c"
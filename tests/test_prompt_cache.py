@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import httpx
+from autogen_core.models import CreateResult, SystemMessage, UserMessage
+
+from fake_anthropic import FakeAnthropicServer, FakeMessagesAPI
+from model_pool import ModelClientPool
+from prompt_cache import EPHEMERAL, PromptCachingTransport, fold_cache_usage, mark_cacheable, prompt_cache_usage
+from telemetry import DebateTelemetry, InstrumentedChatCompletionClient
+
+# Comfortably over the API's 1024-token minimum for a cached prefix
+SYSTEM_PROMPT = "You are John, a debater arguing for the motion. " * 120
+
+
+def breakpoints(payload):
+    return json.dumps(payload).count('"cache_control"')
+
+
+def test_breakpoints_go_on_the_system_prompt_and_the_last_messages():
+    payload = {
+        'system': "Be brief.",
+        'messages': [{'role': ("user", "assistant")[i % 2], 'content': f"turn {i}"} for i in range(6)],
+    }
+    mark_cacheable(payload)
+    assert payload['system'] == [{'type': 'text', 'text': "Be brief.", 'cache_control': EPHEMERAL}]
+    marked = [i for i, m in enumerate(payload['messages']) if isinstance(m['content'], list)]
+    assert marked == [3, 4, 5]
+    assert payload['messages'][0]['content'] == "turn 0"
+    # The Messages API rejects more than four breakpoints per request
+    assert breakpoints(payload) == 4
+
+
+def test_empty_blocks_and_block_lists_are_handled():
+    payload = {
+        'system': "",
+        'messages': [
+            {'role': 'user', 'content': [{'type': 'text', 'text': "a"}, {'type': 'text', 'text': "b"}]},
+            {'role': 'assistant', 'content': [{'type': 'text', 'text': ""}]},
+        ],
+    }
+    mark_cacheable(payload)
+    assert payload['system'] == ""
+    assert payload['messages'][0]['content'][0] == {'type': 'text', 'text': "a"}
+    assert payload['messages'][0]['content'][1]['cache_control'] == EPHEMERAL
+    assert 'cache_control' not in payload['messages'][1]['content'][0]
+
+
+def test_folding_counts_cached_tokens_as_input_and_reports_them():
+    holder = {}
+    prompt_cache_usage.set(holder)
+    usage = {'input_tokens': 10, 'cache_read_input_tokens': 1000, 'cache_creation_input_tokens': 200}
+    assert fold_cache_usage(usage) == (1000, 200)
+    assert usage['input_tokens'] == 1210
+    assert holder == {'cache_read_tokens': 1000, 'cache_write_tokens': 200}
+
+
+def test_other_requests_pass_through_unchanged():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={'data': []})
+
+    async def run():
+        async with httpx.AsyncClient(transport=PromptCachingTransport(httpx.MockTransport(handler))) as client:
+            return await client.get("https://api.example.com/v1/models", headers={'Accept-Encoding': "gzip"})
+
+    response = asyncio.run(run())
+    assert response.json() == {'data': []}
+    assert seen[0].headers['accept-encoding'] == "gzip"
+
+
+def debate_calls(prompt_caching, monkeypatch):
+    """Two streamed turns with the same long system prompt through a real Anthropic client; returns (metrics, requests)"""
+    server = FakeAnthropicServer(FakeMessagesAPI())
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', server.start())
+    pool = ModelClientPool(prompt_caching=prompt_caching)
+    telemetry = DebateTelemetry()
+    client = InstrumentedChatCompletionClient(
+        pool.get("claude-3-5-sonnet-20241022", "offline-test", max_retries=0, max_tokens=100), telemetry, "John"
+    )
+
+    async def turn(question):
+        async for chunk in client.create_stream([
+            SystemMessage(content=SYSTEM_PROMPT), UserMessage(content=question, source="Host"),
+        ]):
+            if isinstance(chunk, CreateResult):
+                return telemetry.turn_metrics("John", chunk.usage)
+
+    async def run():
+        try:
+            return [await turn("Opening statement, please."), await turn("And your rebuttal?")]
+        finally:
+            await pool.close()
+
+    try:
+        return asyncio.run(run()), server.api.requests
+    finally:
+        server.stop()
+
+
+def test_cache_usage_reaches_the_turn_metrics(monkeypatch):
+    (first, second), requests = debate_calls(True, monkeypatch)
+    assert all('cache_control' in json.dumps(r['system']) for r in requests)
+    assert first['cache_write_tokens'] > 1000 and first['cache_read_tokens'] == 0
+    # The second turn shares the system prompt but not the question, so it reads just the system prompt
+    assert 1000 < second['cache_read_tokens'] < first['cache_write_tokens']
+    # Cached reads still count as prompt tokens, just at a tenth of the price
+    assert second['prompt_tokens'] >= second['cache_read_tokens']
+    assert second['cost_usd'] < first['cost_usd']
+
+
+def test_requests_are_sent_unchanged_with_caching_off(monkeypatch):
+    (first, second), requests = debate_calls(False, monkeypatch)
+    assert len(requests) == 2
+    assert not any('cache_control' in json.dumps(r) for r in requests)
+    assert first['cache_read_tokens'] == second['cache_read_tokens'] == 0
+    assert first['cache_write_tokens'] == second['cache_write_tokens'] == 0
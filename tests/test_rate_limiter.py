@@ -0,0 +1,129 @@
+import asyncio
+
+from autogen_core.models import UserMessage
+
+from fake_model import FakeAPIError, FakeChatCompletionClient, LatencyModel
+from rate_limiter import AdaptiveConcurrency, RateLimitedChatCompletionClient, RateLimiter, TokenBucket
+
+
+def test_cancelled_while_waiting_for_tokens_returns_slot_and_tokens():
+    # 60 input tokens/min: a 120-token prompt has to wait about a minute for its share
+    limiter = RateLimiter(input_tokens_per_minute=60, max_concurrency=2)
+    client = RateLimitedChatCompletionClient(
+        FakeChatCompletionClient(latency=LatencyModel('fixed', 0.0)), limiter, expected_output_tokens=10
+    )
+
+    async def run():
+        task = asyncio.ensure_future(client.create([UserMessage(content="x" * 480, source="user")]))
+        await asyncio.sleep(0.1)
+        assert limiter.concurrency.in_flight == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.concurrency.limit == 2
+    assert limiter.input_tokens.tokens > 59
+    assert limiter.requests.tokens > 49
+
+
+def test_token_bucket_waits_for_its_share_of_the_refill():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    # Overdrawn by 30 tokens at one token per second
+    assert 29.5 < bucket.reserve(30) <= 30.0
+    bucket.refund(30)
+    assert bucket.reserve(1) < 1.5
+
+
+def test_concurrency_limit_halves_on_throttle_and_grows_back_slowly():
+    concurrency = AdaptiveConcurrency(initial=8, maximum=8)
+    assert concurrency.try_acquire()
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 4
+    concurrency.try_acquire()
+    concurrency.release(throttled=True)
+    concurrency.try_acquire()
+    concurrency.release(throttled=True)
+    concurrency.try_acquire()
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 1
+    # Never below the minimum, and +1/limit per success
+    concurrency.try_acquire()
+    concurrency.release()
+    assert concurrency.limit == 2
+    concurrency.try_acquire()
+    concurrency.release()
+    assert concurrency.limit == 2.5
+    assert concurrency.in_flight == 0
+
+
+def test_concurrency_slots_are_capped_at_the_limit():
+    concurrency = AdaptiveConcurrency(initial=2)
+    assert concurrency.try_acquire()
+    assert concurrency.try_acquire()
+    assert not concurrency.try_acquire()
+    concurrency.cancel()
+    assert concurrency.try_acquire()
+    assert concurrency.limit == 2
+
+
+def limited(inner, **options):
+    limiter = RateLimiter(**options)
+    # Room to grow, so a wrongly counted success would show
+    limiter.concurrency.limit = 2.0
+    return RateLimitedChatCompletionClient(inner, limiter, expected_output_tokens=10), limiter
+
+
+def ask(client):
+    return client.create([UserMessage(content="hi", source="user")])
+
+
+def test_only_successful_calls_grow_the_concurrency_limit():
+    rejected = FakeChatCompletionClient(latency=LatencyModel('fixed', 0.0), failure_rate=1.0, failure_status=400)
+    failing, limiter = limited(rejected)
+    try:
+        asyncio.run(ask(failing))
+    except FakeAPIError:
+        pass
+    assert limiter.concurrency.limit == 2.0 and limiter.concurrency.in_flight == 0
+
+    # A losing hedge is cancelled while the model is still answering
+    slow, limiter = limited(FakeChatCompletionClient(latency=LatencyModel('fixed', 10.0)))
+
+    async def run():
+        task = asyncio.ensure_future(ask(slow))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert limiter.concurrency.limit == 2.0 and limiter.concurrency.in_flight == 0
+
+    working, limiter = limited(FakeChatCompletionClient(latency=LatencyModel('fixed', 0.0), tokens_per_second=1e6))
+    asyncio.run(ask(working))
+    assert limiter.concurrency.limit == 2.5
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.backoffs = []
+
+    def backoff(self, attempt, error):
+        self.backoffs.append(attempt)
+        return 0.0
+
+
+def test_max_attempts_counts_every_call_and_the_first_retry_backs_off_least():
+    inner = FakeChatCompletionClient(latency=LatencyModel('fixed', 0.0), failure_rate=1.0, failure_status=503)
+    limiter = RecordingLimiter(max_attempts=4)
+    client = RateLimitedChatCompletionClient(inner, limiter, expected_output_tokens=10)
+    try:
+        asyncio.run(ask(client))
+    except FakeAPIError:
+        pass
+    assert inner.calls == 4
+    assert limiter.backoffs == [0, 1, 2]
+    # Backoff before the first retry is at most base_backoff
+    assert all(RateLimiter(base_backoff=0.5).backoff(0, FakeAPIError(503)) <= 0.5 for _ in range(50))
@@ -0,0 +1,63 @@
+import asyncio
+
+from autogen_core.models import SystemMessage, UserMessage
+
+import response_cache
+from fake_model import FakeChatCompletionClient, LatencyModel
+from response_cache import CachedChatCompletionClient, ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def conversation(last="Argue for."):
+    return [SystemMessage(content="You are John."), UserMessage(content=last, source="Host")]
+
+
+def test_cache_key_is_stable_and_covers_what_shapes_the_reply():
+    key = cache_key('claude', conversation(), {'max_tokens': 300, 'temperature': 0.7})
+    # Same content, rebuilt objects and reordered create args
+    assert key == cache_key('claude', conversation(), {'temperature': 0.7, 'max_tokens': 300})
+    assert key != cache_key('claude', conversation("Argue against."), {'max_tokens': 300, 'temperature': 0.7})
+    assert key != cache_key('claude-haiku', conversation(), {'max_tokens': 300, 'temperature': 0.7})
+    assert key != cache_key('claude', conversation(), {'max_tokens': 100, 'temperature': 0.7})
+
+
+def test_entries_expire_after_the_ttl(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, 'time', clock)
+    cache = ResponseCache(db_path=str(tmp_path / "cache.db"), ttl=60)
+    cache.put("k", "v")
+    clock.now += 59
+    assert cache.get("k") == "v"
+    clock.now += 2
+    assert cache.get("k") is None
+    cache.purge_expired()
+    assert cache.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+
+def test_disk_tier_survives_eviction_from_memory(tmp_path):
+    cache = ResponseCache(max_entries=1, db_path=str(tmp_path / "cache.db"))
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert list(cache.memory) == ["b"]
+    assert cache.get("a") == "1"
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_repeated_call_is_served_from_the_cache_and_marked_cached():
+    inner = FakeChatCompletionClient(latency=LatencyModel('fixed', 0.0), tokens_per_second=1e6)
+    client = CachedChatCompletionClient(inner, ResponseCache())
+    first = asyncio.run(client.create(conversation()))
+    again = asyncio.run(client.create(conversation()))
+    assert inner.calls == 1
+    assert again.content == first.content
+    assert again.cached and not first.cached
+    # A fresh debate skips the lookup
+    asyncio.run(CachedChatCompletionClient(inner, client.cache, bypass=True).create(conversation()))
+    assert inner.calls == 2
@@ -0,0 +1,61 @@
+import uuid
+
+from debate_store import get_debate_store
+from session_memory import DebateMessage, MessageLog, SessionMemory
+
+
+def stored_debate(turns):
+    debate_id = uuid.uuid4().hex
+    store = get_debate_store()
+    store.start_debate(debate_id, "Should AI be regulated?")
+    messages = [
+        {'speaker': ("John", "Jack")[i % 2], 'content': f"Turn {i} " + "argument " * 50, 'timestamp': "12:00:0" + str(i % 10),
+         'metrics': {'tokens': 100 + i, 'ttft_s': 0.25}}
+        for i in range(turns)
+    ]
+    for seq, msg in enumerate(messages):
+        store.add_message(debate_id, seq, msg)
+    return debate_id, messages
+
+
+def test_message_reads_like_the_dict_it_replaces():
+    msg = {'speaker': "John", 'content': "Opening.", 'timestamp': "09:05:07", 'metrics': {'tokens': 12}}
+    packed = DebateMessage.of(msg)
+    assert dict(packed) == msg and packed.get('metrics') == {'tokens': 12}
+    packed['metrics']['tokens'] = 0
+    assert packed['metrics'] == {'tokens': 12}
+    bare = DebateMessage("Host", "Welcome.", "not a time")
+    assert dict(bare) == {'speaker': "Host", 'content': "Welcome.", 'timestamp': "not a time"}
+
+
+def test_idle_log_spills_and_reloads_from_the_store():
+    memory = SessionMemory(idle_s=0)
+    debate_id, messages = stored_debate(6)
+    log = MessageLog(messages, debate_id=debate_id, memory=memory)
+    assert log.resident and log.nbytes > 0
+
+    # Any other log's sweep spills this one, since it has been idle for longer than idle_s
+    MessageLog(memory=memory)
+    assert not log.resident and log.nbytes == 0 and len(log) == 6
+    assert memory.stats()['spills'] == 1
+
+    assert [dict(m) for m in log] == messages
+    assert log.resident and memory.stats()['reloads'] == 1
+
+
+def test_least_recently_used_logs_spill_past_the_cap():
+    memory = SessionMemory(max_bytes=10**9)
+    older_id, older_messages = stored_debate(4)
+    older = MessageLog(older_messages, debate_id=older_id, memory=memory)
+    newer_id, newer_messages = stored_debate(4)
+    newer = MessageLog(newer_messages, debate_id=newer_id, memory=memory)
+    memory.max_bytes = newer.nbytes
+    newer.append({'speaker': "John", 'content': "One more.", 'timestamp': "12:01:00"})
+    assert not older.resident and newer.resident and len(newer) == 5
+
+
+def test_log_without_a_stored_copy_never_spills():
+    memory = SessionMemory(max_bytes=0, idle_s=0)
+    log = MessageLog([{'speaker': "John", 'content': "Unsaved.", 'timestamp': "12:00:00"}], memory=memory)
+    MessageLog(memory=memory)
+    assert log.resident and len(log) == 1 and memory.stats()['spills'] == 0
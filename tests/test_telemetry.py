@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from autogen_core.models import CreateResult, RequestUsage, UserMessage
+
+from fake_model import FakeChatCompletionClient, LatencyModel
+from telemetry import (
+    DebateTelemetry, InstrumentedChatCompletionClient, estimate_cost, metrics_jsonl, metrics_prometheus,
+    summarize_metrics,
+)
+
+SONNET = 'claude-3-5-sonnet-20241022'
+
+
+def test_cost_prices_cache_reads_and_writes_at_their_rates():
+    # 1M prompt tokens on Sonnet: $3 uncached, $0.30 read from the cache, $3.75 written to it
+    assert estimate_cost(SONNET, 1_000_000, 0) == 3.0
+    assert round(estimate_cost(SONNET, 1_000_000, 0, cache_read_tokens=1_000_000), 6) == 0.3
+    assert round(estimate_cost(SONNET, 1_000_000, 0, cache_write_tokens=1_000_000), 6) == 3.75
+    assert round(estimate_cost(SONNET, 1_000_000, 1_000_000, 500_000, 250_000), 6) == 0.75 + 0.15 + 0.9375 + 15.0
+    assert estimate_cost('claude-3-5-haiku-20241022', 1_000_000, 1_000_000) == 4.8
+    assert estimate_cost('some-future-model', 1_000_000, 0) == 3.0
+
+
+def test_turn_combines_the_speakers_calls_since_its_last_turn():
+    telemetry = DebateTelemetry()
+    telemetry.record_call("John", SONNET, 0.5, 0.2, 1.0, False, cache_usage={'cache_read_tokens': 800})
+    telemetry.record_call("John", SONNET, 0.0, 0.4, 2.0, False, hedged_call=True)
+    telemetry.record_call("Jack", SONNET, 0.0, 0.3, 0.9, False)
+    metrics = telemetry.turn_metrics("John", RequestUsage(prompt_tokens=1000, completion_tokens=100))
+    assert metrics['queue_wait_s'] == 0.5 and metrics['ttft_s'] == 0.2 and metrics['latency_s'] == 3.0
+    assert metrics['cache_read_tokens'] == 800 and metrics['hedged']
+    assert metrics['cost_usd'] == round(estimate_cost(SONNET, 1000, 100, 800), 6)
+    assert telemetry.turn_metrics("John", None) is None
+    assert "Jack" in telemetry.pending
+
+
+def test_cached_turns_are_free():
+    telemetry = DebateTelemetry()
+    telemetry.record_call("Host", SONNET, 0.0, 0.0, 0.01, True)
+    metrics = telemetry.turn_metrics("Host", RequestUsage(prompt_tokens=1000, completion_tokens=100))
+    assert metrics['cached'] and metrics['cost_usd'] == 0.0
+    assert metrics['prompt_tokens'] == 1000
+    assert telemetry.spent_tokens == 0 and telemetry.spent_usd == 0.0
+
+
+def test_instrumented_stream_times_the_first_token():
+    telemetry = DebateTelemetry()
+    inner = FakeChatCompletionClient(model=SONNET, latency=LatencyModel('fixed', 0.05), tokens_per_second=200)
+    client = InstrumentedChatCompletionClient(inner, telemetry, "Jack")
+
+    async def run():
+        async for chunk in client.create_stream([UserMessage(content="Go.", source="Host")]):
+            if isinstance(chunk, CreateResult):
+                return chunk
+
+    result = asyncio.run(run())
+    metrics = telemetry.turn_metrics("Jack", result.usage)
+    assert metrics['model'] == SONNET
+    assert 0.05 <= metrics['ttft_s'] < metrics['latency_s']
+    assert metrics['completion_tokens'] == result.usage.completion_tokens
+
+
+def test_exports_sum_per_speaker():
+    metrics = {
+        'model': SONNET, 'queue_wait_s': 0.1, 'ttft_s': 0.2, 'latency_s': 1.0, 'prompt_tokens': 100,
+        'completion_tokens': 10, 'cost_usd': 0.00045, 'cached': False, 'hedged': True,
+    }
+    messages = [
+        {'speaker': "user", 'content': "Topic", 'timestamp': "10:00:00"},
+        {'speaker': "John", 'content': "For.", 'timestamp': "10:00:01", 'metrics': metrics},
+        {'speaker': "John", 'content': "Still for.", 'timestamp': "10:00:02", 'metrics': dict(metrics, cached=True, cost_usd=0.0)},
+    ]
+    totals = summarize_metrics(messages)
+    assert totals['turns'] == 2 and totals['cached_turns'] == 1 and totals['hedged_turns'] == 2
+    assert totals['cost_usd'] == 0.00045 and totals['prompt_tokens'] == 200
+    assert summarize_metrics(messages[:1]) is None
+
+    rows = [json.loads(line) for line in metrics_jsonl(messages, "Topic").splitlines()]
+    assert [r['turn'] for r in rows] == [2, 3] and rows[0]['topic'] == "Topic"
+    assert metrics_jsonl(messages[:1]) == ""
+
+    exposition = metrics_prometheus(messages)
+    assert 'debate_turns_total{speaker="John"} 2' in exposition
+    assert 'debate_prompt_tokens_total{speaker="John"} 200' in exposition
+    assert 'speaker="user"' not in exposition
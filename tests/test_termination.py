@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from autogen_agentchat.messages import TextMessage
+from autogen_core.models import RequestUsage
+
+from telemetry import DebateTelemetry
+from termination import BudgetTermination, DeadlineTermination, VerdictTermination, debate_termination, find_verdict
+
+
+def turn(telemetry, speaker, prompt_tokens, completion_tokens, cached=False):
+    """One finished turn as stream_debate sees it: telemetry first, then the termination condition"""
+    telemetry.record_call(speaker, 'claude-3-5-sonnet-20241022', 0.0, 0.1, 0.2, cached)
+    usage = RequestUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    telemetry.turn_metrics(speaker, usage)
+    return TextMessage(content="An argument.", source=speaker, models_usage=usage)
+
+
+def test_cached_turns_do_not_count_against_the_token_budget():
+    telemetry = DebateTelemetry()
+    condition = BudgetTermination(telemetry, max_tokens=1000)
+    for _ in range(5):
+        # Replayed from the response cache with the original usage
+        assert asyncio.run(condition([turn(telemetry, "John", 400, 100, cached=True)])) is None
+    assert telemetry.spent_tokens == 0
+    assert asyncio.run(condition([turn(telemetry, "Jack", 400, 100)])) is None
+    stop = asyncio.run(condition([turn(telemetry, "John", 400, 100)]))
+    assert stop is not None and "Token budget of 1000" in stop.content
+
+
+def test_cost_ceiling_uses_the_priced_turns():
+    telemetry = DebateTelemetry()
+    condition = BudgetTermination(telemetry, max_cost_usd=0.008)
+    # 1000 prompt + 100 completion tokens on Sonnet: $0.0045
+    assert asyncio.run(condition([turn(telemetry, "John", 1000, 100)])) is None
+    assert asyncio.run(condition([turn(telemetry, "Jack", 1000, 100, cached=True)])) is None
+    assert asyncio.run(condition([turn(telemetry, "Host", 1000, 100)])) is not None
+
+
+def test_budgets_resume_from_the_recorded_turns():
+    telemetry = DebateTelemetry()
+    telemetry.restore([
+        {'speaker': "John", 'metrics': {'cached': False, 'prompt_tokens': 800, 'completion_tokens': 200, 'cost_usd': 0.1}},
+        {'speaker': "Jack", 'metrics': {'cached': True, 'prompt_tokens': 800, 'completion_tokens': 200, 'cost_usd': 0.0}},
+        {'speaker': "user"},
+    ])
+    assert telemetry.spent_tokens == 1000
+    assert asyncio.run(BudgetTermination(telemetry, max_tokens=1000)([])) is not None
+
+
+def test_verdict_is_read_from_the_host_only():
+    condition = VerdictTermination()
+    assert asyncio.run(condition([TextMessage(content="OVERALL WINNER: John", source="Jack")])) is None
+    stop = asyncio.run(condition([TextMessage(content="The overall winner is... Jack!", source="Host")]))
+    assert stop is not None and "Jack" in stop.content
+    assert find_verdict("no decision yet") is None
+
+
+def test_rebuilt_deadline_keeps_the_original_start():
+    started = time.monotonic() - 5.0
+    # A retry builds a new condition, but it still counts from the first attempt
+    condition = debate_termination(deadline_s=4.0, stop_when_stale=False, started=started)
+    stop = asyncio.run(condition([TextMessage(content="An argument.", source="John")]))
+    assert stop is not None and "Timeout of 4.0 seconds" in stop.content
+
+    deadline = DeadlineTermination(4.0, started)
+    asyncio.run(deadline.reset())
+    assert asyncio.run(deadline([])) is not None
+    assert asyncio.run(DeadlineTermination(60.0, started)([])) is None
@@ -0,0 +1,67 @@
+import json
+
+from transcript_export import export_transcripts, iter_transcript, write_transcript
+
+METRICS = {
+    'model': "claude-3-5-sonnet-20241022", 'queue_wait_s': 0.0, 'ttft_s': 0.4, 'latency_s': 1.2,
+    'prompt_tokens': 500, 'completion_tokens': 60, 'cost_usd': 0.0024, 'cached': False,
+}
+MESSAGES = [
+    {'speaker': "user", 'content': "Natural debate on: \"Tea or coffee?\"", 'timestamp': "10:00:00"},
+    {'speaker': "Host", 'content': "Welcome, both.", 'timestamp': "10:00:01", 'metrics': METRICS},
+    {'speaker': "John", 'content': "Tea — calmer focus.", 'timestamp': "10:00:03", 'metrics': METRICS},
+    {'speaker': "Jack", 'content': "Coffee wins on \"energy\".", 'timestamp': "10:00:05", 'metrics': METRICS},
+]
+
+
+def one_pass(messages):
+    """A generator that fails the test if anything walks it a second time"""
+    walked = []
+
+    def rows():
+        assert not walked, "messages were walked twice"
+        walked.append(True)
+        yield from messages
+    return rows()
+
+
+def test_every_format_comes_from_a_single_pass():
+    exports = export_transcripts(one_pass(MESSAGES), "Tea or coffee?", date="2026-01-02 03:04:05")
+    assert set(exports) == {'txt', 'md', 'json', 'jsonl'}
+    for text in exports.values():
+        assert "Coffee wins" in text
+
+
+def test_json_export_is_one_valid_document_with_statistics():
+    data = json.loads(export_transcripts(MESSAGES, "Tea or coffee?", ('json',), date="today")['json'])
+    assert data['topic'] == "Tea or coffee?" and data['date'] == "today"
+    assert [m['turn'] for m in data['messages']] == [1, 2, 3, 4]
+    assert data['messages'][2]['content'] == "Tea — calmer focus."
+    stats = data['statistics']
+    assert stats['messages'] == 4
+    assert stats['by_speaker'] == {'Host': 1, 'John': 1, 'Jack': 1, 'user': 1}
+    assert stats['metrics']['turns'] == 3 and stats['metrics']['prompt_tokens'] == 1500
+
+
+def test_jsonl_export_has_one_message_per_line():
+    lines = "".join(iter_transcript(MESSAGES, "Tea or coffee?", 'jsonl')).splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [r['speaker'] for r in rows] == ["user", "Host", "John", "Jack"]
+    assert all(r['topic'] == "Tea or coffee?" for r in rows)
+
+
+def test_text_and_markdown_name_roles_and_totals():
+    exports = export_transcripts(MESSAGES, "Tea or coffee?", ('txt', 'md'), date="today")
+    assert "Total Messages: 4" in exports['txt'] and "John (Supporter):" in exports['txt']
+    assert "- Prompt Tokens: 1500" in exports['txt']
+    assert "### 3. John (Supporter) · 10:00:03" in exports['md']
+    assert "| Jack | 1 |" in exports['md']
+    # A stream of unknown length has no message count in the header
+    assert "Total Messages" not in export_transcripts(one_pass(MESSAGES), "Tea or coffee?", ('txt',))['txt']
+
+
+def test_transcript_without_metrics_has_no_totals(tmp_path):
+    plain = [{k: v for k, v in m.items() if k != 'metrics'} for m in MESSAGES]
+    path = write_transcript(plain, "Tea or coffee?", str(tmp_path / "debate.md"), date="today")
+    text = open(path, encoding='utf-8').read()
+    assert text.startswith("# 🎭 AI Debate Transcript") and "Estimated cost" not in text
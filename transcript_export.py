@@ -0,0 +1,185 @@
+import io
+import json
+from datetime import datetime
+
+from telemetry import summarize_metrics
+
+ROLES = {'John': 'Supporter', 'Jack': 'Critic', 'Host': 'Moderator'}
+
+
+class TranscriptStats:
+    """Message counts per speaker and turn metrics, gathered while the messages are written"""
+
+    def __init__(self):
+        self.messages = 0
+        self.by_speaker = {'Host': 0, 'John': 0, 'Jack': 0}
+        self.metered = []
+
+    def add(self, msg):
+        self.messages += 1
+        self.by_speaker[msg['speaker']] = self.by_speaker.get(msg['speaker'], 0) + 1
+        if msg.get('metrics'):
+            self.metered.append(msg)
+
+    def summary(self):
+        return {
+            'messages': self.messages,
+            'by_speaker': self.by_speaker,
+            'metrics': summarize_metrics(self.metered),
+        }
+
+
+class TextTranscript:
+    mime = "text/plain"
+    extension = "txt"
+
+    def header(self, topic, date, total):
+        count = f"Total Messages: {total}\n" if total is not None else ""
+        return f"""🎭 AI DEBATE TRANSCRIPT
+======================
+Topic: {topic}
+Date: {date}
+{count}
+DEBATE CONTENT:
+===============
+"""
+
+    def message(self, turn, msg):
+        role = f" ({ROLES[msg['speaker']]})" if msg['speaker'] in ROLES else ""
+        return f"""
+[{msg['timestamp']}] {msg['speaker']}{role}:
+{msg['content']}
+
+{'-'*50}
+"""
+
+    def footer(self, stats):
+        text = f"""
+
+DEBATE STATISTICS:
+==================
+- Host Messages: {stats['by_speaker']['Host']}
+- John Messages: {stats['by_speaker']['John']}
+- Jack Messages: {stats['by_speaker']['Jack']}
+"""
+        totals = stats['metrics']
+        if totals:
+            text += f"""- Prompt Tokens: {totals['prompt_tokens']}
+- Completion Tokens: {totals['completion_tokens']}
+- Estimated Cost: ${totals['cost_usd']:.4f}
+- Average Time To First Token: {totals['avg_ttft_s']}s
+- p95 Turn Latency: {totals['p95_latency_s']}s
+- Total Model Time: {totals['total_latency_s']}s
+"""
+        return text + """
+
+Generated by AI Debate Arena 🎭
+"""
+
+
+class MarkdownTranscript:
+    mime = "text/markdown"
+    extension = "md"
+
+    def header(self, topic, date, total):
+        count = f"  \n**Messages:** {total}" if total is not None else ""
+        return f"# 🎭 AI Debate Transcript\n\n**Topic:** {topic}  \n**Date:** {date}{count}\n\n## Debate\n"
+
+    def message(self, turn, msg):
+        role = f" ({ROLES[msg['speaker']]})" if msg['speaker'] in ROLES else ""
+        return f"\n### {turn}. {msg['speaker']}{role} · {msg['timestamp']}\n\n{msg['content']}\n"
+
+    def footer(self, stats):
+        rows = "".join(f"| {speaker} | {count} |\n" for speaker, count in stats['by_speaker'].items())
+        text = f"\n## Statistics\n\n| Speaker | Messages |\n|---|---|\n{rows}"
+        totals = stats['metrics']
+        if totals:
+            text += (
+                f"\n- Tokens: {totals['prompt_tokens']} in / {totals['completion_tokens']} out\n"
+                f"- Estimated cost: ${totals['cost_usd']:.4f}\n"
+                f"- Average time to first token: {totals['avg_ttft_s']}s\n"
+                f"- p95 turn latency: {totals['p95_latency_s']}s\n"
+            )
+        return text + "\n*Generated by AI Debate Arena 🎭*\n"
+
+
+class JsonTranscript:
+    mime = "application/json"
+    extension = "json"
+
+    def header(self, topic, date, total):
+        # Written piece by piece so long debates never sit in memory as one object
+        return f'{{"topic": {json.dumps(topic, ensure_ascii=False)}, "date": {json.dumps(date)}, "messages": ['
+
+    def message(self, turn, msg):
+        return ("" if turn == 1 else ", ") + json.dumps(dict(msg, turn=turn), ensure_ascii=False)
+
+    def footer(self, stats):
+        return f'], "statistics": {json.dumps(stats, ensure_ascii=False)}}}\n'
+
+
+class JsonLinesTranscript:
+    mime = "application/jsonl"
+    extension = "jsonl"
+
+    def header(self, topic, date, total):
+        self.topic = topic
+        return ""
+
+    def message(self, turn, msg):
+        return json.dumps(dict(msg, topic=self.topic, turn=turn), ensure_ascii=False) + "\n"
+
+    def footer(self, stats):
+        return ""
+
+
+FORMATS = {
+    'txt': TextTranscript,
+    'md': MarkdownTranscript,
+    'json': JsonTranscript,
+    'jsonl': JsonLinesTranscript,
+}
+
+
+def iter_transcripts(messages, topic, formats=tuple(FORMATS), date=None):
+    """Walk the messages once, yielding (format, text chunk) for every requested format
+
+    `messages` may be any iterable (e.g. rows streamed from the debate store);
+    statistics are gathered during the same pass and written at the end.
+    """
+    writers = {fmt: FORMATS[fmt]() for fmt in formats}
+    date = date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    total = len(messages) if hasattr(messages, '__len__') else None
+    stats = TranscriptStats()
+    for fmt, writer in writers.items():
+        yield fmt, writer.header(topic, date, total)
+    for turn, msg in enumerate(messages, 1):
+        stats.add(msg)
+        for fmt, writer in writers.items():
+            yield fmt, writer.message(turn, msg)
+    summary = stats.summary()
+    for fmt, writer in writers.items():
+        yield fmt, writer.footer(summary)
+
+
+def iter_transcript(messages, topic, fmt='txt', date=None):
+    """Text chunks of one transcript format"""
+    for _, chunk in iter_transcripts(messages, topic, (fmt,), date):
+        yield chunk
+
+
+def export_transcripts(messages, topic, formats=tuple(FORMATS), date=None):
+    """Every requested format as a complete string, from a single pass over the messages"""
+    buffers = {fmt: io.StringIO() for fmt in formats}
+    for fmt, chunk in iter_transcripts(messages, topic, formats, date):
+        buffers[fmt].write(chunk)
+    return {fmt: buffer.getvalue() for fmt, buffer in buffers.items()}
+
+
+def write_transcript(messages, topic, path, fmt=None, date=None):
+    """Stream one transcript to a file; the format defaults to the file extension"""
+    fmt = fmt or path.rsplit('.', 1)[-1]
+    with open(path, 'w', encoding='utf-8') as output:
+        for chunk in iter_transcript(messages, topic, fmt, date):
+            output.write(chunk)
+    return path